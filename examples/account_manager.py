@@ -1,61 +1,111 @@
+import argparse
 import csv
+import io
+import mmap
 import os
 
-def add_account(account_index, api_key_index, api_key_private_key, description):
-    """添加新账户到CSV文件"""
-    csv_file = "examples/accounts.csv"
+# 账户文件同时被 parallel_btc_trading.py / random_trading.py 等脚本读取，保持CSV格式
+CSV_FILE = "examples/accounts.csv"
+HEADER = ['account_index', 'api_key_index', 'api_key_private_key', 'description']
+
+def add_accounts(rows):
+    """批量添加账户到CSV文件，rows 为 (account_index, api_key_index, api_key_private_key, description) 元组列表"""
+    csv_file = CSV_FILE
+    if not rows:
+        return
     
-    # 检查文件是否存在，如果不存在则创建
-    if not os.path.exists(csv_file):
-        with open(csv_file, 'w', newline='', encoding='utf-8') as file:
+    # 只打开一次文件：空文件先写表头，再一次性写入所有账户
+    with open(csv_file, 'a+b', buffering=1 << 16) as raw:
+        raw.seek(0, os.SEEK_END)
+        size = raw.tell()
+        with io.TextIOWrapper(raw, encoding='utf-8', newline='') as file:
             writer = csv.writer(file)
-            writer.writerow(['account_index', 'api_key_index', 'api_key_private_key', 'description'])
-    
-    # 添加新账户
-    with open(csv_file, 'a', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow([account_index, api_key_index, api_key_private_key, description])
+            if size == 0:
+                writer.writerow(HEADER)
+            else:
+                # 文件末尾缺少换行时补上，避免新行接在最后一行后面
+                raw.seek(size - 1)
+                if raw.read(1) not in (b'\n', b'\r'):
+                    file.write('\r\n')
+            writer.writerows(rows)
     
-    print(f"成功添加账户: {description}")
+    for row in rows:
+        print(f"成功添加账户: {row[3]}")
+
+def add_account(account_index, api_key_index, api_key_private_key, description):
+    """添加新账户到CSV文件"""
+    add_accounts([(account_index, api_key_index, api_key_private_key, description)])
 
 def list_accounts():
     """列出所有账户"""
-    csv_file = "examples/accounts.csv"
+    csv_file = CSV_FILE
     if not os.path.exists(csv_file):
         print("没有找到账户文件")
         return
     
     print("=== 账户列表 ===")
-    with open(csv_file, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for i, row in enumerate(reader, 1):
-            print(f"{i}. {row['description']} (索引: {row['account_index']}, API密钥: {row['api_key_index']})")
+    # 内存映射按需分页读取，逐行解析，不为每行构造dict
+    with open(csv_file, 'rb') as file:
+        # 空文件无法建立映射
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lines = iter(mm.readline, b'')
+            header = next(csv.reader([next(lines).decode('utf-8-sig')]))
+            index_col = header.index('account_index')
+            key_col = header.index('api_key_index')
+            desc_col = header.index('description')
+            # 私钥等字段可能带引号或逗号，仍交给csv模块解析
+            rows = csv.reader(line.decode('utf-8') for line in lines if line.strip())
+            width = max(index_col, key_col, desc_col) + 1
+            for i, row in enumerate(rows, 1):
+                # 旧版本追加的行列数可能少于表头，补齐空列
+                if len(row) < width:
+                    row += [''] * (width - len(row))
+                print(f"{i}. {row[desc_col]} (索引: {row[index_col]}, API密钥: {row[key_col]})")
 
 def remove_account(account_index):
     """删除指定账户"""
-    csv_file = "examples/accounts.csv"
+    csv_file = CSV_FILE
     if not os.path.exists(csv_file):
         print("没有找到账户文件")
         return
     
-    # 读取所有账户
-    accounts = []
-    with open(csv_file, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if int(row['account_index']) != account_index:
-                accounts.append(row)
-    
-    # 写回文件
-    with open(csv_file, 'w', newline='', encoding='utf-8') as file:
-        if accounts:
-            writer = csv.DictWriter(file, fieldnames=['account_index', 'api_key_index', 'api_key_private_key', 'description'])
-            writer.writeheader()
-            writer.writerows(accounts)
+    # 逐行流式写入临时文件，最后原子替换，避免把所有账户读入内存
+    tmp_file = csv_file + '.tmp'
+    removed = False
+    try:
+        with open(csv_file, 'r', newline='', encoding='utf-8') as fin, \
+                open(tmp_file, 'w', newline='', encoding='utf-8') as fout:
+            # 表头原样复制（保留原有的全部列），数据行沿用表头的换行符
+            header_line = fin.readline()
+            fout.write(header_line)
+            lineterminator = '\r\n' if header_line.endswith('\r\n') else '\n'
+            index_col = next(csv.reader([header_line.lstrip('\ufeff')])).index('account_index')
+            writer = csv.writer(fout, lineterminator=lineterminator)
+            for row in csv.reader(fin):
+                if not row:
+                    continue
+                if int(row[index_col]) != account_index:
+                    writer.writerow(row)
+                else:
+                    removed = True
+        
+        # 没有匹配的账户时不替换原文件
+        if not removed:
+            print(f"没有找到账户索引: {account_index}")
+            return
+        
+        os.replace(tmp_file, csv_file)
+    finally:
+        # 未替换（没有匹配或中途出错）时删除临时文件
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
     
     print(f"成功删除账户索引: {account_index}")
 
-def main():
+def interactive():
+    """交互式菜单，逐个操作账户"""
     while True:
         print("\n=== 账户管理 ===")
         print("1. 添加账户")
@@ -86,5 +136,47 @@ def main():
         else:
             print("无效选择，请重新输入")
 
+def import_accounts(path):
+    """从CSV文件批量导入账户，每行为 account_index,api_key_index,api_key_private_key,description"""
+    with open(path, 'r', newline='', encoding='utf-8') as file:
+        rows = [row for row in csv.reader(file) if row]
+    # 允许导入文件带表头
+    if rows and rows[0][0] == 'account_index':
+        rows = rows[1:]
+    add_accounts(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="账户管理")
+    subparsers = parser.add_subparsers(dest='command')
+
+    add_parser = subparsers.add_parser('add', help="添加账户")
+    add_parser.add_argument('account_index', type=int, help="账户索引")
+    add_parser.add_argument('api_key_index', type=int, help="API密钥索引")
+    add_parser.add_argument('api_key_private_key', help="API密钥私钥")
+    add_parser.add_argument('description', help="账户描述")
+
+    subparsers.add_parser('list', help="列出账户")
+
+    remove_parser = subparsers.add_parser('remove', help="删除账户")
+    remove_parser.add_argument('account_index', type=int, help="要删除的账户索引")
+
+    import_parser = subparsers.add_parser('import', help="从CSV文件批量导入账户")
+    import_parser.add_argument('--file', required=True, help="待导入的CSV文件路径")
+
+    subparsers.add_parser('interactive', help="交互式菜单（默认）")
+
+    args = parser.parse_args()
+
+    if args.command == 'add':
+        add_account(args.account_index, args.api_key_index, args.api_key_private_key, args.description)
+    elif args.command == 'list':
+        list_accounts()
+    elif args.command == 'remove':
+        remove_account(args.account_index)
+    elif args.command == 'import':
+        import_accounts(args.file)
+    else:
+        interactive()
+
 if __name__ == "__main__":
     main()
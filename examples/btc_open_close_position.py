@@ -16,7 +16,9 @@ import os
 import sys
 import time
 import traceback
+from time import time_ns
 import aiohttp
+import websockets
 from decimal import Decimal
 
 # 添加paradex目录到Python路径
@@ -26,15 +28,20 @@ from shared.api_config import ApiConfig
 from shared.paradex_api_utils import Order, OrderSide, OrderType
 from shared.api_client import (
     get_jwt_token, 
-    get_paradex_config, 
+    get_paradex_config_cached,
     post_order_payload, 
     sign_order,
     get_open_orders,
     delete_order_payload,
     fetch_positions,
     get_markets,
-    get_bbo
+    get_bbo,
+    json_loads,
+    order_sign_cache,
+    send_auth_id,
+    subscribe_channel_with_id,
 )
+from shared.api_client_utils import TokenExpired
 from onboarding import perform_onboarding
 from utils import (
     generate_paradex_account,
@@ -47,13 +54,16 @@ logging.basicConfig(
     format="%(asctime)s.%(msecs)03d | %(levelname)s | %(message)s",
     datefmt="%Y-%m-%d %H:%M:%S",
 )
+logger = logging.getLogger(__name__)
 
 # 配置参数
 PARADEX_HTTP_URL = "https://api.prod.paradex.trade/v1"
+PARADEX_WS_URL = "wss://ws.api.prod.paradex.trade/v1"
 BTC_MARKET = "BTC-USD-PERP"
 ORDER_SIZE = Decimal("0.001")  # 0.001 BTC
 CLIENT_ID_BUY = "btc-buy-order"
 CLIENT_ID_SELL = "btc-sell-order"
+CANCEL_CONCURRENCY = 8  # 并发取消订单的最大请求数
 
 # 在这里直接设置您的以太坊私钥（去掉0x前缀）
 ETHEREUM_PRIVATE_KEY = "082fd5384ea743fdf51957d3b244bad9ec6f3b6ec56a148655b539f452cdf3d0"
@@ -62,10 +72,17 @@ class BTCParadexTrader:
     def __init__(self):
         self.config = None
         self.jwt_token = None
+        self.session = None
+        self.ws = None
+        self.ws_task = None
+        self._fill_event = None
+        self._fill_client_id = None  # 正在等待成交的订单client_id
+        self.tick_size = None  # 价格最小变动单位（Decimal）
+        self._tick = None  # tick_size 的浮点值，用于快速换算
         
     async def initialize(self):
         """初始化Paradex账户和认证"""
-        logging.info("开始初始化Paradex交易...")
+        logger.info("开始初始化Paradex交易...")
         
         # 优先使用代码中设置的私钥，如果没有设置则使用环境变量
         eth_private_key = ETHEREUM_PRIVATE_KEY
@@ -75,70 +92,174 @@ class BTCParadexTrader:
         if not eth_private_key or eth_private_key == "your_ethereum_private_key_here":
             raise ValueError("请设置私钥：在代码中设置 ETHEREUM_PRIVATE_KEY 变量或设置环境变量 ETHEREUM_PRIVATE_KEY")
         
+        # 创建长连接HTTP会话，供价格查询复用（避免每次请求重新握手）
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=8, keepalive_timeout=30)
+        )
+        
         # 创建配置
         self.config = ApiConfig()
         self.config.paradex_http_url = PARADEX_HTTP_URL
         self.config.ethereum_private_key = eth_private_key
         
         # 获取Paradex配置
-        logging.info("获取Paradex配置...")
-        self.config.paradex_config = await get_paradex_config(PARADEX_HTTP_URL)
+        logger.info("获取Paradex配置...")
+        self.config.paradex_config = await get_paradex_config_cached(PARADEX_HTTP_URL)
         
         # 生成Paradex账户
-        logging.info("生成Paradex账户...")
+        logger.info("生成Paradex账户...")
         _, eth_account = get_l1_eth_account(eth_private_key)
         self.config.paradex_account, self.config.paradex_account_private_key = generate_paradex_account(
             self.config.paradex_config, eth_account.key.hex()
         )
         
-        # 执行onboarding
-        logging.info("执行账户onboarding...")
-        await perform_onboarding(
-            self.config.paradex_config,
-            self.config.paradex_http_url,
-            self.config.paradex_account,
-            self.config.paradex_account_private_key,
-            eth_account.address,
+        # 预先计算订单签名中不变的哈希部分（域、账户、类型哈希）
+        order_sign_cache(self.config)
+        
+        # 执行onboarding，同时预热价格查询会话的连接（DNS/TLS/keep-alive）
+        logger.info("执行账户onboarding...")
+        await asyncio.gather(
+            perform_onboarding(
+                self.config.paradex_config,
+                self.config.paradex_http_url,
+                self.config.paradex_account,
+                self.config.paradex_account_private_key,
+                eth_account.address,
+            ),
+            self._warm_bbo_session(),
         )
         
         # 获取JWT token
-        logging.info("获取JWT token...")
+        logger.info("获取JWT token...")
+        await self._refresh_jwt_token()
+        
+        # 获取价格最小变动单位，下单价格按tick对齐
+        await self._load_tick_size()
+        
+        # 订阅成交推送，用于等待订单成交
+        self._fill_event = asyncio.Event()
+        self.ws_task = asyncio.create_task(self._ws_reader())
+        
+        logger.info("Paradex初始化完成！")
+    
+    async def _refresh_jwt_token(self):
+        """（重新）获取JWT token"""
         self.jwt_token = await get_jwt_token(
             self.config.paradex_config,
             self.config.paradex_http_url,
             self.config.paradex_account,
             self.config.paradex_account_private_key,
         )
-        
-        logging.info("Paradex初始化完成！")
+    
+    async def _authed(self, request, *args):
+        """调用需要JWT的Paradex接口；token过期（TokenExpired）时刷新token后重试一次"""
+        try:
+            return await request(PARADEX_HTTP_URL, self.jwt_token, *args)
+        except TokenExpired:
+            logger.warning("Token已过期，正在刷新...")
+            await self._refresh_jwt_token()
+            return await request(PARADEX_HTTP_URL, self.jwt_token, *args)
+    
+    async def _warm_bbo_session(self):
+        """预热BBO会话连接，结果丢弃"""
+        try:
+            await get_bbo(PARADEX_HTTP_URL, BTC_MARKET, session=self.session)
+        except Exception as e:
+            logger.warning("预热BBO连接失败: %s", e)
+    
+    async def _load_tick_size(self):
+        """从 /markets 读取BTC市场的 price_tick_size"""
+        try:
+            markets = await self._authed(get_markets)
+            for market in markets:
+                if market.get("symbol") == BTC_MARKET and market.get("price_tick_size"):
+                    self.tick_size = Decimal(market["price_tick_size"])
+                    self._tick = float(self.tick_size)
+                    logger.info("%s 价格tick: %s", BTC_MARKET, self.tick_size)
+                    return
+            logger.warning("未找到%s的price_tick_size，下单价格不做tick对齐", BTC_MARKET)
+        except Exception as e:
+            logger.error("获取市场信息失败，下单价格不做tick对齐: %s", e)
+    
+    def _to_ticks(self, price):
+        """浮点价格转换为整数tick数"""
+        return int(round(price / self._tick))
+    
+    def _tick_price(self, price):
+        """浮点价格转换为按tick对齐的Decimal下单价格"""
+        if self.tick_size is None:
+            return Decimal(str(price))
+        return self._to_ticks(price) * self.tick_size
+    
+    async def _ws_reader(self):
+        """读取Paradex WebSocket订单推送，正在等待的订单完全成交时置位 _fill_event"""
+        try:
+            async with websockets.connect(PARADEX_WS_URL) as ws:
+                await send_auth_id(ws, self.jwt_token, 0)
+                await subscribe_channel_with_id(ws, f"orders.{BTC_MARKET}", 1)
+                self.ws = ws
+                logger.info("已订阅WebSocket订单推送: orders.%s", BTC_MARKET)
+                async for raw in ws:
+                    message = json_loads(raw)
+                    if message.get("method") != "subscription":
+                        continue
+                    order = message.get("params", {}).get("data", {})
+                    # 部分成交时订单仍为OPEN；只有CLOSED且剩余数量为0才是完全成交（撤单的剩余数量不为0）
+                    if (
+                        order.get("client_id") == self._fill_client_id
+                        and order.get("status") == "CLOSED"
+                        and Decimal(str(order.get("remaining_size") or 0)) == 0
+                    ):
+                        logger.info("收到成交推送: %s", order.get("client_id"))
+                        self._fill_event.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("WebSocket成交推送中断，回退到REST轮询: %s", e)
+        finally:
+            self.ws = None
+    
+    async def close(self):
+        """关闭WebSocket订阅和HTTP会话"""
+        if self.ws_task is not None:
+            self.ws_task.cancel()
+            try:
+                await self.ws_task
+            except asyncio.CancelledError:
+                pass
+            self.ws_task = None
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
         
     async def get_current_price(self, order_side=None):
         """获取当前BTC价格，只使用Paradex BBO API"""
         try:
             # 使用get_bbo函数获取BTC价格，设置超时
-            logging.info(f"使用BBO API获取{BTC_MARKET}价格...")
+            logger.info("使用BBO API获取%s价格...", BTC_MARKET)
             
             # 设置超时时间（3秒）
             try:
                 bbo = await asyncio.wait_for(
-                    get_bbo(PARADEX_HTTP_URL, BTC_MARKET), 
+                    get_bbo(PARADEX_HTTP_URL, BTC_MARKET, session=self.session), 
                     timeout=3.0
                 )
             except asyncio.TimeoutError:
-                logging.error("BBO API请求超时（3秒）")
+                logger.error("BBO API请求超时（3秒）")
                 return None
             
-            logging.info(f"BBO响应: {bbo}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("BBO响应: %s", bbo)
             
             # 检查价格数据的新鲜度
             if 'last_updated_at' in bbo:
                 last_updated = bbo['last_updated_at']
-                current_time = int(time.time() * 1000)  # 转换为毫秒
+                current_time = time_ns() // 1_000_000  # 转换为毫秒
                 time_diff = current_time - last_updated
                 
                 # 如果价格数据超过10秒，认为过时
                 if time_diff > 10000:  # 10秒 = 10000毫秒
-                    logging.warning(f"价格数据过时（{time_diff/1000:.1f}秒前）")
+                    logger.warning("价格数据过时（%.1f秒前）", time_diff / 1000)
                     return None
             
             # 根据订单类型选择合适的价格
@@ -157,28 +278,28 @@ class BTCParadexTrader:
             
             if price is not None:
                 price_float = float(price)
-                logging.info(f"从BBO获取BTC价格 ({price_type}): {price_float}")
+                logger.info("从BBO获取BTC价格 (%s): %s", price_type, price_float)
                 return price_float
             
-            logging.error("BBO API无法获取有效价格")
+            logger.error("BBO API无法获取有效价格")
             return None
             
         except Exception as e:
-            logging.error(f"获取BTC价格失败: {e}")
+            logger.error("获取BTC价格失败: %s", e)
             return None
     
     async def get_current_price_simple(self, order_side=None):
         """简化的价格获取方法，快速获取BBO价格"""
         try:
-            logging.info("使用快速BBO API获取BTC价格...")
+            logger.info("使用快速BBO API获取BTC价格...")
             # 设置更短的超时时间（2秒）
             try:
                 bbo = await asyncio.wait_for(
-                    get_bbo(PARADEX_HTTP_URL, BTC_MARKET), 
+                    get_bbo(PARADEX_HTTP_URL, BTC_MARKET, session=self.session), 
                     timeout=2.0
                 )
             except asyncio.TimeoutError:
-                logging.error("快速BBO API请求超时（2秒）")
+                logger.error("快速BBO API请求超时（2秒）")
                 return None
             
             # 根据订单类型选择合适的价格
@@ -197,62 +318,74 @@ class BTCParadexTrader:
             
             if price is not None:
                 price_float = float(price)
-                logging.info(f"从快速BBO获取BTC价格 ({price_type}): {price_float}")
+                logger.info("从快速BBO获取BTC价格 (%s): %s", price_type, price_float)
                 return price_float
             
-            logging.error("快速BBO API无法获取有效价格")
+            logger.error("快速BBO API无法获取有效价格")
             return None
         except Exception as e:
-            logging.error(f"快速价格获取失败: {e}")
+            logger.error("快速价格获取失败: %s", e)
             return None
     
     async def get_btc_price_from_external_api(self):
         """从外部API获取BTC价格作为备用方案"""
         try:
-            # 使用CoinGecko API作为备用，设置超时
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=3)) as session:
-                async with session.get('https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd') as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        price = data['bitcoin']['usd']
-                        logging.info(f"从CoinGecko获取BTC价格: {price}")
-                        return price
-                    else:
-                        logging.error(f"CoinGecko API返回错误: {response.status}")
-                        return None
+            # 使用CoinGecko API作为备用，设置超时（复用同一个HTTP会话）
+            async with self.session.get(
+                'https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd',
+                timeout=aiohttp.ClientTimeout(total=3),
+            ) as response:
+                if response.status == 200:
+                    data = json_loads(await response.read())
+                    price = data['bitcoin']['usd']
+                    logger.info("从CoinGecko获取BTC价格: %s", price)
+                    return price
+                else:
+                    logger.error("CoinGecko API返回错误: %s", response.status)
+                    return None
         except asyncio.TimeoutError:
-            logging.error("CoinGecko API请求超时（3秒）")
+            logger.error("CoinGecko API请求超时（3秒）")
             return None
         except Exception as e:
-            logging.error(f"从外部API获取BTC价格失败: {e}")
+            logger.error("从外部API获取BTC价格失败: %s", e)
             return None
     
     async def get_current_positions(self):
         """获取当前持仓"""
         try:
-            positions = await fetch_positions(PARADEX_HTTP_URL, self.jwt_token)
-            logging.info(f"当前持仓: {positions}")
+            positions = await self._authed(fetch_positions)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("当前持仓: %s", positions)
             return positions
         except Exception as e:
-            logging.error(f"获取持仓失败: {e}")
+            logger.error("获取持仓失败: %s", e)
             return []
     
     async def cancel_all_orders(self):
         """取消所有挂单"""
         try:
-            open_orders = await get_open_orders(PARADEX_HTTP_URL, self.jwt_token)
+            open_orders = await self._authed(get_open_orders)
             if open_orders:
-                logging.info(f"发现 {len(open_orders)} 个挂单，正在取消...")
-                for order in open_orders:
-                    order_id = order.get("order_id") or order.get("id")
-                    if order_id:
-                        await delete_order_payload(PARADEX_HTTP_URL, self.jwt_token, order_id)
-                        logging.info(f"已取消订单: {order_id}")
-                        await asyncio.sleep(0.5)  # 避免请求过快
+                logger.info("发现 %s 个挂单，正在取消...", len(open_orders))
+                order_ids = [o.get("order_id") or o.get("id") for o in open_orders]
+                order_ids = [order_id for order_id in order_ids if order_id]
+                # 并发取消，用信号量限制同时在途的请求数
+                semaphore = asyncio.Semaphore(CANCEL_CONCURRENCY)
+                
+                async def cancel(order_id):
+                    async with semaphore:
+                        return await self._authed(delete_order_payload, order_id)
+                
+                results = await asyncio.gather(*(cancel(order_id) for order_id in order_ids), return_exceptions=True)
+                for order_id, result in zip(order_ids, results):
+                    if isinstance(result, Exception):
+                        logger.error("取消订单 %s 失败: %s", order_id, result)
+                    else:
+                        logger.info("已取消订单: %s", order_id)
             else:
-                logging.info("没有发现挂单")
+                logger.info("没有发现挂单")
         except Exception as e:
-            logging.error(f"取消挂单失败: {e}")
+            logger.error("取消挂单失败: %s", e)
     
     async def create_limit_order(self, side: OrderSide, size: Decimal, price: Decimal, client_id: str):
         """创建限价单"""
@@ -264,26 +397,29 @@ class BTCParadexTrader:
                 size=size,
                 limit_price=price,
                 client_id=client_id,
-                signature_timestamp=int(time.time() * 1000),
+                signature_timestamp=time_ns() // 1_000_000,
             )
             
             # 签名订单
             sig = sign_order(self.config, order)
             order.signature = sig
             
-            # 提交订单
-            logging.info(f"提交{side.name}限价单: {size} BTC @ {price}")
-            response = await post_order_payload(PARADEX_HTTP_URL, self.jwt_token, order.dump_to_dict())
+            # 提交订单（记录要等待的client_id，并清除上一次的成交事件）
+            self._fill_client_id = client_id
+            if self._fill_event is not None:
+                self._fill_event.clear()
+            logger.info("提交%s限价单: %s BTC @ %s", side.name, size, price)
+            response = await self._authed(post_order_payload, order.dump_to_dict())
             
             if response.get("status_code") == 201:
-                logging.info(f"{side.name}限价单提交成功: {response}")
+                logger.info("%s限价单提交成功: %s", side.name, response)
                 return True
             else:
-                logging.error(f"{side.name}限价单提交失败: {response}")
+                logger.error("%s限价单提交失败: %s", side.name, response)
                 return False
                 
         except Exception as e:
-            logging.error(f"创建{side.name}限价单失败: {e}")
+            logger.error("创建%s限价单失败: %s", side.name, e)
             return False
     
     async def create_market_order(self, side: OrderSide, size: Decimal, client_id: str):
@@ -295,7 +431,7 @@ class BTCParadexTrader:
                 order_side=side,
                 size=size,
                 client_id=client_id,
-                signature_timestamp=int(time.time() * 1000),
+                signature_timestamp=time_ns() // 1_000_000,
             )
             
             # 签名订单
@@ -303,23 +439,23 @@ class BTCParadexTrader:
             order.signature = sig
             
             # 提交订单
-            logging.info(f"提交{side.name}单: {size} BTC")
-            response = await post_order_payload(PARADEX_HTTP_URL, self.jwt_token, order.dump_to_dict())
+            logger.info("提交%s单: %s BTC", side.name, size)
+            response = await self._authed(post_order_payload, order.dump_to_dict())
             
             if response.get("status_code") == 201:
-                logging.info(f"{side.name}单提交成功: {response}")
+                logger.info("%s单提交成功: %s", side.name, response)
                 return True
             else:
-                logging.error(f"{side.name}单提交失败: {response}")
+                logger.error("%s单提交失败: %s", side.name, response)
                 return False
                 
         except Exception as e:
-            logging.error(f"创建{side.name}单失败: {e}")
+            logger.error("创建%s单失败: %s", side.name, e)
             return False
     
     async def wait_for_order_fill_with_retry(self, max_wait_time=10, max_retries=5):
         """等待订单成交，如果超时则重新获取价格并重新挂单"""
-        logging.info(f"等待订单成交，最多等待{max_wait_time}秒...")
+        logger.info("等待订单成交，最多等待%s秒...", max_wait_time)
         
         # 直接调用改进后的wait_for_order_fill方法
         return await self.wait_for_order_fill(max_wait_time)
@@ -327,10 +463,10 @@ class BTCParadexTrader:
     async def execute_buy_order_with_retry(self, max_retries=5):
         """执行买单，如果10秒不成交则重新获取价格并重新挂单"""
         for attempt in range(max_retries):
-            logging.info(f"=== 第{attempt + 1}次尝试挂买单 ===")
+            logger.info("=== 第%s次尝试挂买单 ===", attempt + 1)
             
             # 1. 先取消所有现有订单
-            logging.info("取消所有现有订单...")
+            logger.info("取消所有现有订单...")
             await self.cancel_all_orders()
             await asyncio.sleep(1)
             
@@ -343,22 +479,23 @@ class BTCParadexTrader:
                     current_price = await self.get_current_price(OrderSide.Buy)
                 else:
                     # 重试时使用快速价格获取（买单使用bid价格）
-                    logging.info("重试时使用快速价格获取...")
+                    logger.info("重试时使用快速价格获取...")
                     current_price = await self.get_current_price_simple(OrderSide.Buy)
                 
                 if current_price is None:
                     price_retry_count += 1
-                    logging.warning(f"价格获取失败，第{price_retry_count}次重试...")
+                    logger.warning("价格获取失败，第%s次重试...", price_retry_count)
                     await asyncio.sleep(1)
             
             if not current_price:
-                logging.error("多次尝试后仍无法获取BTC价格")
+                # 限价单只按Paradex订单簿价格挂出，BBO不可用时跳过本次尝试，不用外部指数价格挂单
+                logger.error("多次尝试后仍无法获取BTC价格")
                 await asyncio.sleep(2)
                 continue
             
             # 3. 计算买单价格
-            buy_price = Decimal(str(current_price - 0))
-            logging.info(f"当前价格: {current_price}, 买单价格: {buy_price}")
+            buy_price = self._tick_price(current_price)
+            logger.info("当前价格: %s, 买单价格: %s", current_price, buy_price)
             
             # 4. 挂买单
             buy_success = await self.create_limit_order(
@@ -369,7 +506,7 @@ class BTCParadexTrader:
             )
             
             if not buy_success:
-                logging.error(f"第{attempt + 1}次挂买单失败")
+                logger.error("第%s次挂买单失败", attempt + 1)
                 await asyncio.sleep(2)
                 continue
             
@@ -377,22 +514,22 @@ class BTCParadexTrader:
             fill_success = await self.wait_for_order_fill_with_retry(max_wait_time=10)
             
             if fill_success:
-                logging.info(f"买单在第{attempt + 1}次尝试中成交！")
+                logger.info("买单在第%s次尝试中成交！", attempt + 1)
                 return True
             else:
-                logging.warning(f"买单第{attempt + 1}次尝试未成交，准备重试...")
+                logger.warning("买单第%s次尝试未成交，准备重试...", attempt + 1)
                 await asyncio.sleep(1)
         
-        logging.error(f"买单在{max_retries}次尝试后仍未成交")
+        logger.error("买单在%s次尝试后仍未成交", max_retries)
         return False
     
     async def execute_sell_order_with_retry(self, max_retries=5):
         """执行卖单，如果10秒不成交则重新获取价格并重新挂单"""
         for attempt in range(max_retries):
-            logging.info(f"=== 第{attempt + 1}次尝试挂卖单 ===")
+            logger.info("=== 第%s次尝试挂卖单 ===", attempt + 1)
             
             # 1. 先取消所有现有订单
-            logging.info("取消所有现有订单...")
+            logger.info("取消所有现有订单...")
             await self.cancel_all_orders()
             await asyncio.sleep(1)
             
@@ -405,22 +542,23 @@ class BTCParadexTrader:
                     current_price = await self.get_current_price(OrderSide.Sell)
                 else:
                     # 重试时使用快速价格获取（卖单使用ask价格）
-                    logging.info("重试时使用快速价格获取...")
+                    logger.info("重试时使用快速价格获取...")
                     current_price = await self.get_current_price_simple(OrderSide.Sell)
                 
                 if current_price is None:
                     price_retry_count += 1
-                    logging.warning(f"价格获取失败，第{price_retry_count}次重试...")
+                    logger.warning("价格获取失败，第%s次重试...", price_retry_count)
                     await asyncio.sleep(1)
             
             if not current_price:
-                logging.error("多次尝试后仍无法获取BTC价格")
+                # 限价单只按Paradex订单簿价格挂出，BBO不可用时跳过本次尝试，不用外部指数价格挂单
+                logger.error("多次尝试后仍无法获取BTC价格")
                 await asyncio.sleep(2)
                 continue
             
             # 3. 计算卖单价格
-            sell_price = Decimal(str(current_price + 0))
-            logging.info(f"当前价格: {current_price}, 卖单价格: {sell_price}")
+            sell_price = self._tick_price(current_price)
+            logger.info("当前价格: %s, 卖单价格: %s", current_price, sell_price)
             
             # 4. 挂卖单
             sell_success = await self.create_limit_order(
@@ -431,7 +569,7 @@ class BTCParadexTrader:
             )
             
             if not sell_success:
-                logging.error(f"第{attempt + 1}次挂卖单失败")
+                logger.error("第%s次挂卖单失败", attempt + 1)
                 await asyncio.sleep(2)
                 continue
             
@@ -439,100 +577,134 @@ class BTCParadexTrader:
             fill_success = await self.wait_for_order_fill_with_retry(max_wait_time=10)
             
             if fill_success:
-                logging.info(f"卖单在第{attempt + 1}次尝试中成交！")
+                logger.info("卖单在第%s次尝试中成交！", attempt + 1)
                 return True
             else:
-                logging.warning(f"卖单第{attempt + 1}次尝试未成交，准备重试...")
+                logger.warning("卖单第%s次尝试未成交，准备重试...", attempt + 1)
                 await asyncio.sleep(1)
         
-        logging.error(f"卖单在{max_retries}次尝试后仍未成交")
+        logger.error("卖单在%s次尝试后仍未成交", max_retries)
+        return False
+    
+    @staticmethod
+    def _pos_key(positions):
+        """持仓指纹：(市场, 数量) 集合"""
+        return frozenset(
+            (p.get('market'), Decimal(str(p.get('size') or 0))) for p in positions or []
+        )
+    
+    async def _wait_for_fill_event(self, max_wait_time):
+        """等待WebSocket成交推送，超时后用一次REST查询兜底"""
+        logger.info("等待成交推送...")
+        try:
+            await asyncio.wait_for(self._fill_event.wait(), timeout=max_wait_time)
+            logger.info("收到成交推送，订单已成交！")
+            return True
+        except asyncio.TimeoutError:
+            pass
+        
+        # 避免漏掉推送：没有挂单则认为已成交
+        try:
+            open_orders = await self._authed(get_open_orders)
+            if not open_orders:
+                logger.info("没有挂单，订单可能已成交")
+                return True
+        except Exception as e:
+            logger.error("检查订单状态失败: %s", e)
+        
+        logger.warning("订单在%s秒内未成交", max_wait_time)
         return False
     
     async def wait_for_order_fill(self, max_wait_time=30):
-        """等待订单成交"""
-        logging.info("等待订单成交...")
+        """等待订单成交：已订阅WebSocket时等待成交推送，否则轮询REST接口"""
+        if self.ws is not None:
+            return await self._wait_for_fill_event(max_wait_time)
+        
+        logger.info("等待订单成交...")
         start_time = time.time()
         
-        # 记录初始持仓
+        # 记录初始持仓（只比较市场和数量，忽略PnL等随行情变化的字段）
         initial_positions = await self.get_current_positions()
-        logging.info(f"初始持仓: {initial_positions}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("初始持仓: %s", initial_positions)
+        initial_key = self._pos_key(initial_positions)
         
         while time.time() - start_time < max_wait_time:
             try:
-                open_orders = await get_open_orders(PARADEX_HTTP_URL, self.jwt_token)
-                logging.info(f"当前挂单数量: {len(open_orders) if open_orders else 0}")
+                open_orders = await self._authed(get_open_orders)
+                logger.info("当前挂单数量: %s", len(open_orders) if open_orders else 0)
                 
                 # 如果没有挂单，检查持仓是否有变化
                 if not open_orders:
                     current_positions = await self.get_current_positions()
-                    if current_positions != initial_positions:
-                        logging.info("持仓发生变化，订单已成交！")
+                    if self._pos_key(current_positions) != initial_key:
+                        logger.info("持仓发生变化，订单已成交！")
                         return True
                     else:
-                        logging.info("没有挂单且持仓无变化，订单可能已成交")
+                        logger.info("没有挂单且持仓无变化，订单可能已成交")
                         return True
                 
                 # 检查挂单状态
                 for order in open_orders:
                     order_id = order.get('id', 'unknown')
                     status = order.get('status', 'unknown')
-                    logging.info(f"订单 {order_id} 状态: {status}")
+                    logger.info("订单 %s 状态: %s", order_id, status)
                     
                     # 如果订单状态是filled或completed，认为已成交
                     if status in ['filled', 'completed', 'executed']:
-                        logging.info(f"订单 {order_id} 已成交！")
+                        logger.info("订单 %s 已成交！", order_id)
                         return True
                 
                 # 检查持仓是否有变化（即使还有挂单）
                 current_positions = await self.get_current_positions()
-                if current_positions != initial_positions:
-                    logging.info("持仓发生变化，订单已成交！")
+                if self._pos_key(current_positions) != initial_key:
+                    logger.info("持仓发生变化，订单已成交！")
                     return True
                 
                 await asyncio.sleep(1)
             except Exception as e:
-                logging.error(f"检查订单状态失败: {e}")
+                logger.error("检查订单状态失败: %s", e)
                 await asyncio.sleep(1)
         
-        logging.warning(f"订单在{max_wait_time}秒内未成交")
+        logger.warning("订单在%s秒内未成交", max_wait_time)
         return False
     
     async def execute_trading_strategy(self):
         """执行交易策略：获取价格 -> 挂限价多单(价格-10) -> 成交后挂限价空单(价格+10)"""
         try:
             # 1. 检查当前持仓
-            logging.info("=== 检查当前持仓 ===")
+            logger.info("=== 检查当前持仓 ===")
             positions = await self.get_current_positions()
             
             # 2. 取消所有挂单
-            logging.info("=== 取消所有挂单 ===")
+            logger.info("=== 取消所有挂单 ===")
             await self.cancel_all_orders()
             
             # 3. 执行买单（带重试机制）
-            logging.info("=== 开始执行买单策略 ===")
+            logger.info("=== 开始执行买单策略 ===")
             buy_success = await self.execute_buy_order_with_retry(max_retries=5)
             
             if not buy_success:
-                logging.error("买单策略失败，终止交易")
+                logger.error("买单策略失败，终止交易")
                 return False
             
             # 4. 买单成交后，执行卖单（带重试机制）
-            logging.info("=== 买单成交，开始执行卖单策略 ===")
+            logger.info("=== 买单成交，开始执行卖单策略 ===")
             sell_success = await self.execute_sell_order_with_retry(max_retries=5)
             
             if not sell_success:
-                logging.error("卖单策略失败")
+                logger.error("卖单策略失败")
                 return False
             
             # 5. 最终持仓检查
-            logging.info("=== 最终持仓检查 ===")
+            logger.info("=== 最终持仓检查 ===")
             final_positions = await self.get_current_positions()
             
-            logging.info("交易策略执行完成！")
+            logger.info("交易策略执行完成！")
             return True
             
         except Exception as e:
-            logging.error(f"执行交易策略失败: {e}")
+            logger.error("执行交易策略失败: %s", e)
             traceback.print_exc()
             return False
 
@@ -548,14 +720,16 @@ async def main():
         success = await trader.execute_trading_strategy()
         
         if success:
-            logging.info("✅ 交易策略执行成功！")
+            logger.info("✅ 交易策略执行成功！")
         else:
-            logging.error("❌ 交易策略执行失败！")
+            logger.error("❌ 交易策略执行失败！")
             
     except Exception as e:
-        logging.error(f"程序执行失败: {e}")
+        logger.error("程序执行失败: %s", e)
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        await trader.close()
 
 if __name__ == "__main__":
     print("=" * 60)
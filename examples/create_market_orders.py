@@ -1,4 +1,6 @@
 import asyncio
+import functools
+import itertools
 import logging
 import lighter
 
@@ -12,6 +14,11 @@ API_KEY_PRIVATE_KEY = ""
 ACCOUNT_INDEX = 3156
 API_KEY_INDEX = 3
 
+# client_order_index 的最高位（第47位，保持在48位范围内）标记买卖方向，低位为单调递增计数
+SIDE_BIT = 1 << 47
+buy_ctr = itertools.count(1)
+sell_ctr = itertools.count(1)
+
 
 def trim_exception(e: Exception) -> str:
     return str(e).strip().split("\n")[-1]
@@ -33,6 +40,14 @@ async def main():
         return
 
     loop_count = 0
+
+    # 固定不变的下单参数只绑定一次，循环内只传入变化的 client_order_index / is_ask
+    submit_market_order = functools.partial(
+        client.create_market_order_limited_slippage,
+        market_index=1,  # BTC/USDC 市场索引
+        base_amount=100,  # 0.01 BTC = 1000 最小单位
+        max_slippage=0.05,  # 最大滑点5%
+    )
     
     try:
         while True:
@@ -43,13 +58,9 @@ async def main():
 
             # 创建0.01 BTC的市价买单
             print("=== 创建BTC市价买单 ===")
-            tx = await client.create_market_order_limited_slippage(
-                market_index=1,  # BTC/USDC 市场索引
-                client_order_index=100 + loop_count,  # 动态索引，避免重复
-                base_amount=100,  # 0.01 BTC = 1000 最小单位
-                max_slippage=0.05,  # 最大滑点5%
+            tx = await submit_market_order(
+                client_order_index=next(buy_ctr),  # 单调递增，避免重复
                 is_ask=False,  # 买单
-                # ideal_price=None,  # 不设置理想价格，让系统自动获取当前市场价格
             )
             print(f"市价买单 {tx=}")
             if tx is not None:
@@ -59,13 +70,9 @@ async def main():
 
             # 创建0.01 BTC的市价卖单
             print("\n=== 创建BTC市价卖单 ===")
-            tx = await client.create_market_order_limited_slippage(
-                market_index=1,  # BTC/USDC 市场索引
-                client_order_index=200 + loop_count,  # 动态索引，避免重复
-                base_amount=100,  # 0.01 BTC = 1000 最小单位
-                max_slippage=0.05,  # 最大滑点5%
+            tx = await submit_market_order(
+                client_order_index=SIDE_BIT | next(sell_ctr),  # 卖单置方向位，与买单不冲突
                 is_ask=True,  # 卖单
-                # ideal_price=None,  # 不设置理想价格，让系统自动获取当前市场价格
             )
             print(f"市价卖单 {tx=}")
             if tx is not None:
@@ -1,5 +1,7 @@
 import asyncio
 import logging
+import operator
+import sys
 import lighter
 
 logging.basicConfig(level=logging.INFO)
@@ -20,20 +22,29 @@ async def main():
         order_api = lighter.OrderApi(api_client)
         
         print("\n=== 检查不同市场索引 ===")
-        for market_index in range(5):  # 检查前5个市场索引
-            try:
-                print(f"\n检查市场索引 {market_index}:")
-                order_book = await order_api.order_book_orders(market_index, 1)
-                print(f"  市场 {market_index} 订单簿: {order_book}")
-                
-                # 检查是否有买卖盘数据
-                if hasattr(order_book, 'bids') and order_book.bids:
-                    print(f"  买盘价格: {order_book.bids[0].price}")
-                if hasattr(order_book, 'asks') and order_book.asks:
-                    print(f"  卖盘价格: {order_book.asks[0].price}")
-                    
-            except Exception as e:
-                print(f"  市场 {market_index} 不可用: {e}")
+        # 并发查询前5个市场索引的订单簿
+        market_indexes = range(5)
+        results = await asyncio.gather(
+            *(order_api.order_book_orders(market_index, 1) for market_index in market_indexes),
+            return_exceptions=True,
+        )
+        # 先拼好全部输出，最后一次性写出
+        get_bids_asks = operator.attrgetter('bids', 'asks')
+        lines = []
+        for market_index, order_book in zip(market_indexes, results):
+            lines.append(f"\n检查市场索引 {market_index}:")
+            if isinstance(order_book, Exception):
+                lines.append(f"  市场 {market_index} 不可用: {order_book}")
+                continue
+            
+            lines.append(f"  市场 {market_index} 订单簿: {order_book}")
+            
+            # 检查是否有买卖盘数据
+            bids, asks = get_bids_asks(order_book)
+            lines.append(
+                f"  市场 {market_index}: bid={bids[0].price if bids else '-'} ask={asks[0].price if asks else '-'}"
+            )
+        sys.stdout.write("\n".join(lines) + "\n")
                 
     except Exception as e:
         print(f"获取信息失败: {e}")
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 """
-多线程交易脚本（支持多个交易对）
+多账户并发交易脚本（支持多个交易对）
 
-从CSV读取配置，每组账号对应一条线程，执行以下逻辑：
+从CSV读取配置，每组账号对应一个协程（所有账户共用一个事件循环），执行以下逻辑：
 1. paradex获取当前价格，挂限价空单（当前ask价格），监控成交
 2. 如果10秒不成交，重新获取价格并重新挂单
 3. 成交后，市价开多单lighter
@@ -20,312 +20,729 @@ CSV文件需要包含以下列：
 - wait_time: 等待时间（秒）
 - market: 交易对名称（如 BTC-USD-PERP）
 - order_size: 订单大小（如 0.001）
-- market_index: Lighter市场索引（如 1）
+- market_index: Lighter市场索引（可选，如 1；从Lighter查询市场失败时使用）
 """
 
 import asyncio
+import atexit
+import base64
+import bisect
+import concurrent.futures
 import csv
+import functools
+import io
+import itertools
+import json
 import logging
+import logging.handlers
+import multiprocessing
 import os
+import queue
 import random
+import re
+import signal
 import sys
 import threading
 import time
-from decimal import Decimal
-from collections import defaultdict
-from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass, fields
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+from datetime import datetime
+
+import aiohttp
+
+# rich只在模块加载时导入一次；未安装时监控面板回退为纯文本表格
+try:
+    from rich.console import Console
+    from rich.live import Live
+    from rich.table import Table
+    from rich.text import Text
+    _RICH = True
+except ImportError:
+    _RICH = False
+
+# uvloop可选：安装后事件循环使用libuv实现，未安装（或Windows）时使用标准asyncio循环
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 # 添加paradex目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'paradex'))
 
 import lighter
+from lighter.nonce_manager import get_nonce_from_api
 from paradex.shared.api_config import ApiConfig
 from paradex.shared.paradex_api_utils import Order, OrderSide, OrderType
 from paradex.shared.api_client import (
     get_jwt_token, 
-    get_paradex_config, 
+    get_paradex_config_cached,
     post_order_payload, 
     sign_order,
+    sign_order_incremental,
     get_open_orders,
+    delete_all_orders_payload,
     delete_order_payload,
     get_bbo,
     fetch_positions,
     fetch_tokens,
 )
+from paradex.shared.api_client_utils import OrderSignCache, TokenExpired
 from paradex.onboarding import perform_onboarding
 from paradex.utils import (
     generate_paradex_account,
     get_l1_eth_account,
 )
 
-# 配置日志 - 文件输出详细日志，控制台完全不输出日志（只显示表格）
-log_filename = f"trading_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+# 日志 - 文件输出详细日志，控制台完全不输出日志（只显示表格）
+# 日志级别可通过环境变量 TRADING_LOG_LEVEL 调整（如 INFO），默认记录所有日志；
+# 设为INFO时逐个持仓的明细日志（DEBUG）连字符串都不会格式化
+LOG_LEVEL = getattr(logging, os.environ.get("TRADING_LOG_LEVEL", "DEBUG").upper(), logging.DEBUG)
 
-# 创建文件处理器（DEBUG级别）
-file_handler = logging.FileHandler(log_filename, encoding='utf-8')
-file_handler.setLevel(logging.DEBUG)  # 文件记录所有日志
-file_handler.setFormatter(logging.Formatter(
-    "%(asctime)s.%(msecs)03d | [%(threadName)s] %(levelname)s | %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
-))
+# 不指定datefmt时asctime直接带毫秒，不再单独格式化msecs字段
+log_formatter = logging.Formatter("%(asctime)s | [%(trader)s] %(levelname)s | %(message)s")
+log_formatter.default_msec_format = "%s.%03d"
 
-# 不创建控制台处理器，完全隐藏所有日志（只显示表格）
-# 所有日志只写入文件
 
-# 配置根日志记录器（只使用文件处理器）
-logging.basicConfig(
-    level=logging.DEBUG,  # 根级别设为DEBUG
-    handlers=[file_handler]  # 只使用文件处理器，不输出到控制台
-)
+def _default_trader_field(record):
+    """交易器以外的日志记录没有trader字段，用logger名称代替"""
+    if not hasattr(record, 'trader'):
+        record.trader = record.name
+    return True
+
+
+# 日志格式中不使用线程/进程信息，创建日志记录时跳过这些字段的采集
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
 
 logger = logging.getLogger(__name__)
-logger.info(f"日志文件已创建: {log_filename}")
+
+
+def setup_logging(log_filename):
+    """配置根日志记录器：记录只放入队列，由后台线程统一追加写入log_filename，事件循环中不做文件I/O。
+    只在主进程入口调用一次；多进程模式下子进程传入父进程的文件名，写入同一个日志文件。"""
+    file_handler = logging.FileHandler(log_filename, encoding='utf-8')
+    file_handler.setLevel(LOG_LEVEL)
+    file_handler.setFormatter(log_formatter)
+    file_handler.addFilter(_default_trader_field)
+    
+    log_queue = queue.SimpleQueue()
+    log_listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    log_listener.start()
+    atexit.register(log_listener.stop)  # 退出时写完队列中剩余的日志
+    # 不创建控制台处理器，所有日志只写入文件（只显示表格）
+    logging.basicConfig(
+        level=LOG_LEVEL,
+        handlers=[logging.handlers.QueueHandler(log_queue)]
+    )
+    logger.info(f"日志文件: {log_filename}")
 
 # 配置参数
 PARADEX_HTTP_URL = "https://api.prod.paradex.trade/v1"
+PARADEX_WS_URL = "wss://ws.api.prod.paradex.trade/v1"
 LIGHTER_URL = "https://mainnet.zklighter.elliot.ai"
 # 默认值（如果CSV中没有指定，使用这些默认值）
 DEFAULT_MARKET = "BTC-USD-PERP"
 DEFAULT_ORDER_SIZE = Decimal("0.001")
 DEFAULT_MARKET_INDEX = 1
+POSITION_TOLERANCE = Decimal("0.0001")  # 判断两边持仓对等时允许的数量误差
 MAX_WAIT_TIME = 10  # 10秒超时
 MAX_RETRIES = 5  # 最大重试次数
+# 所有交易器共享一个长连接会话，复用TCP/TLS连接
+HTTP_POOL_LIMIT = 200
+HTTP_POOL_LIMIT_PER_HOST = 64
+HTTP_KEEPALIVE_TIMEOUT = 75
+HTTP_DNS_CACHE_TTL = 300
+BBO_FEED_MAX_AGE = 0.25  # 共享BBO超过该时间（秒）视为过期，下一次读取时重新请求
+BBO_FETCH_TIMEOUT = 3.0  # 单次BBO请求的超时（秒）
+ORDER_WS_RECONNECT_DELAY = 5  # 订单推送断线后重连间隔（秒）
+# 没有订单推送时轮询挂单的间隔（秒）：从最小值开始每次未成交乘以1.5，封顶为最大值
+FILL_POLL_MIN_INTERVAL = 0.1
+FILL_POLL_MAX_INTERVAL = 1.0
+CANCEL_CONCURRENCY = 8  # 并发撤单的最大在途请求数
+# 查不到Lighter市场详情时按基础资产取size_decimals默认值：BTC为5位小数（100000），其他市场默认4位小数（10000）
+SIZE_DECIMALS_DEFAULTS = {'BTC': 5}
+DEFAULT_SIZE_DECIMALS = 4
+PARADEX_CLOSE_CONCURRENCY = 4  # 并发平仓的最大在途请求数（Paradex）
+POSITION_CHECK_RETRIES = 5  # 持仓查询失败时重新检查对等性的最大次数
+# Lighter同一个API key的nonce需要等上一笔交易被接收后才会递增，平仓单只能逐个提交
+LIGHTER_CLOSE_INTERVAL = 1  # Lighter相邻两笔平仓单的间隔（秒）
+TRADER_POOL_SIZE = int(os.environ.get("TRADER_POOL_SIZE", "16"))  # 同步调用共享线程池的大小
+# 运行模式：thread（默认，所有账户共享一个事件循环）或 process（每个账户一个子进程，
+# 只在签名等CPU计算成为瓶颈时使用；子进程的状态不显示在监控面板上，只写日志）
+TRADER_MODE = os.environ.get("TRADER_MODE", "thread").lower()
+# 各账户依次启动的间隔（秒），避免同时启动；共享连接已预热，可通过环境变量调小
+TRADER_START_INTERVAL = float(os.environ.get("TRADER_START_INTERVAL", "10"))
+STATUS_SNAPSHOT_INTERVAL = 5  # 后台刷新余额/持仓快照的间隔（秒）
+JWT_REFRESH_MARGIN = 60  # JWT到期前多少秒刷新
+JWT_REFRESH_FALLBACK = 90  # 无法解析到期时间时的刷新间隔（秒）
+RETRY_BACKOFF_BASE = 0.5  # 重试退避的初始等待（秒），每次翻倍
+RETRY_BACKOFF_CAP = 8  # 重试退避的最大等待（秒）
+SHUTDOWN_TIMEOUT = 30  # 收到退出信号后等待各交易器完成清理的最长时间（秒），超时则强制取消
+LIGHTER_NONCE_SYNC_TIMEOUT = 10  # nonce错误后等待后端nonce稳定的最长时间（秒）
+DAY_MINUTES = 24 * 60
+CST_OFFSET_MINUTES = 8 * 60  # 北京时间 = UTC+8
+
+# UI状态：交易器把字段的最新值写入各自账户的待合并字典（单生产者），同一字段未取出前被新值覆盖，
+# 大小以字段数为上限；监控线程逐项取出后合并到自己独占的 account_status 视图（单消费者），双方都不加锁
+account_status_pending = {}  # account_name -> {key: 最新value}
+account_status_lock = threading.Lock()  # 只在新增账户时使用
+account_status = {}  # account_name -> AccountStatus，只由监控线程读写
+_account_order = []  # 按账户名排序的 account_status 键，新账户出现时插入，渲染时不再排序
+_status_versions = itertools.count(1)
+account_status_version = 0  # 每次状态更新递增，监控线程据此判断是否需要重绘
+status_dirty = threading.Event()  # 状态更新（或退出）时置位，唤醒监控线程重绘
+status_updates_enabled = True  # 没有监控面板（多进程模式的子进程）时关闭，不再记录状态增量
+STATUS_REDRAW_MIN_INTERVAL = 0.2  # 两次重绘的最小间隔（秒），合并短时间内的连续更新
+STATUS_REDRAW_MAX_INTERVAL = 2  # 没有更新时最长等待多久检查一次（秒）
+
+
+# Python 3.10+ 使用slots，字段固定、占用更少内存
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
 
-# 全局状态字典，用于UI显示
-account_status = defaultdict(dict)
-account_status_lock = threading.Lock()
+@dataclass(**_SLOTS)
+class AccountStatus:
+    """单个账户在监控面板上显示的状态，字段名即 update_account_status 的 key"""
+    market: str = 'N/A'
+    initial_balance_paradex: float = 0.0
+    initial_balance_lighter: float = 0.0
+    current_balance_paradex: float = 0.0
+    current_balance_lighter: float = 0.0
+    paradex_position: str = '无'
+    lighter_position: str = '无'
+    loop_count: int = 0
+    wait_status: str = '准备中'
+    countdown: str = ''
 
-# 全局退出事件：Ctrl+C 时置位，让各线程优雅退出并执行清理
+
+@dataclass(frozen=True, **_SLOTS)
+class AccountConfig:
+    """accounts.csv 中的一行账户配置，数值字段在读取时就完成类型转换"""
+    account_index: int
+    api_key_index: int
+    api_key_private_key: str
+    paradex_eth_key: str
+    description: str = 'Unknown'
+    wait_time: int = 20
+    market: str = DEFAULT_MARKET
+    order_size: Decimal = DEFAULT_ORDER_SIZE
+    proxy_url: str = ''
+    market_index: Optional[int] = None  # 查不到Lighter市场详情时使用的market_index
+
+
+# 全局退出事件：Ctrl+C 时置位，让各交易器优雅退出并执行清理
+# 监控线程需要阻塞等待它，所以使用threading.Event；协程中只调用非阻塞的is_set()
 shutdown_event = threading.Event()
+# 事件循环内的退出事件，由信号处理函数置位，用于立即唤醒各协程中的长时间等待
+# 在run_all_traders中创建（需要绑定到运行中的事件循环）
+shutdown_requested = None
+
+
+def request_shutdown():
+    """SIGINT/SIGTERM处理函数：同时通知监控线程和事件循环内的协程退出"""
+    shutdown_event.set()
+    status_dirty.set()
+    if shutdown_requested is not None:
+        shutdown_requested.set()
+
+
+async def sleep_or_shutdown(seconds) -> bool:
+    """等待seconds秒；期间收到退出信号则立即返回True"""
+    if shutdown_requested is None:
+        await asyncio.sleep(seconds)
+        return shutdown_event.is_set()
+    try:
+        await asyncio.wait_for(shutdown_requested.wait(), timeout=seconds)
+        return True
+    except asyncio.TimeoutError:
+        return False
 
 # 全局代理配置字典（按账户名存储）
 account_proxy_config = {}
 account_proxy_lock = threading.Lock()
 
-# 创建带代理的aiohttp ClientSession的辅助函数
-async def create_proxy_session(account_name=None):
-    """创建带代理的aiohttp ClientSession"""
-    import aiohttp
-    proxy_url = None
-    if account_name:
-        with account_proxy_lock:
-            proxy_url = account_proxy_config.get(account_name)
+# 所有账户共享的Paradex HTTP会话：同一个事件循环内只需一个连接池和DNS缓存；
+# 鉴权（JWT）和代理都按请求传入，不绑定在会话上
+_shared_http_session = None
+
+
+def shared_http_session():
+    """返回共享的HTTP会话，首次使用时在当前事件循环中创建"""
+    global _shared_http_session
+    if _shared_http_session is None or _shared_http_session.closed:
+        _shared_http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=HTTP_POOL_LIMIT,
+                limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            ),
+            headers={"Connection": "keep-alive"},
+            cookie_jar=aiohttp.DummyCookieJar(),  # 不在账户之间共享cookie
+        )
+    return _shared_http_session
+
+
+async def close_shared_http_session():
+    """所有交易器结束后关闭共享会话"""
+    global _shared_http_session
+    if _shared_http_session is not None:
+        await _shared_http_session.close()
+        _shared_http_session = None
+
+
+class BBOFeed:
+    """单个市场在单个代理下的BBO：只在有调用者需要报价时请求，同一时刻的多个调用者共享同一次请求"""
+    
+    def __init__(self, market):
+        self.market = market
+        self.bbo = None
+        self.updated_at = 0.0  # 最近一次更新的monotonic时间
+        self._inflight = None  # 正在进行的请求（asyncio.Task）
     
+    async def _refresh(self, fetch):
+        try:
+            bbo = await asyncio.wait_for(fetch(), timeout=BBO_FETCH_TIMEOUT)
+        except Exception as e:
+            logging.debug(f"{self.market} BBO请求失败: {e}")
+            return None
+        finally:
+            self._inflight = None
+        # 只保存有效的BBO，错误响应不缓存
+        if bbo and (bbo.get("bid") is not None or bbo.get("ask") is not None):
+            self.bbo = bbo
+            self.updated_at = time.monotonic()
+            return bbo
+        return None
+    
+    async def get(self, fetch, max_age=BBO_FEED_MAX_AGE):
+        """返回不超过max_age秒的BBO；过期时发起（或加入正在进行的）一次请求，拿不到则返回None"""
+        if self.bbo is not None and time.monotonic() - self.updated_at <= max_age:
+            return self.bbo
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._refresh(fetch))
+        # 某个调用者被取消时不影响其他等待同一请求的调用者
+        return await asyncio.shield(self._inflight)
+    
+    def invalidate(self):
+        """标记为过期，下一次读取会重新请求"""
+        self.updated_at = 0.0
+
+
+bbo_feeds = {}  # (market, proxy_url) -> BBOFeed，按代理区分，请求只经过调用者自己的代理
+
+
+# Paradex系统配置对所有账户相同，所有交易器共享同一次请求
+_paradex_config_future = None
+_paradex_config_lock = threading.Lock()
+
+# Lighter client_order_index：从当前毫秒时间戳开始单调递增（在48位范围内），
+# 各交易器共享，next() 在GIL下是原子的，重启后也不会与之前的索引重复
+client_order_indexes = itertools.count(time.time_ns() // 1_000_000)
+
+
+async def get_shared_paradex_config():
+    """获取Paradex系统配置，进程内只请求一次（失败时允许下次重试）"""
+    global _paradex_config_future
+    with _paradex_config_lock:
+        future = _paradex_config_future
+        is_owner = future is None
+        if is_owner:
+            future = _paradex_config_future = concurrent.futures.Future()
+    
+    if not is_owner:
+        return await asyncio.wrap_future(future)
+    
+    try:
+        config = await get_paradex_config_cached(PARADEX_HTTP_URL)
+    except BaseException as e:
+        with _paradex_config_lock:
+            _paradex_config_future = None
+        if isinstance(e, Exception):
+            future.set_exception(e)
+        else:
+            future.cancel()
+        raise
+    future.set_result(config)
+    return config
+
+
+# Lighter市场目录：按代理地址缓存，同一代理下的所有账户共享一次order_book_details请求
+_lighter_market_futures = {}  # proxy_url -> concurrent.futures.Future
+_lighter_market_lock = threading.Lock()
+
+
+async def _fetch_lighter_markets(proxy_url):
+    """一次请求取回Lighter全部市场的详情，返回 {symbol: OrderBookDetail}"""
+    config = lighter.Configuration(host=LIGHTER_URL)
     if proxy_url:
-        return aiohttp.ClientSession(connector=aiohttp.TCPConnector())
-    else:
-        return aiohttp.ClientSession()
+        config.proxy = proxy_url
+    api_client = lighter.ApiClient(configuration=config)
+    try:
+        response = await lighter.OrderApi(api_client).order_book_details()
+    finally:
+        await api_client.close()
+    return {detail.symbol.upper(): detail for detail in (response.order_book_details or [])}
+
+
+async def get_lighter_markets(proxy_url=None):
+    """获取Lighter市场目录，每个代理地址在进程内只请求一次（失败时允许下次重试）"""
+    with _lighter_market_lock:
+        future = _lighter_market_futures.get(proxy_url)
+        is_owner = future is None
+        if is_owner:
+            future = _lighter_market_futures[proxy_url] = concurrent.futures.Future()
+    
+    if not is_owner:
+        return await asyncio.wrap_future(future)
+    
+    try:
+        markets = await _fetch_lighter_markets(proxy_url)
+    except BaseException as e:
+        with _lighter_market_lock:
+            _lighter_market_futures.pop(proxy_url, None)
+        if isinstance(e, Exception):
+            future.set_exception(e)
+        else:
+            future.cancel()
+        raise
+    future.set_result(markets)
+    return markets
+
+
+def jwt_expiry(token):
+    """解析JWT的exp字段（秒级时间戳），解析失败返回None"""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except Exception:
+        return None
+
+
+def _get_status_pending(account_name):
+    deltas = account_status_pending.get(account_name)
+    if deltas is None:
+        with account_status_lock:
+            deltas = account_status_pending.setdefault(account_name, {})
+    return deltas
 
 
 def update_account_status(account_name, key, value):
     """更新账户状态"""
-    with account_status_lock:
-        account_status[account_name][key] = value
+    global account_status_version
+    if not status_updates_enabled:
+        return
+    # dict的赋值 / popitem 在GIL下是原子的，无需加锁
+    _get_status_pending(account_name)[key] = value
+    # itertools.count 的 next() 在GIL下是原子的
+    account_status_version = next(_status_versions)
+    status_dirty.set()
 
 
-def format_status_table():
-    """格式化状态表格 - 使用rich库，返回表格对象或None"""
-    import os
-    from datetime import datetime
+def update_account_status_many(account_name, fields):
+    """一次更新账户的多个状态字段"""
+    global account_status_version
+    if not status_updates_enabled:
+        return
+    _get_status_pending(account_name).update(fields)
+    account_status_version = next(_status_versions)
+    status_dirty.set()
+
+
+def _drain_status_pending():
+    """（仅监控线程调用）取出所有账户待合并的字段最新值，合并到 account_status"""
+    for account_name, deltas in list(account_status_pending.items()):
+        status = account_status.get(account_name)
+        if status is None:
+            status = account_status[account_name] = AccountStatus()
+            bisect.insort(_account_order, account_name)
+        changed = False
+        # 逐项popitem：取出后交易器再写入的同一字段会留到下次合并，不会丢失
+        while deltas:
+            key, value = deltas.popitem()
+            # 重复写入相同的值（如等待中反复刷新的余额）不算变化
+            if getattr(status, key) != value:
+                setattr(status, key, value)
+                changed = True
+        # 状态确实有变化，下次渲染时重新生成该账户的行
+        if changed:
+            _status_rows.pop(account_name, None)
+
+
+_status_rows = {}  # account_name -> (row, loss)，只由监控线程读写，状态未变化的账户直接复用
+
+
+STATUS_COLUMNS = [
+    # (列名, 宽度, 对齐方式)
+    ("账号", 18, "left"),
+    ("交易对", 12, "center"),
+    ("初始余额(P/L)", 28, "right"),
+    ("当前余额(P/L)", 28, "right"),
+    ("持仓(P/L)", 24, "center"),
+    ("磨损", 12, "right"),
+    ("循环", 8, "center"),
+    ("状态", 20, "center"),
+]
+
+
+# 每列的格式串只编译一次；{0.xxx} 直接读取AccountStatus的属性
+_INITIAL_BALANCE_FMT = "{0.initial_balance_paradex:.4f}/{0.initial_balance_lighter:.4f}".format
+_CURRENT_BALANCE_FMT = "{0.current_balance_paradex:.4f}/{0.current_balance_lighter:.4f}".format
+_POSITION_FMT = "{0.paradex_position}/{0.lighter_position}".format
+
+
+def _status_row(account_name, status):
+    """把单个账户的状态转换为表格各列的文本，以及磨损的正负号（用于着色）"""
+    # 计算磨损：亏损显示为负数，盈利显示为正数
+    loss = (status.initial_balance_paradex + status.initial_balance_lighter) - (
+        status.current_balance_paradex + status.current_balance_lighter)
     
-    with account_status_lock:
-        if not account_status:
-            return None
-        
-        # 使用rich创建表格
-        try:
-            from rich.console import Console
-            from rich.table import Table
-            from rich.text import Text
-            
-            console = Console()
-            table = Table(title=f"交易监控面板 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", 
-                         show_header=True, header_style="bold cyan", 
-                         title_style="bold yellow", box=None)
-            
-            # 使用固定列宽，不自适应屏幕大小
-            table.add_column("账号", justify="left", width=18, no_wrap=True)
-            table.add_column("交易对", justify="center", width=12, no_wrap=True)
-            table.add_column("初始余额(P/L)", justify="right", width=28, no_wrap=True)
-            table.add_column("当前余额(P/L)", justify="right", width=28, no_wrap=True)
-            table.add_column("持仓(P/L)", justify="center", width=24, no_wrap=True)
-            table.add_column("磨损", justify="right", width=12, no_wrap=True)
-            table.add_column("循环", justify="center", width=8, no_wrap=True)
-            table.add_column("状态", justify="center", width=20, no_wrap=True)
-            
-            for account_name, status in sorted(account_status.items()):
-                init_bal_p = status.get('initial_balance_paradex', 0)
-                init_bal_l = status.get('initial_balance_lighter', 0)
-                curr_bal_p = status.get('current_balance_paradex', 0)
-                curr_bal_l = status.get('current_balance_lighter', 0)
-                paradex_pos = status.get('paradex_position', '无')
-                lighter_pos = status.get('lighter_position', '无')
-                loop_count = status.get('loop_count', 0)
-                wait_status = status.get('wait_status', '准备中')
-                countdown = status.get('countdown', '')
-                market = status.get('market', 'N/A')
-                
-                init_total = f"{init_bal_p:.2f}+{init_bal_l:.2f}={init_bal_p+init_bal_l:.2f}"
-                curr_total = f"{curr_bal_p:.2f}+{curr_bal_l:.2f}={curr_bal_p+curr_bal_l:.2f}"
-                position_total = f"{paradex_pos}/{lighter_pos}"
-                
-                status_display = wait_status
-                if countdown:
-                    status_display = f"{countdown}秒"
-                
-                # 计算磨损
-                init_sum = init_bal_p + init_bal_l
-                curr_sum = curr_bal_p + curr_bal_l
-                loss = init_sum - curr_sum
-                if loss > 0:
-                    loss_str = f"-{loss:.4f}"
-                    loss_style = "red"
-                elif loss < 0:
-                    loss_str = f"+{abs(loss):.4f}"
-                    loss_style = "green"
-                else:
-                    loss_str = "0.0000"
-                    loss_style = None
-                
-                # 格式化余额显示，保留4位小数
-                init_total = f"{init_bal_p:.4f}/{init_bal_l:.4f}"
-                curr_total = f"{curr_bal_p:.4f}/{curr_bal_l:.4f}"
-                
-                # 添加行，带样式
-                from rich.text import Text
-                row_items = [
-                    account_name,
-                    market,
-                    init_total,
-                    curr_total,
-                    position_total,
-                    Text(loss_str, style=loss_style) if loss_style else loss_str,
-                    str(loop_count),
-                    status_display
-                ]
-                table.add_row(*row_items)
-            
-            return table
-            
-        except ImportError:
-            # 如果rich未安装，使用简单表格
-            print("=" * 120)
-            print(f"交易监控面板 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            print("=" * 120)
-            
-            # 表格头部 - 使用固定列宽
-            col_widths = [18, 12, 28, 28, 24, 12, 8, 20]
-            col_names = ["账号", "交易对", "初始余额(P/L)", "当前余额(P/L)", "持仓(P/L)", "磨损", "循环", "状态"]
-            header_line = "┌" + "┐".join("─" * w for w in col_widths) + "┐"
-            sep_line = "├" + "┤".join("─" * w for w in col_widths) + "┤"
-            footer_line = "└" + "┘".join("─" * w for w in col_widths) + "┘"
-            
-            print(header_line)
-            header_row = "│".join(name.center(w) for name, w in zip(col_names, col_widths))
-            print(f"│{header_row}│")
-            print(sep_line)
-            
-            # 表格内容
-            for account_name, status in sorted(account_status.items()):
-                init_bal_p = status.get('initial_balance_paradex', 0)
-                init_bal_l = status.get('initial_balance_lighter', 0)
-                curr_bal_p = status.get('current_balance_paradex', 0)
-                curr_bal_l = status.get('current_balance_lighter', 0)
-                paradex_pos = status.get('paradex_position', '无')
-                lighter_pos = status.get('lighter_position', '无')
-                loop_count = status.get('loop_count', 0)
-                wait_status = status.get('wait_status', '准备中')
-                countdown = status.get('countdown', '')
-                market = status.get('market', 'N/A')
-                
-                # 格式化余额显示，保留4位小数
-                init_total = f"{init_bal_p:.4f}/{init_bal_l:.4f}"
-                curr_total = f"{curr_bal_p:.4f}/{curr_bal_l:.4f}"
-                position_total = f"{paradex_pos}/{lighter_pos}"
-                
-                status_display = wait_status
-                if countdown:
-                    status_display = f"{countdown}秒"
-                
-                # 计算磨损
-                init_sum = init_bal_p + init_bal_l
-                curr_sum = curr_bal_p + curr_bal_l
-                loss = init_sum - curr_sum
-                loss_str = f"-{loss:.4f}" if loss > 0 else f"+{abs(loss):.4f}" if loss < 0 else "0.0000"
-                
-                # 格式化每列数据
-                col_widths = [18, 12, 28, 28, 24, 12, 8, 20]
-                row_data = [
-                    account_name[:17].ljust(17),
-                    market.center(11),
-                    init_total.rjust(27),
-                    curr_total.rjust(27),
-                    position_total.center(23),
-                    loss_str.rjust(11),
-                    str(loop_count).center(7),
-                    status_display[:19].center(19)
-                ]
-                
-                row_line = "│".join(data.center(w) if i in [1, 4, 6, 7] else data.ljust(w) if i == 0 else data.rjust(w) 
-                                   for i, (data, w) in enumerate(zip(row_data, col_widths)))
-                print(f"│{row_line}│")
-            
-            # 打印表格底部
-            col_widths = [18, 12, 28, 28, 24, 12, 8, 20]
-            footer_line = "└" + "┘".join("─" * w for w in col_widths) + "┘"
-            print(footer_line)
+    row = [
+        account_name,
+        status.market,
+        # 格式化余额显示，保留4位小数
+        _INITIAL_BALANCE_FMT(status),
+        _CURRENT_BALANCE_FMT(status),
+        _POSITION_FMT(status),
+        f"{-loss:+.4f}" if loss else "0.0000",
+        str(status.loop_count),
+        f"{status.countdown}秒" if status.countdown else status.wait_status,
+    ]
+    return row, loss
 
 
-def run_status_monitor():
-    """运行状态监控 - 每2秒更新一次表格"""
-    from rich.live import Live
-    from rich.console import Console
+def _cached_status_row(account_name, status):
+    """返回账户的表格行，状态没有变化时复用上次格式化的结果"""
+    cached = _status_rows.get(account_name)
+    if cached is None:
+        cached = _status_rows[account_name] = _status_row(account_name, status)
+    return cached
+
+
+def _render_rich(rows):
+    """使用rich构建表格对象"""
+    table = Table(title=f"交易监控面板 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", 
+                 show_header=True, header_style="bold cyan", 
+                 title_style="bold yellow", box=None)
     
-    console = Console()
+    # 使用固定列宽，不自适应屏幕大小
+    for name, width, justify in STATUS_COLUMNS:
+        table.add_column(name, justify=justify, width=width, no_wrap=True)
     
-    # 使用Live实现实时更新，避免屏幕滚动
-    try:
-        # 清屏一次，然后使用Live更新（screen=True会保留屏幕，只更新Live区域）
+    for account_name, status in rows:
+        row, loss = _cached_status_row(account_name, status)
+        # 磨损列带样式：亏损红色，盈利绿色（复制一份，不修改缓存的行）
+        if loss:
+            row = list(row)
+            row[5] = Text(row[5], style="red" if loss > 0 else "green")
+        table.add_row(*row)
+    
+    return table
+
+
+def _ascii_row_template():
+    """按STATUS_COLUMNS生成纯文本表格的行模板：右对齐的列右侧留1个空格，账号和状态过长时截断"""
+    cells = []
+    for i, (_, w, justify) in enumerate(STATUS_COLUMNS):
+        if justify == "left":
+            cells.append(f"{{{i}:<{w}.{w - 1}}}")
+        elif justify == "right":
+            cells.append(f"{{{i}:>{w - 1}}} ")
+        elif i == len(STATUS_COLUMNS) - 1:
+            cells.append(f"{{{i}:^{w}.{w - 1}}}")
+        else:
+            cells.append(f"{{{i}:^{w}}}")
+    return "│" + "│".join(cells) + "│\n"
+
+
+# ANSI清屏（光标回到左上角并清除屏幕），输出不是终端时（如重定向到文件）不清屏
+CLEAR_SCREEN = "\033[H\033[2J" if sys.stdout.isatty() else ""
+
+# 纯文本表格的固定部分只生成一次
+_ASCII_COL_WIDTHS = [width for _, width, _ in STATUS_COLUMNS]
+ASCII_ROW_TMPL = _ascii_row_template()
+ASCII_TABLE_HEADER = (
+    "┌" + "┐".join("─" * w for w in _ASCII_COL_WIDTHS) + "┐\n"
+    + "│" + "│".join(name.center(w) for name, w, _ in STATUS_COLUMNS) + "│\n"
+    + "├" + "┤".join("─" * w for w in _ASCII_COL_WIDTHS) + "┤\n"
+)
+ASCII_TABLE_FOOTER = "└" + "┘".join("─" * w for w in _ASCII_COL_WIDTHS) + "┘\n"
+
+
+def _render_ascii(rows):
+    """rich未安装时直接打印纯文本表格，清屏序列和整张表拼接后一次写出"""
+    parts = [
+        CLEAR_SCREEN,
+        "=" * 120, "\n",
+        f"交易监控面板 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
+        "=" * 120, "\n",
+        ASCII_TABLE_HEADER,
+    ]
+    parts.extend(ASCII_ROW_TMPL.format(*_cached_status_row(account_name, status)[0]) for account_name, status in rows)
+    parts.append(ASCII_TABLE_FOOTER)
+    sys.stdout.write("".join(parts))
+    sys.stdout.flush()
+
+
+def format_status_table():
+    """格式化状态表格 - 安装了rich时返回表格对象，否则直接打印纯文本表格并返回None"""
+    _drain_status_pending()
+    rows = [(name, account_status[name]) for name in _account_order]
+    if not rows:
+        return None
+    if _RICH:
+        return _render_rich(rows)
+    _render_ascii(rows)
+    return None
+
+
+def _wait_for_status_change():
+    """（仅监控线程调用）阻塞到状态有更新或收到退出信号，空闲时不唤醒"""
+    # 先等最小间隔，让一批连续的更新合并成一次重绘
+    if shutdown_event.wait(STATUS_REDRAW_MIN_INTERVAL):
+        return
+    status_dirty.wait(STATUS_REDRAW_MAX_INTERVAL)
+    status_dirty.clear()
+
+
+def _run_plain_monitor(last_version):
+    """简单模式：状态有变化时ANSI清屏后重新打印表格"""
+    console = Console() if _RICH else None
+    while not shutdown_event.is_set():
         try:
-            os.system('clear' if os.name != 'nt' else 'cls')
-        except:
+            version = account_status_version
+            if version != last_version:
+                table = format_status_table()
+                if table is not None:
+                    sys.stdout.write(CLEAR_SCREEN)
+                    console.print(table)
+                last_version = version
+        except Exception:
+            # 静默处理错误，不输出日志
             pass
-        
-        with Live(console=console, refresh_per_second=0.5, screen=True, vertical_overflow="visible", redirect_stderr=False) as live:
-            while True:
+        _wait_for_status_change()
+
+
+def run_status_monitor():
+    """运行状态监控 - 状态有变化时才重新渲染表格"""
+    last_version = None
+    if not _RICH:
+        _run_plain_monitor(last_version)
+        return
+    
+    # 使用Live原地更新（screen=True使用终端备用屏幕，无需清屏）
+    try:
+        with Live(console=Console(), auto_refresh=False, screen=True, vertical_overflow="visible", redirect_stderr=False) as live:
+            while not shutdown_event.is_set():
                 try:
-                    # 获取表格并更新（不清屏，让Live自动处理）
-                    table = format_status_table()
-                    if table:
-                        live.update(table)
-                    else:
-                        live.update("暂无账户数据...")
-                    
-                    time.sleep(2)
-                except KeyboardInterrupt:
-                    break
-                except Exception as e:
-                    # 使用print而不是logging，避免显示在控制台
-                    # logging.error会输出到控制台，而我们已经设置了WARNING级别
+                    version = account_status_version
+                    if version != last_version:
+                        table = format_status_table()
+                        if table:
+                            live.update(table, refresh=True)
+                        else:
+                            live.update("暂无账户数据...", refresh=True)
+                        last_version = version
+                except Exception:
+                    # 静默处理错误，不输出日志
                     pass
-                    time.sleep(2)
+                _wait_for_status_change()
     except Exception:
-        # 如果Live失败，回退到简单模式（清屏后打印）
-        import os
-        while True:
-            try:
-                try:
-                    os.system('clear' if os.name != 'nt' else 'cls')
-                except:
-                    pass
-                format_status_table()
-                time.sleep(2)
-            except KeyboardInterrupt:
-                break
-            except Exception as e:
-                # 静默处理错误，不输出日志
-                time.sleep(2)
-            time.sleep(5)
+        # 如果Live失败，回退到简单模式
+        _run_plain_monitor(last_version)
+
+
+def backoff_delay(attempt, base=RETRY_BACKOFF_BASE, cap=RETRY_BACKOFF_CAP):
+    """第attempt次重试前的等待：指数增长并封顶，乘以0.5~1.5的随机抖动，避免多个账户同时重试"""
+    return min(base * (2 ** attempt), cap) * (0.5 + random.random())
+
+
+def jittered(seconds, spread=0.2):
+    """固定等待时间加上±spread比例的随机抖动，避免多个账户在同一时刻重试"""
+    return seconds * random.uniform(1 - spread, 1 + spread)
+
+
+def backoff_schedule(max_retries):
+    """依次产出 (attempt, 本次失败后应等待的秒数)"""
+    for attempt in range(max_retries):
+        yield attempt, backoff_delay(attempt)
+
+
+def retry_on_auth(method):
+    """JWT过期（TokenExpired）时刷新token并重试一次"""
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        try:
+            return await method(self, *args, **kwargs)
+        except TokenExpired:
+            self.logger.warning("Token已过期，正在刷新...")
+            if not await self.refresh_jwt_token():
+                self.logger.error("Token刷新失败")
+                raise
+            return await method(self, *args, **kwargs)
+    return wrapper
+
+
+class LighterOrderError(Exception):
+    """Lighter下单失败；code为错误代码（无法识别时为None）"""
+    
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+class NonceError(LighterOrderError):
+    """后端期望的nonce与本地不一致，同步nonce后可以重试"""
+
+
+class RestrictedJurisdictionError(LighterOrderError):
+    """当前IP所在地区无法访问Lighter（20558），重试没有意义"""
+
+
+class TransientLighterError(LighterOrderError):
+    """服务器错误或限流，退避后可以重试"""
+
+
+LIGHTER_RESTRICTED_CODE = 20558
+LIGHTER_TRANSIENT_CODES = frozenset({429, 500, 502, 503, 504})
+_LIGHTER_CODE_RE = re.compile(r'code=(\d+)')
+_LIGHTER_MESSAGE_RE = re.compile(r"message='([^']+)'")
+
+
+def classify_lighter_error(code, error):
+    """把Lighter返回的错误代码/错误信息（或SDK抛出的异常）转换为对应类型的LighterOrderError。
+    错误信息中带有 code=... / message='...' 时优先使用其中的代码和信息。"""
+    raw = str(error)
+    message = raw
+    code_match = _LIGHTER_CODE_RE.search(raw)
+    if code_match:
+        code = int(code_match.group(1))
+        message_match = _LIGHTER_MESSAGE_RE.search(raw)
+        if message_match:
+            message = message_match.group(1)
+    lowered = raw.lower()
+    if code == LIGHTER_RESTRICTED_CODE or "restricted jurisdiction" in lowered:
+        error_type = RestrictedJurisdictionError
+    elif "nonce" in lowered:
+        error_type = NonceError
+    elif code in LIGHTER_TRANSIENT_CODES or "temporary" in lowered:
+        error_type = TransientLighterError
+    else:
+        error_type = LighterOrderError
+    return error_type(message, code)
+
+
+def _build_signer_client(**kwargs):
+    """在工作线程中构造SignerClient（构造函数会同步请求nonce）。
+    构造时创建的aiohttp会话绑定在临时事件循环上，返回前关闭，调用方需换上共享事件循环上的ApiClient"""
+    async def build():
+        client = lighter.SignerClient(**kwargs)
+        await client.api_client.close()
+        return client
+    return asyncio.run(build())
 
 
 class AccountTrader:
@@ -335,24 +752,31 @@ class AccountTrader:
         self.account_info = account_info
         self.config = None
         self.jwt_token = None
+        self._jwt_exp = None  # 当前JWT的exp（秒级时间戳），获取token时解析一次
+        self.http_session = None  # Paradex HTTP长连接会话（所有账户共享，见shared_http_session）
+        self.order_ws = None  # Paradex订单推送连接，断开时为None（回退到REST轮询）
+        self._order_ws_task = None
+        self._pending_fills = {}  # client_id -> asyncio.Event，订单完全成交时置位
+        self._order_seq = itertools.count(1)  # 平仓单client_id的递增序号
         self.lighter_client = None
+        self._account_api = None  # Lighter AccountApi，在initialize_lighter中创建一次
+        self._account_index_str = str(account_info.account_index)
         self.market_info = None
-        self.logger = logging.getLogger(f"Trader-{account_info.get('description', 'Unknown')}")
+        # 所有交易器共用模块logger，通过trader字段区分账户，不为每个账户注册独立的Logger
+        self.logger = logging.LoggerAdapter(logger, {'trader': f"Trader-{account_info.description}"})
         self.token_refresh_task = None  # Token刷新任务
-        self.account_name = account_info.get('description', 'Unknown')
+        self._jwt_refresh = None  # 正在进行的JWT刷新（并发调用共享同一次请求）
+        self.status_snapshot_task = None  # 余额/持仓快照刷新任务
+        self.account_name = account_info.description
         self.shutting_down = False  # 退出清理标记
         
-        # 从account_info读取市场参数，如果没有则使用默认值
-        self.market = account_info.get('market', DEFAULT_MARKET).strip()
-        try:
-            self.order_size = Decimal(str(account_info.get('order_size', DEFAULT_ORDER_SIZE)))
-        except (ValueError, TypeError):
-            self.order_size = DEFAULT_ORDER_SIZE
-            self.logger.warning(f"无效的order_size值，使用默认值: {DEFAULT_ORDER_SIZE}")
+        # 市场参数在读取CSV时已解析并填好默认值
+        self.market = account_info.market
+        self.order_size = account_info.order_size
+        self.base_asset = self.market.split('-')[0].upper()  # 从BTC-USD-PERP提取BTC，只解析一次
         
         # 从account_info读取代理配置
-        proxy_url = account_info.get('proxy_url', '').strip()
-        self.proxy_url = proxy_url if proxy_url else None
+        self.proxy_url = account_info.proxy_url or None
         if self.proxy_url:
             self.logger.info(f"代理配置: {self.proxy_url}")
         else:
@@ -361,19 +785,28 @@ class AccountTrader:
         # 初始化market_index相关属性（将在initialize_lighter中设置）
         self.market_index = None
         self.size_decimals = None
-        self._csv_market_index = None  # 保留此属性以兼容错误处理逻辑
+        self.lighter_base_amount = None  # order_size换算后的Lighter最小单位，size_decimals确定后计算一次
+        self._csv_market_index = account_info.market_index  # CSV中指定的market_index，查询市场目录失败时使用
         
         # 生成客户端ID（基于市场名称）
-        market_symbol = self.market.split('-')[0].lower()  # 从BTC-USD-PERP提取BTC
+        market_symbol = self.base_asset.lower()
         self.client_id_short = f"{market_symbol}-short-order"
         self.client_id_long = f"{market_symbol}-long-order"
         
         self.logger.info(f"交易对配置: market={self.market}, order_size={self.order_size}")
         
+        # 限价单中每次重试都不变的字段（市场/方向/类型/大小）按方向预先序列化和编码
+        self._order_templates = {
+            side: self._make_order_template(side, self.order_size)
+            for side in (OrderSide.Buy, OrderSide.Sell)
+        }
+        
         # 初始化状态
-        update_account_status(self.account_name, 'wait_status', '初始化中')
-        update_account_status(self.account_name, 'loop_count', 0)
-        update_account_status(self.account_name, 'market', self.market)
+        update_account_status_many(self.account_name, {
+            'wait_status': '初始化中',
+            'loop_count': 0,
+            'market': self.market,
+        })
         
         # 为每个资金费率时间点随机生成前后偏移量（5-50分钟），在程序运行期间固定
         # funding_windows 格式: {时间点(分钟): (前偏移(分钟), 后偏移(分钟))}
@@ -385,37 +818,78 @@ class AccountTrader:
             after_offset = random.randint(5, 50)   # 后偏移 5-50 分钟
             self.funding_windows[ft] = (before_offset, after_offset)
             self.logger.info(f"资金费率时间点 {ft//60:02d}:{ft%60:02d} 窗口设置为: 前{before_offset}分钟, 后{after_offset}分钟")
+        self._build_funding_intervals()
         
+    def _build_funding_intervals(self):
+        """把资金费率窗口预先换算成按起点排序的UTC分钟区间（跨天的窗口拆成两段）"""
+        # 每项为 (起点, 终点, 窗口真正的终点)，拆分后的两段共享同一个真正终点
+        intervals = []
+        for funding_time, (before_offset, after_offset) in self.funding_windows.items():
+            start = (funding_time - before_offset - CST_OFFSET_MINUTES) % DAY_MINUTES
+            end = (funding_time + after_offset - CST_OFFSET_MINUTES) % DAY_MINUTES
+            if start <= end:
+                intervals.append((start, end, end))
+            else:
+                intervals.append((start, DAY_MINUTES - 1, end))
+                intervals.append((0, end, end))
+        intervals.sort()
+        self._funding_intervals = intervals
+        self._funding_starts = [interval[0] for interval in intervals]
+        self._funding_clear_until = 0  # 在此时间戳之前确定不在窗口内（下一个窗口的开始时间）
+    
+    def _next_funding_start(self, now) -> float:
+        """now之后下一个资金费率窗口开始的时间戳（当前不在窗口内时调用）"""
+        seconds = now % (DAY_MINUTES * 60)
+        i = bisect.bisect_right(self._funding_starts, seconds // 60)
+        if i < len(self._funding_starts):
+            start = self._funding_starts[i]
+        else:
+            start = self._funding_starts[0] + DAY_MINUTES
+        return now - seconds + start * 60
+    
     def _seconds_remaining_in_funding_window(self) -> int:
         """判断是否处于资金费率窗口（北京时间 00:00/08:00/16:00 前后随机5-50分钟）。
         返回：处于窗口则返回距离窗口结束的秒数；否则返回0。
         """
+        now = time.time()
+        # 下一个窗口开始之前都不可能在窗口内，只需比较一次时间戳
+        if now < self._funding_clear_until:
+            return 0
+        minutes = (int(now) // 60) % DAY_MINUTES
+        i = bisect.bisect_right(self._funding_starts, minutes) - 1
+        if i >= 0:
+            _, end, window_end = self._funding_intervals[i]
+            if minutes <= end:
+                # 留一点缓冲（+5秒）
+                return max(1, ((window_end - minutes) % DAY_MINUTES) * 60 + 5)
+        self._funding_clear_until = self._next_funding_start(now)
+        return 0
+
+    def _seconds_until_funding_window(self) -> float:
+        """距离下一个资金费率窗口开始的秒数（当前不在窗口内时调用），多留1秒确保醒来时已进入窗口"""
+        now = time.time()
+        return self._next_funding_start(now) - now + 1
+
+    async def _countdown_ui(self, seconds):
+        """只负责刷新面板上的倒计时显示，由等待方在等待结束时取消"""
         try:
-            now_utc = datetime.now(timezone.utc)
-            now_cst = now_utc.astimezone(timezone(timedelta(hours=8)))
-            minutes = now_cst.hour * 60 + now_cst.minute
-            day_minutes = 24 * 60
-
-            for funding_time, (before_offset, after_offset) in self.funding_windows.items():
-                start = (funding_time - before_offset) % day_minutes
-                end = (funding_time + after_offset) % day_minutes
-
-                if start <= end:
-                    in_window = (start <= minutes <= end)
-                    remaining_min = end - minutes
-                else:
-                    # 跨天窗口
-                    in_window = (minutes >= start) or (minutes <= end)
-                    # 计算到end的正向距离（取模）
-                    remaining_min = (end - minutes) % day_minutes
-
-                if in_window:
-                    # 留一点缓冲（+5秒）
-                    return max(1, remaining_min * 60 + 5)
-        except Exception:
-            pass
+            for i in range(seconds, 0, -1):
+                update_account_status(self.account_name, 'countdown', str(i))
+                await asyncio.sleep(1)
+        finally:
+            update_account_status(self.account_name, 'countdown', '')
 
-        return 0
+    async def wait_between_rounds(self, wait_time) -> bool:
+        """两轮之间等待wait_time秒：一次性等待到超时、资金费率窗口开始或收到退出信号。
+        返回是否收到了退出信号。"""
+        if await self.pause_for_funding_window():
+            return shutdown_event.is_set()
+        countdown = asyncio.create_task(self._countdown_ui(wait_time))
+        try:
+            # 资金费率窗口开始得更早时提前结束等待，由调用方接着执行窗口处理
+            return await sleep_or_shutdown(min(wait_time, self._seconds_until_funding_window()))
+        finally:
+            countdown.cancel()
 
     async def pause_for_funding_window(self) -> bool:
         """若处于资金费率窗口：取消两边挂单并暂停到窗口结束。返回是否发生了暂停。"""
@@ -425,19 +899,14 @@ class AccountTrader:
                 msg = f"资金费率窗口内，暂停交易 {seconds} 秒，并取消所有挂单"
                 self.logger.warning(msg)
                 update_account_status(self.account_name, 'wait_status', '资金费率窗口，取消挂单并暂停...')
-                # 取消两边挂单
-                await self.cancel_all_orders()
-                await self.cancel_lighter_orders()
-                await self.close_all_paradex_positions()
-                await self.close_all_lighter_positions()
+                # 并发取消两边挂单，再并发关闭两边持仓
+                await self.cancel_and_close_all()
             except Exception as e:
                 self.logger.error(f"资金费率窗口处理出错: {e}")
 
-            # 暂停到窗口结束
-            try:
-                await asyncio.sleep(seconds)
-            except Exception:
-                pass
+            # 暂停到窗口结束，收到退出信号时立即返回
+            if await sleep_or_shutdown(seconds):
+                return True
             update_account_status(self.account_name, 'wait_status', '恢复交易')
             return True
         return False
@@ -447,7 +916,10 @@ class AccountTrader:
         update_account_status(self.account_name, 'wait_status', '初始化Paradex...')
         self.logger.info("开始初始化Paradex...")
         
-        paradex_eth_key = self.account_info['paradex_eth_key']
+        paradex_eth_key = self.account_info.paradex_eth_key
+        
+        # 使用所有账户共享的长连接会话，后续所有Paradex请求复用
+        self.http_session = shared_http_session()
         
         # 如果配置了代理，设置全局代理配置（用于Paradex API调用）
         if self.proxy_url:
@@ -462,7 +934,7 @@ class AccountTrader:
         
         # 获取Paradex配置
         self.logger.info("获取Paradex配置...")
-        self.config.paradex_config = await get_paradex_config(PARADEX_HTTP_URL)
+        self.config.paradex_config = await get_shared_paradex_config()
         
         # 生成Paradex账户
         self.logger.info("生成Paradex账户...")
@@ -471,163 +943,80 @@ class AccountTrader:
             self.config.paradex_config, eth_account.key.hex()
         )
         
-        # 执行onboarding
+        # 执行onboarding，同时预热BBO连接
         self.logger.info("执行账户onboarding...")
-        await perform_onboarding(
-            self.config.paradex_config,
-            self.config.paradex_http_url,
-            self.config.paradex_account,
-            self.config.paradex_account_private_key,
-            eth_account.address,
+        await asyncio.gather(
+            perform_onboarding(
+                self.config.paradex_config,
+                self.config.paradex_http_url,
+                self.config.paradex_account,
+                self.config.paradex_account_private_key,
+                eth_account.address,
+            ),
+            self._warm_http_session(),
         )
         
         # 获取JWT token
         self.logger.info("获取JWT token...")
-        self.jwt_token = await get_jwt_token(
+        self._set_jwt_token(await get_jwt_token(
             self.config.paradex_config,
             self.config.paradex_http_url,
             self.config.paradex_account,
             self.config.paradex_account_private_key,
-        )
+            session=self.http_session,
+        ))
+        
+        # 订阅订单状态推送，用于等待订单成交
+        self._order_ws_task = asyncio.create_task(self._run_order_ws())
         
         self.logger.info("Paradex初始化完成！")
         
         # 获取初始余额
         try:
             initial_balance = await self.get_paradex_balance()
-            update_account_status(self.account_name, 'initial_balance_paradex', initial_balance)
-            update_account_status(self.account_name, 'current_balance_paradex', initial_balance)
         except Exception as e:
             self.logger.error(f"获取Paradex初始余额失败: {e}")
-            update_account_status(self.account_name, 'initial_balance_paradex', 0)
-            update_account_status(self.account_name, 'current_balance_paradex', 0)
+            initial_balance = 0
+        update_account_status_many(self.account_name, {
+            'initial_balance_paradex': initial_balance,
+            'current_balance_paradex': initial_balance,
+        })
     
-    async def get_market_index_from_api(self):
-        """通过API查询market_index - 根据Paradex market名称自动查找对应的Lighter market_id"""
+    async def resolve_lighter_market(self):
+        """从共享的Lighter市场目录中查找当前市场的market_index和size_decimals"""
+        # 从Paradex market名称提取基础资产（如BTC-USD-PERP -> BTC）
+        base_asset = self.base_asset
+        self.logger.info(f"正在查询 {self.market} 对应的Lighter market_index...")
         try:
-            self.logger.info(f"正在查询 {self.market} 对应的Lighter market_index...")
-            
-            # 从Paradex market名称提取基础资产（如BTC-USD-PERP -> BTC）
-            base_asset = self.market.split('-')[0].upper()
-            
-            # 创建临时API客户端用于查询
-            from lighter.configuration import Configuration
-            temp_config = Configuration(host=LIGHTER_URL)
-            if self.proxy_url:
-                temp_config.proxy = self.proxy_url
-            
-            temp_api_client = lighter.ApiClient(configuration=temp_config)
-            account_api = lighter.AccountApi(temp_api_client)
-            order_api = lighter.OrderApi(temp_api_client)
-            
-            try:
-                # 方法1: 通过账户持仓信息获取所有市场，精确匹配symbol（最准确）
-                try:
-                    account_info = await account_api.account(
-                        by="index",
-                        value=str(self.account_info['account_index'])
-                    )
-                    
-                    if hasattr(account_info, 'accounts') and account_info.accounts:
-                        account = account_info.accounts[0]
-                        if hasattr(account, 'positions') and account.positions:
-                            self.logger.info(f"从账户持仓信息中查找 {base_asset} 对应的 market_id...")
-                            
-                            # 遍历所有持仓，查找精确匹配的symbol（避免ETH匹配到ETHFI）
-                            for pos in account.positions:
-                                if hasattr(pos, 'symbol') and hasattr(pos, 'market_id'):
-                                    pos_symbol = pos.symbol.upper()
-                                    market_id = pos.market_id
-                                    
-                                    # 精确匹配：symbol必须完全相等（不能使用in，避免ETH匹配到ETHFI）
-                                    if pos_symbol == base_asset:
-                                        self.logger.info(f"✓ 找到精确匹配：symbol={pos.symbol}, market_id={market_id}")
-                                        # 验证market_id是否有效
-                                        try:
-                                            order_book = await order_api.order_book_orders(market_id=market_id, limit=1)
-                                            if order_book and (not hasattr(order_book, 'code') or order_book.code == 200):
-                                                self.logger.info(f"✓ 验证成功！{self.market} 对应 market_index={market_id}")
-                                                return market_id
-                                        except Exception as e:
-                                            self.logger.warning(f"market_id={market_id} 验证失败: {e}")
-                except Exception as e:
-                    self.logger.warning(f"通过账户持仓信息查询失败: {e}")
-                
-                # 方法2: 通过order_books API查询所有市场，精确匹配symbol
-                try:
-                    order_books_response = await order_api.order_books()
-                    # order_books返回的是OrderBooks对象，包含order_books列表
-                    if order_books_response and hasattr(order_books_response, 'order_books'):
-                        order_books_list = order_books_response.order_books
-                        if order_books_list:
-                            self.logger.info(f"从订单簿详情中查找 {base_asset} 对应的 market_id...")
-                            self.logger.info(f"Lighter上共有 {len(order_books_list)} 个市场")
-                            
-                            # 记录所有可用市场（用于调试）
-                            available_symbols = []
-                            for detail in order_books_list:
-                                if hasattr(detail, 'symbol') and hasattr(detail, 'market_id'):
-                                    detail_symbol = detail.symbol.upper()
-                                    market_id = detail.market_id
-                                    available_symbols.append(f"{detail.symbol}({market_id})")
-                                    
-                                    # 精确匹配：symbol必须完全相等
-                                    if detail_symbol == base_asset:
-                                        self.logger.info(f"✓ 从订单簿详情找到精确匹配：symbol={detail.symbol}, market_id={market_id}")
-                                        return market_id
-                            
-                            # 如果没有找到匹配，记录所有可用市场
-                            self.logger.warning(f"⚠️ 未找到 {base_asset} 匹配的市场")
-                            self.logger.info(f"Lighter上可用的市场symbol列表（前30个）: {', '.join(available_symbols[:30])}")
-                            if len(available_symbols) > 30:
-                                self.logger.info(f"... 还有 {len(available_symbols) - 30} 个市场")
-                                # 尝试查找类似的symbol（包含base_asset的）
-                                similar_symbols = [s for s in available_symbols if base_asset in s.upper()]
-                                if similar_symbols:
-                                    self.logger.info(f"⚠️ 找到包含 '{base_asset}' 的类似市场: {', '.join(similar_symbols)}")
-                        else:
-                            self.logger.warning(f"order_books返回的列表为空")
-                    else:
-                        self.logger.warning(f"order_books返回结果格式不正确")
-                except Exception as e:
-                    self.logger.warning(f"通过订单簿详情查询失败: {e}")
-                    import traceback
-                    self.logger.debug(traceback.format_exc())
-                    
-            finally:
-                await temp_api_client.close()
-            
-            # 如果所有API查询方法都失败
-            base_asset = self.market.split('-')[0].upper()
-            self.logger.error(f"❌ 无法通过API查询到 {self.market} 对应的 market_index")
-            self.logger.error(f"可能的原因：")
-            self.logger.error(f"  1. {base_asset} 交易对在Lighter上不存在")
-            self.logger.error(f"  2. Lighter上的symbol名称与Paradex不同（例如：Lighter可能是 {base_asset}USDT 而不是 {base_asset}）")
-            self.logger.error(f"  3. 该交易对尚未在Lighter上架")
-            self.logger.error(f"请检查：")
-            self.logger.error(f"  - Lighter是否支持 {self.market} 交易对")
-            self.logger.error(f"  - 访问 Lighter API 查看所有可用市场")
-            
-            if self._csv_market_index is not None:
-                self.logger.warning(f"⚠️ 使用CSV中指定的 market_index: {self._csv_market_index}")
-                return self._csv_market_index
-            else:
-                raise Exception(f"无法确定 {self.market} 的 market_index，该交易对可能在Lighter上不存在")
-                
+            markets = await get_lighter_markets(self.proxy_url)
         except Exception as e:
-            self.logger.error(f"查询 market_index 失败: {e}")
-            import traceback
-            self.logger.error(traceback.format_exc())
-            
-            base_asset = self.market.split('-')[0].upper()
-            # 如果查询失败且有CSV备用值，使用它
-            if self._csv_market_index is not None:
-                self.logger.warning(f"⚠️ API查询异常，使用CSV中指定的 market_index: {self._csv_market_index}")
-                return self._csv_market_index
-            else:
-                self.logger.error(f"❌ 无法确定 {self.market} 的 market_index")
-                self.logger.error(f"可能的原因：{base_asset} 交易对在Lighter上不存在或symbol名称不同")
-                raise Exception(f"无法确定 {self.market} 的 market_index: {e}")
+            self.logger.error(f"查询Lighter市场列表失败: {e}", exc_info=self.logger.isEnabledFor(logging.DEBUG))
+            markets = {}
+        
+        # 精确匹配：symbol必须完全相等（避免ETH匹配到ETHFI）
+        detail = markets.get(base_asset)
+        if detail is not None:
+            self.market_index = detail.market_id
+            self.size_decimals = detail.size_decimals
+            self.logger.info(f"✓ 找到精确匹配：symbol={detail.symbol}, market_id={detail.market_id}, size_decimals={detail.size_decimals}")
+            return
+        
+        if markets:
+            self.logger.warning(f"⚠️ 未找到 {base_asset} 匹配的市场，Lighter上共有 {len(markets)} 个市场")
+            self.logger.info(f"Lighter上可用的市场symbol列表（前30个）: {', '.join(list(markets)[:30])}")
+            similar_symbols = [symbol for symbol in markets if base_asset in symbol]
+            if similar_symbols:
+                self.logger.info(f"⚠️ 找到包含 '{base_asset}' 的类似市场: {', '.join(similar_symbols)}")
+        
+        if self._csv_market_index is None:
+            self.logger.error(f"❌ 无法确定 {self.market} 的 market_index")
+            self.logger.error(f"可能的原因：{base_asset} 交易对在Lighter上不存在或symbol名称不同")
+            raise Exception(f"无法确定 {self.market} 的 market_index，该交易对可能在Lighter上不存在")
+        
+        # 使用CSV中指定的market_index，size_decimals按市场类型取默认值
+        self.market_index = self._csv_market_index
+        self.size_decimals = SIZE_DECIMALS_DEFAULTS.get(base_asset, DEFAULT_SIZE_DECIMALS)
+        self.logger.warning(f"⚠️ 使用CSV中指定的 market_index: {self.market_index}，size_decimals默认值: {self.size_decimals}")
     
     async def initialize_lighter(self):
         """初始化Lighter客户端"""
@@ -641,99 +1030,18 @@ class AccountTrader:
         # 创建配置对象
         lighter_config = Configuration(host=LIGHTER_URL)
         
-        # 如果配置了代理，设置代理（用于查询）
-        if self.proxy_url:
-            self.logger.info(f"为Lighter配置代理: {self.proxy_url}")
-            lighter_config.proxy = self.proxy_url
-        
-        # 创建临时API客户端用于查询
-        temp_api_client = lighter.ApiClient(configuration=lighter_config)
-        
-        # 先通过API查询market_index
-        self.market_index = await self.get_market_index_from_api()
-        self.logger.info(f"✓ 确定 market_index: {self.market_index} (对应 {self.market})")
-        
-        # 获取市场的size_decimals用于订单大小转换
-        try:
-            order_api = lighter.OrderApi(temp_api_client)
-            order_book_details_response = await order_api.order_book_details(market_id=self.market_index)
-            
-            # order_book_details返回的是OrderBookDetails对象，包含order_book_details列表
-            if order_book_details_response and hasattr(order_book_details_response, 'order_book_details'):
-                order_book_details_list = order_book_details_response.order_book_details
-                
-                # 从列表中查找匹配market_id的项
-                matched_detail = None
-                for detail in order_book_details_list:
-                    if hasattr(detail, 'market_id') and detail.market_id == self.market_index:
-                        matched_detail = detail
-                        break
-                
-                # 如果没有找到匹配的，使用第一个（如果提供了market_id，通常只返回一个）
-                if matched_detail is None and order_book_details_list:
-                    matched_detail = order_book_details_list[0]
-                    self.logger.warning(f"⚠️ 未找到完全匹配的market_id={self.market_index}，使用第一个详情项")
-                
-                if matched_detail:
-                    # 优先使用 size_decimals，如果没有则使用 supported_size_decimals
-                    size_decimals_value = None
-                    if hasattr(matched_detail, 'size_decimals'):
-                        try:
-                            size_decimals_value = matched_detail.size_decimals
-                            if size_decimals_value is not None:
-                                self.size_decimals = size_decimals_value
-                                self.logger.info(f"✓ 从 size_decimals 获取: {self.size_decimals}")
-                        except Exception as e:
-                            self.logger.warning(f"读取 size_decimals 失败: {e}")
-                    
-                    if size_decimals_value is None and hasattr(matched_detail, 'supported_size_decimals'):
-                        try:
-                            size_decimals_value = matched_detail.supported_size_decimals
-                            if size_decimals_value is not None:
-                                self.size_decimals = size_decimals_value
-                                self.logger.info(f"✓ 从 supported_size_decimals 获取: {self.size_decimals}")
-                        except Exception as e:
-                            self.logger.warning(f"读取 supported_size_decimals 失败: {e}")
-                    
-                    # 记录找到的详情信息
-                    self.logger.info(f"订单簿详情: symbol={getattr(matched_detail, 'symbol', 'N/A')}, "
-                                   f"market_id={getattr(matched_detail, 'market_id', 'N/A')}, "
-                                   f"size_decimals={getattr(matched_detail, 'size_decimals', 'N/A')}, "
-                                   f"supported_size_decimals={getattr(matched_detail, 'supported_size_decimals', 'N/A')}")
-                else:
-                    size_decimals_value = None
-                
-                # 如果还是获取不到，根据市场类型使用默认值
-                if size_decimals_value is None:
-                    base_asset = self.market.split('-')[0].upper()
-                    if base_asset == 'BTC':
-                        self.size_decimals = 5  # BTC使用5位小数（100000）
-                    else:
-                        self.size_decimals = 4  # 其他市场默认4位小数（10000）
-                    self.logger.warning(f"⚠️ 无法从API获取size_decimals，根据市场类型使用默认值: {self.size_decimals}")
-                else:
-                    self.logger.info(f"✓ 获取市场 {self.market} (market_index={self.market_index}) 的 size_decimals: {self.size_decimals}")
-            else:
-                # 根据市场类型使用不同的默认值
-                base_asset = self.market.split('-')[0].upper()
-                if base_asset == 'BTC':
-                    self.size_decimals = 5  # BTC使用5位小数（100000）
-                else:
-                    self.size_decimals = 4  # 其他市场默认4位小数（10000）
-                self.logger.warning(f"⚠️ order_book_details返回空结果，根据市场类型使用默认值: {self.size_decimals}")
-        except Exception as e:
-            # 根据市场类型使用不同的默认值
-            base_asset = self.market.split('-')[0].upper()
-            if base_asset == 'BTC':
-                self.size_decimals = 5  # BTC使用5位小数（100000）
-            else:
-                self.size_decimals = 4  # 其他市场默认4位小数（10000）
-            self.logger.error(f"❌ 获取size_decimals失败: {e}，根据市场类型使用默认值: {self.size_decimals}")
-            import traceback
-            self.logger.error(traceback.format_exc())
+        # 查询market_index和size_decimals（市场目录在所有账户之间共享）
+        await self.resolve_lighter_market()
+        self.logger.info(f"✓ 确定 market_index: {self.market_index} (对应 {self.market})，size_decimals: {self.size_decimals}")
         
-        # 关闭临时API客户端
-        await temp_api_client.close()
+        # 订单大小只在此换算一次为Lighter最小单位（整数），下单时直接复用
+        # 例如：如果size_decimals=4，则 0.01 ETH = 0.01 * 10000 = 100 base_amount
+        size_scale = 10 ** self.size_decimals
+        self.lighter_base_amount = int(self.order_size * size_scale)
+        if self.lighter_base_amount < 1:
+            self.logger.warning(f"订单大小转换后为0或负数，使用最小值1")
+            self.lighter_base_amount = 1
+        self.logger.info(f"订单大小转换: {self.order_size} {self.base_asset} (size_decimals={self.size_decimals}, scale={size_scale}) -> {self.lighter_base_amount} 最小单位")
         
         # 如果配置了代理，设置代理
         if self.proxy_url:
@@ -742,45 +1050,41 @@ class AccountTrader:
             # 如果需要代理认证，可以设置proxy_headers
             # lighter_config.proxy_headers = {"Proxy-Authorization": "Basic ..."}
         
-        # 创建SignerClient
-        self.lighter_client = lighter.SignerClient(
+        # 创建SignerClient：构造时会同步请求nonce并加载签名库，放到线程池执行，不阻塞其他账户
+        self.lighter_client = await asyncio.to_thread(
+            _build_signer_client,
             url=LIGHTER_URL,
-            private_key=self.account_info['api_key_private_key'],
-            account_index=int(self.account_info['account_index']),
-            api_key_index=int(self.account_info['api_key_index']),
+            private_key=self.account_info.api_key_private_key,
+            account_index=self.account_info.account_index,
+            api_key_index=self.account_info.api_key_index,
             nonce_management_type=nm.NonceManagerType.API,  # 使用API nonce管理器
         )
         
-        # 如果配置了代理，替换api_client为带代理配置的客户端
-        if self.proxy_url:
-            api_client = lighter.ApiClient(configuration=lighter_config)
-            self.lighter_client.api_client = api_client
-            self.lighter_client.tx_api = lighter.TransactionApi(api_client)
-            self.lighter_client.order_api = lighter.OrderApi(api_client)
-            
-            # 重新初始化nonce_manager（使用新的api_client）
-            self.lighter_client.nonce_manager = nm.nonce_manager_factory(
-                nonce_manager_type=nm.NonceManagerType.API,
-                account_index=int(self.account_info['account_index']),
-                api_client=api_client,
-                start_api_key=int(self.account_info['api_key_index']),
-                end_api_key=int(self.account_info['api_key_index']),
-            )
+        # 在共享事件循环上创建API客户端（带代理配置时走代理），替换构造时已关闭的临时客户端
+        api_client = lighter.ApiClient(configuration=lighter_config)
+        self.lighter_client.api_client = api_client
+        self.lighter_client.tx_api = lighter.TransactionApi(api_client)
+        self.lighter_client.order_api = lighter.OrderApi(api_client)
+        # nonce管理器只用api_client的host同步请求nonce，直接复用新客户端，无需重新查询
+        self.lighter_client.nonce_manager.api_client = api_client
         
-        # 检查客户端
-        err = self.lighter_client.check_client()
+        # 检查客户端（签名库内部同步访问网络，放到线程池执行）
+        err = await asyncio.to_thread(self.lighter_client.check_client)
         if err is not None:
             raise Exception(f"Lighter客户端检查失败: {err}")
         
+        # 查询余额/持仓复用同一个AccountApi实例
+        self._account_api = lighter.AccountApi(self.lighter_client.api_client)
+        
         # 记录初始化时的nonce值
         if hasattr(self.lighter_client, 'nonce_manager') and hasattr(self.lighter_client.nonce_manager, 'nonce'):
             self.logger.info(f"Lighter初始化完成！初始nonce值: {self.lighter_client.nonce_manager.nonce}")
             
             # **关键修复：如果nonce长时间不变，说明有pending交易**
             # 强制刷新一次nonce并等待
-            api_key_idx = int(self.account_info['api_key_index'])
+            api_key_idx = self.account_info.api_key_index
             self.logger.info(f"预热nonce管理器...")
-            self.lighter_client.nonce_manager.hard_refresh_nonce(api_key_idx)
+            await asyncio.to_thread(self.lighter_client.nonce_manager.hard_refresh_nonce, api_key_idx)
             await asyncio.sleep(1)  # 给一些时间让pending交易处理
         else:
             self.logger.info("Lighter初始化完成！")
@@ -788,16 +1092,55 @@ class AccountTrader:
         # 获取初始余额
         try:
             initial_balance = await self.get_lighter_balance()
-            update_account_status(self.account_name, 'initial_balance_lighter', initial_balance)
-            update_account_status(self.account_name, 'current_balance_lighter', initial_balance)
         except Exception as e:
             self.logger.error(f"获取Lighter初始余额失败: {e}")
-            update_account_status(self.account_name, 'initial_balance_lighter', 0)
-            update_account_status(self.account_name, 'current_balance_lighter', 0)
+            initial_balance = 0
+        update_account_status_many(self.account_name, {
+            'initial_balance_lighter': initial_balance,
+            'current_balance_lighter': initial_balance,
+        })
+    
+    async def _run_order_ws(self):
+        """订阅Paradex订单推送，订单完全成交时置位对应client_id的事件；断线后自动重连"""
+        channel = f"orders.{self.market}"
+        while not (self.shutting_down or shutdown_event.is_set()):
+            with account_proxy_lock:
+                proxy_url = account_proxy_config.get(self.account_name)
+            try:
+                async with self.http_session.ws_connect(PARADEX_WS_URL, proxy=proxy_url, heartbeat=30) as ws:
+                    await ws.send_json({"id": 0, "jsonrpc": "2.0", "method": "auth", "params": {"bearer": self.jwt_token}})
+                    await ws.send_json({"id": 1, "jsonrpc": "2.0", "method": "subscribe", "params": {"channel": channel}})
+                    self.order_ws = ws
+                    self.logger.info(f"已订阅WebSocket订单推送: {channel}")
+                    async for msg in ws:
+                        if msg.type != aiohttp.WSMsgType.TEXT:
+                            continue
+                        message = msg.json()
+                        if message.get("method") != "subscription":
+                            continue
+                        order = message.get("params", {}).get("data", {})
+                        if order.get("status") == "CLOSED" and float(order.get("remaining_size") or 0) == 0:
+                            event = self._pending_fills.get(order.get("client_id"))
+                            if event is not None:
+                                self.logger.info(f"收到成交推送: {order.get('client_id')}")
+                                event.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"WebSocket订单推送中断，回退到REST轮询: {e}")
+            finally:
+                self.order_ws = None
+            await asyncio.sleep(ORDER_WS_RECONNECT_DELAY)
+    
+    async def _warm_http_session(self):
+        """预热Paradex长连接，结果丢弃"""
+        try:
+            await self._get_bbo_with_proxy(PARADEX_HTTP_URL, self.market)
+        except Exception as e:
+            self.logger.warning(f"预热Paradex连接失败: {e}")
     
     async def _get_bbo_with_proxy(self, paradex_http_url: str, market: str):
         """带代理的get_bbo包装函数"""
-        import aiohttp
         path = f"/bbo/{market}"
         url = paradex_http_url + path
         headers = {"Accept": "application/json"}
@@ -807,33 +1150,31 @@ class AccountTrader:
         with account_proxy_lock:
             proxy_url = account_proxy_config.get(self.account_name)
         
-        async with aiohttp.ClientSession() as session:
-            kwargs = {"headers": headers}
-            if proxy_url:
-                kwargs["proxy"] = proxy_url
-            async with session.get(url, **kwargs) as response:
-                status_code = response.status
-                data = await response.json()
-                if status_code != 200:
-                    self.logger.error(f"Unable to [GET] {path}")
-                    self.logger.error(f"Status Code: {status_code}")
-                    self.logger.error(f"Response Text: {data}")
-                return data
+        kwargs = {"headers": headers}
+        if proxy_url:
+            kwargs["proxy"] = proxy_url
+        async with self.http_session.get(url, **kwargs) as response:
+            status_code = response.status
+            data = await response.json()
+            if status_code != 200:
+                self.logger.error(f"Unable to [GET] {path}")
+                self.logger.error(f"Status Code: {status_code}")
+                self.logger.error(f"Response Text: {data}")
+            return data
     
     async def get_current_price(self, order_side=None):
         """获取当前价格"""
         try:
             self.logger.info(f"获取{self.market}价格...")
             
-            # 设置超时
-            try:
-                # 使用带代理的get_bbo
-                bbo = await asyncio.wait_for(
-                    self._get_bbo_with_proxy(PARADEX_HTTP_URL, self.market),
-                    timeout=3.0
-                )
-            except asyncio.TimeoutError:
-                self.logger.error("BBO API请求超时")
+            # 同一市场、同一代理的交易器共享报价和正在进行的请求
+            key = (self.market, self.proxy_url)
+            feed = bbo_feeds.get(key)
+            if feed is None:
+                feed = bbo_feeds[key] = BBOFeed(self.market)
+            bbo = await feed.get(lambda: self._get_bbo_with_proxy(PARADEX_HTTP_URL, self.market))
+            if bbo is None:
+                self.logger.error("BBO API请求失败或超时")
                 return None
             
             # 根据订单类型选择合适的价格
@@ -848,9 +1189,10 @@ class AccountTrader:
                 price_type = "bid"
             
             if price is not None:
-                price_float = float(price)
-                self.logger.info(f"获取{self.market}价格 ({price_type}): {price_float}")
-                return price_float
+                # 直接由接口返回的字符串构造Decimal，下单时无需再转换
+                price_decimal = Decimal(str(price))
+                self.logger.info(f"获取{self.market}价格 ({price_type}): {price_decimal}")
+                return price_decimal
             
             self.logger.error("无法获取有效价格")
             return None
@@ -859,43 +1201,62 @@ class AccountTrader:
             self.logger.error(f"获取{self.market}价格失败: {e}")
             return None
     
+    @retry_on_auth
+    async def _fetch_open_orders(self):
+        return await get_open_orders(PARADEX_HTTP_URL, self.jwt_token, session=self.http_session)
+    
+    @retry_on_auth
+    async def _fetch_positions(self):
+        return await fetch_positions(PARADEX_HTTP_URL, self.jwt_token, session=self.http_session)
+    
+    @retry_on_auth
+    async def _fetch_tokens(self):
+        return await fetch_tokens(PARADEX_HTTP_URL, self.jwt_token, session=self.http_session)
+    
+    @retry_on_auth
+    async def _post_order(self, payload):
+        """提交已签名的订单（签名与JWT无关，刷新token后可直接重发）"""
+        return await post_order_payload(PARADEX_HTTP_URL, self.jwt_token, payload, session=self.http_session)
+    
+    def _make_order_template(self, side: OrderSide, size: Decimal):
+        """返回 (限价单payload模板, 签名用的静态字段)，价格/时间戳/签名/client_id 在下单时填入"""
+        order = Order(
+            market=self.market,
+            order_type=OrderType.Limit,
+            order_side=side,
+            size=size,
+            limit_price=Decimal(0),
+        )
+        return order.dump_to_dict(), OrderSignCache.static_fields(order)
+    
     async def create_limit_order(self, side: OrderSide, size: Decimal, price: Decimal, client_id: str):
         """创建限价单"""
+        # 提交前登记成交事件，避免成交推送早于开始等待
+        self._pending_fills[client_id] = asyncio.Event()
         try:
-            order = Order(
-                market=self.market,
-                order_type=OrderType.Limit,
-                order_side=side,
-                size=size,
-                limit_price=price,
-                client_id=client_id,
-                signature_timestamp=int(time.time() * 1000),
+            if size == self.order_size:
+                template, static_fields = self._order_templates[side]
+            else:
+                template, static_fields = self._make_order_template(side, size)
+            
+            # 只填入每次变化的字段，并用预先编码的静态字段签名
+            signature_timestamp = time.time_ns() // 1_000_000
+            payload = dict(template)
+            payload["price"] = str(price)
+            payload["client_id"] = client_id
+            payload["signature_timestamp"] = signature_timestamp
+            payload["signature"] = sign_order_incremental(
+                self.config, signature_timestamp, static_fields, int(price.scaleb(8))
             )
             
-            # 签名订单
-            sig = sign_order(self.config, order)
-            order.signature = sig
-            
             # 提交订单
             self.logger.info(f"提交{side.name}限价单: {size} BTC @ {price}")
-            response = await post_order_payload(PARADEX_HTTP_URL, self.jwt_token, order.dump_to_dict())
+            response = await self._post_order(payload)
             
             if response.get("status_code") == 201:
                 self.logger.info(f"{side.name}限价单提交成功")
                 return True
             else:
-                # 检查是否是token过期
-                error_msg = str(response)
-                if 'token is expired' in error_msg or 'invalid bearer jwt' in error_msg.lower():
-                    self.logger.warning("Token已过期，正在刷新...")
-                    if await self.refresh_jwt_token():
-                        # 刷新后重新签名并重试
-                        sig = sign_order(self.config, order)
-                        order.signature = sig
-                        response = await post_order_payload(PARADEX_HTTP_URL, self.jwt_token, order.dump_to_dict())
-                        if response.get("status_code") == 201:
-                            self.logger.info(f"{side.name}限价单提交成功（重试）")
-                            return True
                 self.logger.error(f"{side.name}限价单提交失败: {response}")
                 return False
                 
@@ -903,92 +1264,130 @@ class AccountTrader:
             self.logger.error(f"创建{side.name}限价单失败: {e}")
             return False
     
+    def _set_jwt_token(self, token):
+        """保存新的JWT，并解析一次到期时间供刷新循环使用"""
+        self.jwt_token = token
+        self._jwt_exp = jwt_expiry(token)
+    
     async def refresh_jwt_token(self):
-        """刷新JWT token"""
+        """刷新JWT token；并发调用（如同时收到多个TokenExpired）共享同一次刷新请求"""
+        if self._jwt_refresh is None or self._jwt_refresh.done():
+            self._jwt_refresh = asyncio.ensure_future(self._refresh_jwt_token_once())
+        # shield：某个等待者被取消时不影响其他等待者共享的刷新
+        return await asyncio.shield(self._jwt_refresh)
+    
+    async def _refresh_jwt_token_once(self):
         try:
             self.logger.info("刷新JWT token...")
-            self.jwt_token = await get_jwt_token(
+            self._set_jwt_token(await get_jwt_token(
                 self.config.paradex_config,
                 self.config.paradex_http_url,
                 self.config.paradex_account,
                 self.config.paradex_account_private_key,
-            )
+                session=self.http_session,
+            ))
             self.logger.info("JWT token刷新成功")
             return True
         except Exception as e:
             self.logger.error(f"刷新JWT token失败: {e}")
             return False
     
-    async def wait_for_order_fill(self, max_wait_time=10):
-        """等待订单成交"""
+    def _invalidate_bbo(self):
+        """订单成交后报价可能已变化，使共享报价失效"""
+        # 成交影响的是整个市场，各代理下的报价都失效
+        for (market, _), feed in list(bbo_feeds.items()):
+            if market == self.market:
+                feed.invalidate()
+    
+    async def _wait_for_fill_event(self, client_id, max_wait_time):
+        """等待订单成交推送，超时后用一次REST查询兜底"""
+        event = self._pending_fills.setdefault(client_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout=max_wait_time)
+            self.logger.info("收到成交推送，订单已成交！")
+            self._invalidate_bbo()
+            return True
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._pending_fills.pop(client_id, None)
+        
+        # 避免漏掉推送：没有挂单则认为已成交
+        try:
+            open_orders = await self._fetch_open_orders()
+            if not open_orders:
+                self.logger.info("订单已成交！")
+                self._invalidate_bbo()
+                return True
+        except Exception as e:
+            self.logger.error(f"检查订单状态失败: {e}")
+        
+        self.logger.warning(f"订单在{max_wait_time}秒内未成交")
+        return False
+    
+    async def wait_for_order_fill(self, max_wait_time=10, client_id=None):
+        """等待订单成交：已订阅订单推送时等待推送，否则轮询REST接口"""
         self.logger.info(f"等待订单成交，最多等待{max_wait_time}秒...")
-        start_time = time.time()
+        if client_id is not None and self.order_ws is not None:
+            return await self._wait_for_fill_event(client_id, max_wait_time)
+        if client_id is not None:
+            self._pending_fills.pop(client_id, None)
         
-        while time.time() - start_time < max_wait_time:
+        deadline = time.monotonic() + max_wait_time
+        delay = FILL_POLL_MIN_INTERVAL
+        
+        while time.monotonic() < deadline:
             try:
-                open_orders = await get_open_orders(PARADEX_HTTP_URL, self.jwt_token)
+                open_orders = await self._fetch_open_orders()
                 
                 if not open_orders:
                     self.logger.info("订单已成交！")
-                    return True
-                
-                await asyncio.sleep(0.1)
+                    self._invalidate_bbo()
+                    return True
             except Exception as e:
-                error_str = str(e)
-                # 检查是否是token过期错误
-                if 'token is expired' in error_str or 'invalid bearer jwt' in error_str.lower():
-                    self.logger.warning("Token已过期，正在刷新...")
-                    if await self.refresh_jwt_token():
-                        self.logger.info("Token刷新成功，继续检查订单")
-                    else:
-                        self.logger.error("Token刷新失败")
-                        await asyncio.sleep(1)
-                else:
-                    self.logger.error(f"检查订单状态失败: {e}")
-                    await asyncio.sleep(0.1)
+                self.logger.error(f"检查订单状态失败: {e}")
+            
+            # 未成交时逐步拉长轮询间隔，不睡过截止时间
+            await asyncio.sleep(max(0, min(delay, deadline - time.monotonic())))
+            delay = min(delay * 1.5, FILL_POLL_MAX_INTERVAL)
         
         self.logger.warning(f"订单在{max_wait_time}秒内未成交")
         return False
     
+    @retry_on_auth
+    async def _cancel_open_orders(self):
+        """一次请求取消所有挂单；失败时回退为查询后逐个并发取消，用信号量限制同时在途的请求数"""
+        if await delete_all_orders_payload(PARADEX_HTTP_URL, self.jwt_token, session=self.http_session):
+            self.logger.info("已取消所有挂单")
+            return
+        
+        open_orders = await get_open_orders(PARADEX_HTTP_URL, self.jwt_token, session=self.http_session)
+        if not open_orders:
+            self.logger.info("没有发现挂单")
+            return
+        
+        self.logger.info(f"发现 {len(open_orders)} 个挂单，正在取消...")
+        order_ids = [o.get("order_id") or o.get("id") for o in open_orders]
+        order_ids = [order_id for order_id in order_ids if order_id]
+        semaphore = asyncio.Semaphore(CANCEL_CONCURRENCY)
+        
+        async def cancel(order_id):
+            async with semaphore:
+                return await delete_order_payload(PARADEX_HTTP_URL, self.jwt_token, order_id, session=self.http_session)
+        
+        results = await asyncio.gather(*(cancel(order_id) for order_id in order_ids), return_exceptions=True)
+        for order_id, result in zip(order_ids, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"取消订单 {order_id} 失败: {result}")
+            else:
+                self.logger.info(f"已取消订单: {order_id}")
+    
     async def cancel_all_orders(self):
         """取消所有挂单"""
         try:
-            open_orders = await get_open_orders(PARADEX_HTTP_URL, self.jwt_token)
-            if open_orders:
-                self.logger.info(f"发现 {len(open_orders)} 个挂单，正在取消...")
-                for order in open_orders:
-                    order_id = order.get("order_id") or order.get("id")
-                    if order_id:
-                        await delete_order_payload(PARADEX_HTTP_URL, self.jwt_token, order_id)
-                        self.logger.info(f"已取消订单: {order_id}")
-                        await asyncio.sleep(0.1)
-            else:
-                self.logger.info("没有发现挂单")
+            await self._cancel_open_orders()
         except Exception as e:
-            error_str = str(e)
-            # 检查是否是token过期错误
-            if 'token is expired' in error_str or 'invalid bearer jwt' in error_str.lower():
-                self.logger.warning("Token已过期，正在刷新...")
-                if await self.refresh_jwt_token():
-                    # 刷新后重试
-                    try:
-                        open_orders = await get_open_orders(PARADEX_HTTP_URL, self.jwt_token)
-                        if open_orders:
-                            self.logger.info(f"发现 {len(open_orders)} 个挂单，正在取消...")
-                            for order in open_orders:
-                                order_id = order.get("order_id") or order.get("id")
-                                if order_id:
-                                    await delete_order_payload(PARADEX_HTTP_URL, self.jwt_token, order_id)
-                                    self.logger.info(f"已取消订单: {order_id}")
-                                    await asyncio.sleep(0.1)
-                        else:
-                            self.logger.info("没有发现挂单")
-                    except:
-                        pass
-                else:
-                    self.logger.error("Token刷新失败，无法取消订单")
-            else:
-                self.logger.error(f"取消挂单失败: {e}")
+            self.logger.error(f"取消挂单失败: {e}")
     
     async def execute_short_order_with_retry(self):
         """执行空单（卖单），如果10秒不成交则重新获取价格并重新挂单"""
@@ -1016,14 +1415,15 @@ class AccountTrader:
                 continue
             
             # 3. 创建空单（使用ask价格）
-            short_price = Decimal(str(current_price))
-            self.logger.info(f"当前价格: {current_price}, 空单价格: {short_price}")
+            short_price = current_price
+            self.logger.info(f"空单价格: {short_price}")
             
+            client_id = f"{self.client_id_short}-attempt-{attempt + 1}"
             short_success = await self.create_limit_order(
                 OrderSide.Sell, 
                 self.order_size, 
                 short_price,
-                f"{self.client_id_short}-attempt-{attempt + 1}"
+                client_id
             )
             
             if not short_success:
@@ -1032,7 +1432,7 @@ class AccountTrader:
                 continue
             
             # 4. 等待成交
-            fill_success = await self.wait_for_order_fill(MAX_WAIT_TIME)
+            fill_success = await self.wait_for_order_fill(MAX_WAIT_TIME, client_id)
             
             if fill_success:
                 self.logger.info(f"空单在第{attempt + 1}次尝试中成交！")
@@ -1070,14 +1470,15 @@ class AccountTrader:
                 continue
             
             # 3. 创建多单（使用bid价格）
-            long_price = Decimal(str(current_price))
-            self.logger.info(f"当前价格: {current_price}, 多单价格: {long_price}")
+            long_price = current_price
+            self.logger.info(f"多单价格: {long_price}")
             
+            client_id = f"{self.client_id_long}-attempt-{attempt + 1}"
             long_success = await self.create_limit_order(
                 OrderSide.Buy, 
                 self.order_size, 
                 long_price,
-                f"{self.client_id_long}-attempt-{attempt + 1}"
+                client_id
             )
             
             if not long_success:
@@ -1086,7 +1487,7 @@ class AccountTrader:
                 continue
             
             # 4. 等待成交
-            fill_success = await self.wait_for_order_fill(MAX_WAIT_TIME)
+            fill_success = await self.wait_for_order_fill(MAX_WAIT_TIME, client_id)
             
             if fill_success:
                 self.logger.info(f"多单在第{attempt + 1}次尝试中成交！")
@@ -1098,245 +1499,220 @@ class AccountTrader:
         self.logger.error(f"多单在{MAX_RETRIES}次尝试后仍未成交")
         return False
     
+    async def _next_lighter_nonce(self):
+        """取下一个 (api_key_index, nonce)：ApiNonceManager.next_nonce 是同步请求，放到线程池执行"""
+        return await asyncio.to_thread(self.lighter_client.nonce_manager.next_nonce)
+    
+    async def _resync_lighter_nonce(self, max_wait=LIGHTER_NONCE_SYNC_TIMEOUT):
+        """等待后端nonce连续两次查询结果相同（pending交易已处理完）后刷新本地nonce，
+        按退避间隔查询，返回是否在max_wait秒内稳定"""
+        nonce_manager = self.lighter_client.nonce_manager
+        api_key_idx = self.account_info.api_key_index
+        deadline = time.monotonic() + max_wait
+        last_nonce = None
+        synced = False
+        attempt = 0
+        while True:
+            # get_nonce_from_api 是同步请求，放到线程中执行，不阻塞其他账户
+            nonce = await asyncio.to_thread(
+                get_nonce_from_api, nonce_manager.api_client, nonce_manager.account_index, api_key_idx
+            )
+            if nonce == last_nonce:
+                synced = True
+                break
+            last_nonce = nonce
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(backoff_delay(attempt), remaining))
+            attempt += 1
+        
+        await asyncio.to_thread(nonce_manager.hard_refresh_nonce, api_key_idx)
+        if not synced:
+            self.logger.warning(f"等待{max_wait}秒后nonce仍在变化，已强制刷新")
+        return synced
+    
     async def create_lighter_market_order(self, is_long: bool):
         """在Lighter创建市价单，带重试机制处理nonce错误"""
         max_retries = 5  # 增加重试次数
         
-        for attempt in range(max_retries):
+        for attempt, delay in backoff_schedule(max_retries):
             try:
-                self.logger.info(f"========== 在Lighter创建{'多头' if is_long else '空头'}市价单 (尝试 {attempt + 1}/{max_retries}) ==========")
-                self.logger.info(f"交易对: {self.market}, 市场索引: {self.market_index}, 订单大小: {self.order_size}")
-                
-                # 转换订单大小 (数量转为基础单位)
-                # 根据市场的size_decimals动态计算base_amount
-                # base_amount = order_size * (10 ** size_decimals)
-                # 例如：如果size_decimals=4，则 0.01 ETH = 0.01 * 10000 = 100 base_amount
-                size_scale = 10 ** self.size_decimals
-                base_amount = int(self.order_size * size_scale)
-                self.logger.info(f"订单大小转换: {self.order_size} {self.market.split('-')[0]} (size_decimals={self.size_decimals}, scale={size_scale}) -> {base_amount} 最小单位")
-                
-                # 验证base_amount是否合理（至少为1）
-                if base_amount < 1:
-                    self.logger.warning(f"订单大小转换后为0或负数，使用最小值1")
-                    base_amount = 1
-                
-                # 使用时间戳和随机数生成唯一索引
-                client_order_index = (int(time.time() * 1000) * 1000 + attempt * 100 + random.randint(1, 99)) % 1000000
-                self.logger.info(f"客户端订单索引: {client_order_index}")
-                
-                # ApiNonceManager会每次从API获取最新nonce，无需手动刷新
-                if hasattr(self.lighter_client.nonce_manager, 'nonce'):
-                    current_nonce = self.lighter_client.nonce_manager.nonce
-                    self.logger.info(f"当前nonce: {current_nonce}")
-                    self.logger.info(f"账户信息: account_index={self.account_info.get('account_index')}, api_key_index={self.account_info.get('api_key_index')}")
-                else:
-                    self.logger.warning("无法获取nonce信息，nonce_manager没有nonce属性")
-                
-                # 使用限制滑点的市价单函数
-                self.logger.info(f"调用 create_market_order_limited_slippage:")
-                self.logger.info(f"  - market_index: {self.market_index}")
-                self.logger.info(f"  - client_order_index: {client_order_index}")
-                self.logger.info(f"  - base_amount: {base_amount}")
-                self.logger.info(f"  - max_slippage: 0.05 (5%)")
-                self.logger.info(f"  - is_ask: {not is_long} ({'卖出' if not is_long else '买入'})")
-                
-                tx = await self.lighter_client.create_market_order_limited_slippage(
-                    market_index=self.market_index,
-                    client_order_index=client_order_index,
-                    base_amount=base_amount,
-                    max_slippage=0.05,  # 最大滑点5%
-                    is_ask=not is_long,  # 多头时是bid (买入)，空头时是ask (卖出)
-                )
-                
-                # 详细记录返回结果
-                self.logger.info(f"Lighter API返回结果: {tx}")
-                if tx:
-                    self.logger.info(f"返回结果类型: {type(tx)}")
-                    self.logger.info(f"返回结果长度: {len(tx) if isinstance(tx, (list, tuple)) else 'N/A'}")
-                    if len(tx) >= 2:
-                        self.logger.info(f"响应代码: {tx[1].code if hasattr(tx[1], 'code') else 'N/A'}")
-                        self.logger.info(f"响应详情: {tx[1]}")
-                    if len(tx) >= 3:
-                        self.logger.info(f"错误信息: {tx[2]}")
-                
-                # 检查是否成功
-                if tx and len(tx) >= 2 and tx[1] and hasattr(tx[1], 'code') and tx[1].code == 200:
-                    self.logger.info(f"✓ Lighter市价单创建成功！")
-                    self.logger.info(f"完整返回结果: {tx}")
-                    return True
-                else:
-                    error_msg = tx[2] if tx and len(tx) > 2 else "Unknown error"
-                    error_code = tx[1].code if tx and len(tx) >= 2 and hasattr(tx[1], 'code') else "N/A"
-                    
-                    # 尝试从错误信息中提取错误代码
-                    error_code_extracted = None
-                    error_msg_clean = str(error_msg)
-                    import re
-                    code_match = re.search(r'code=(\d+)', error_msg_clean)
-                    if code_match:
-                        error_code_extracted = int(code_match.group(1))
-                        message_match = re.search(r"message='([^']+)'", error_msg_clean)
-                        if message_match:
-                            error_msg_clean = message_match.group(1)
-                    
-                    # 使用提取的错误代码（如果存在）
-                    if error_code_extracted is not None:
-                        error_code = error_code_extracted
-                    
-                    self.logger.error(f"✗ Lighter市价单创建失败！")
-                    self.logger.error(f"  错误代码: {error_code}")
-                    self.logger.error(f"  错误信息: {error_msg_clean}")
-                    if error_code_extracted != error_code:
-                        self.logger.error(f"  原始错误信息: {error_msg}")
-                    self.logger.error(f"  完整响应: {tx}")
-                    
-                    # 地区限制错误（20558）- 不应该重试
-                    if error_code == 20558 or "restricted jurisdiction" in str(error_msg).lower():
-                        self.logger.error(f"")
-                        self.logger.error(f"  ⚠️  地区限制错误！")
-                        self.logger.error(f"  当前IP地址所在的地区无法访问Lighter服务。")
-                        self.logger.error(f"  解决方案：")
-                        self.logger.error(f"  1. 使用VPN或代理服务器连接到允许的地区")
-                        self.logger.error(f"  2. 联系Lighter支持了解详情: https://lighter.xyz/terms")
-                        self.logger.error(f"  3. 检查网络连接和代理设置")
-                        self.logger.error(f"")
-                        # 地区限制错误不应该重试，直接返回False
-                        return False
-                    
-                    # Nonce错误 - 可以重试
-                    if "invalid nonce" in str(error_msg).lower() or error_code == "N/A" and "nonce" in str(error_msg).lower():
-                        self.logger.error(f"  ⚠️  Nonce错误！后端期望的nonce与本地不匹配")
-                        self.logger.error(f"  - API Key索引: {self.account_info.get('api_key_index', 0)}")
-                        self.logger.error(f"  - 账户索引: {self.account_info.get('account_index', 0)}")
-                        
-                        # 等待更长的时间让pending交易完成，并强制刷新nonce
-                        if attempt < max_retries - 1:
-                            self.logger.warning(f"  等待pending交易完成（10秒）后重试...")
-                            api_key_idx = int(self.account_info.get('api_key_index', 0))
-                            self.lighter_client.nonce_manager.hard_refresh_nonce(api_key_idx)
-                            await asyncio.sleep(10)  # 等待10秒
-                            continue
-                        else:
-                            self.logger.error(f"  已达到最大重试次数，停止重试")
-                            return False
-                    
-                    # 其他错误 - 根据错误类型决定是否重试
-                    if attempt < max_retries - 1:
-                        # 某些临时错误可以重试
-                        retryable_errors = [500, 502, 503, 504, 429]  # 服务器错误和限流错误
-                        if error_code in retryable_errors or "temporary" in str(error_msg).lower():
-                            self.logger.warning(f"  临时错误，等待后重试...")
-                            await asyncio.sleep(2)
-                            continue
-                    
-                    # 不可重试的错误或已达到最大重试次数
-                    if attempt == max_retries - 1:
-                        self.logger.error(f"  已达到最大重试次数，停止重试")
-                    return False
-                
-            except Exception as e:
-                error_str = str(e)
-                self.logger.error(f"✗ 创建Lighter市价单异常 (尝试 {attempt + 1}/{max_retries}): {error_str}")
-                self.logger.error(f"  异常类型: {type(e).__name__}")
-                import traceback
-                self.logger.error(f"  完整堆栈:")
-                self.logger.error(traceback.format_exc())
-                
-                # 检查是否是地区限制错误
-                if "20558" in error_str or "restricted jurisdiction" in error_str.lower():
-                    self.logger.error(f"")
-                    self.logger.error(f"  ⚠️  地区限制错误！")
-                    self.logger.error(f"  当前IP地址所在的地区无法访问Lighter服务。")
-                    self.logger.error(f"  解决方案：")
-                    self.logger.error(f"  1. 使用VPN或代理服务器连接到允许的地区")
-                    self.logger.error(f"  2. 联系Lighter支持了解详情: https://lighter.xyz/terms")
-                    self.logger.error(f"  3. 检查网络连接和代理设置")
-                    self.logger.error(f"")
-                    # 地区限制错误不应该重试，直接返回False
-                    return False
-                
-                # Nonce错误 - 可以重试
-                if "invalid nonce" in error_str.lower() or "nonce" in error_str.lower():
-                    if attempt < max_retries - 1:
-                        self.logger.warning(f"  ⚠️  Nonce相关错误，等待pending交易完成...")
-                        
-                        # 等待pending交易完成
-                        await asyncio.sleep(3)
-                        continue
-                
-                # 其他错误
-                if attempt == max_retries - 1:
-                    self.logger.error(f"  最后一次尝试失败，停止重试")
-                
+                await self._submit_lighter_market_order(is_long, attempt, max_retries)
+                return True
+            except RestrictedJurisdictionError:
+                self.logger.error(f"")
+                self.logger.error(f"  ⚠️  地区限制错误！")
+                self.logger.error(f"  当前IP地址所在的地区无法访问Lighter服务。")
+                self.logger.error(f"  解决方案：")
+                self.logger.error(f"  1. 使用VPN或代理服务器连接到允许的地区")
+                self.logger.error(f"  2. 联系Lighter支持了解详情: https://lighter.xyz/terms")
+                self.logger.error(f"  3. 检查网络连接和代理设置")
+                self.logger.error(f"")
+                # 地区限制错误不应该重试，直接返回False
+                return False
+            except NonceError:
+                self.logger.error(f"  ⚠️  Nonce错误！后端期望的nonce与本地不匹配")
+                self.logger.error(f"  - API Key索引: {self.account_info.api_key_index}")
+                self.logger.error(f"  - 账户索引: {self.account_info.account_index}")
+                # 等待pending交易完成（后端nonce稳定）后强制刷新nonce
+                if attempt < max_retries - 1:
+                    self.logger.warning(f"  等待pending交易完成（最多{LIGHTER_NONCE_SYNC_TIMEOUT}秒）后重试...")
+                    await self._resync_lighter_nonce()
+                    continue
+                self.logger.error(f"  已达到最大重试次数，停止重试")
+                return False
+            except TransientLighterError:
+                # 服务器错误和限流错误可以退避后重试
+                if attempt < max_retries - 1:
+                    self.logger.warning(f"  临时错误，等待{delay:.2f}秒后重试...")
+                    await asyncio.sleep(delay)
+                    continue
+                self.logger.error(f"  已达到最大重试次数，停止重试")
+                return False
+            except LighterOrderError:
+                # 不可重试的错误
                 return False
         
         self.logger.error(f"✗ Lighter市价单创建在{max_retries}次尝试后全部失败")
         return False
     
-    async def get_lighter_positions(self):
-        """获取Lighter当前持仓"""
+    async def _submit_lighter_market_order(self, is_long, attempt, max_retries):
+        """提交一次Lighter市价单；失败时抛出按错误类型区分的LighterOrderError"""
+        self.logger.info(f"========== 在Lighter创建{'多头' if is_long else '空头'}市价单 (尝试 {attempt + 1}/{max_retries}) ==========")
+        self.logger.info(f"交易对: {self.market}, 市场索引: {self.market_index}, 订单大小: {self.order_size}")
+        
+        # 订单大小已在初始化时换算为最小单位
+        base_amount = self.lighter_base_amount
+        
+        # 全局递增计数器生成唯一索引
+        client_order_index = next(client_order_indexes)
+        self.logger.info(f"客户端订单索引: {client_order_index}")
+        
         try:
-            self.logger.info("获取Lighter当前持仓...")
-            
-            # 检查lighter_client是否已初始化
-            if self.lighter_client is None:
-                self.logger.warning("Lighter客户端未初始化，无法获取持仓")
-                return []
-            
-            # 创建AccountApi实例
-            from lighter.api.account_api import AccountApi
-            account_api = AccountApi(self.lighter_client.api_client)
-            
-            # 使用 "index" 而不是 "account_index"
-            account_info = await account_api.account(
-                by="index",
-                value=str(self.account_info['account_index'])
+            # ApiNonceManager每次都从API同步获取最新nonce，放到线程池执行，不阻塞其他账户
+            api_key_index, nonce = await self._next_lighter_nonce()
+        except Exception as e:
+            self.logger.error(f"✗ 获取Lighter nonce失败 (尝试 {attempt + 1}/{max_retries}): {e}")
+            raise classify_lighter_error(None, e) from e
+        self.logger.info(f"当前nonce: {nonce}")
+        self.logger.info(f"账户信息: account_index={self.account_info.account_index}, api_key_index={api_key_index}")
+        
+        # 使用限制滑点的市价单函数
+        self.logger.info(f"调用 create_market_order_limited_slippage:")
+        self.logger.info(f"  - market_index: {self.market_index}")
+        self.logger.info(f"  - client_order_index: {client_order_index}")
+        self.logger.info(f"  - base_amount: {base_amount}")
+        self.logger.info(f"  - max_slippage: 0.05 (5%)")
+        self.logger.info(f"  - is_ask: {not is_long} ({'卖出' if not is_long else '买入'})")
+        
+        try:
+            tx = await self.lighter_client.create_market_order_limited_slippage(
+                market_index=self.market_index,
+                client_order_index=client_order_index,
+                base_amount=base_amount,
+                max_slippage=0.05,  # 最大滑点5%
+                is_ask=not is_long,  # 多头时是bid (买入)，空头时是ask (卖出)
+                nonce=nonce,
+                api_key_index=api_key_index,
             )
-            
-            self.logger.info(f"账户信息: {account_info}")
-            
-            # 从Paradex market名称提取基础资产（如BTC-USD-PERP -> BTC）
-            base_asset = self.market.split('-')[0].upper()
-            
-            # 从日志可以看到账户信息在 accounts 数组中
-            if hasattr(account_info, 'accounts') and account_info.accounts:
-                account = account_info.accounts[0]  # 取第一个账户
-                if hasattr(account, 'positions') and account.positions:
-                    self.logger.info(f"总持仓数: {len(account.positions)}")
-                    market_positions = []
-                    for i, pos in enumerate(account.positions):
-                        market_id = getattr(pos, 'market_id', None)
-                        symbol = getattr(pos, 'symbol', '').upper()
-                        position = getattr(pos, 'position', 'N/A')
-                        sign = getattr(pos, 'sign', 'N/A')
-                        
-                        self.logger.info(f"持仓 {i}: market_id={market_id}, symbol={symbol}, position={position}, sign={sign}")
-                        
-                        # 精确匹配：只匹配symbol完全相等的持仓（避免ETH匹配到ETHFI）
-                        if hasattr(pos, 'market_id') and hasattr(pos, 'symbol'):
-                            if symbol == base_asset and pos.market_id == self.market_index:
-                                market_positions.append(pos)
-                                self.logger.info(f"✓ 找到精确匹配的{self.market}持仓: market_id={pos.market_id}, symbol={symbol}, position={pos.position}, sign={pos.sign}")
-                            elif symbol == base_asset:
-                                # symbol匹配但market_id不匹配，记录警告
-                                self.logger.warning(f"⚠️  symbol={symbol} 匹配，但market_id={pos.market_id}与配置的market_index={self.market_index}不一致")
-                            elif pos.market_id == self.market_index:
-                                # market_id匹配但symbol不匹配，记录警告
-                                self.logger.warning(f"⚠️  market_id={pos.market_id} 匹配，但symbol={symbol}与预期的{base_asset}不一致")
-                    
-                    self.logger.info(f"找到 {len(market_positions)} 个{self.market}持仓（精确匹配）")
-                    return market_positions
-                else:
-                    self.logger.info("账户没有持仓数据")
-                    return []
-            else:
-                self.logger.info("账户信息中没有accounts字段")
-                return []
         except Exception as e:
-            self.logger.error(f"获取持仓失败: {e}")
-            import traceback
-            traceback.print_exc()
+            self.logger.error(f"✗ 创建Lighter市价单异常 (尝试 {attempt + 1}/{max_retries}): {e}")
+            self.logger.error(f"  异常类型: {type(e).__name__}", exc_info=self.logger.isEnabledFor(logging.DEBUG))
+            raise classify_lighter_error(None, e) from e
+        
+        # 详细记录返回结果
+        self.logger.info(f"Lighter API返回结果: {tx}")
+        if tx:
+            self.logger.info(f"返回结果类型: {type(tx)}")
+            self.logger.info(f"返回结果长度: {len(tx) if isinstance(tx, (list, tuple)) else 'N/A'}")
+            if len(tx) >= 2:
+                self.logger.info(f"响应代码: {tx[1].code if hasattr(tx[1], 'code') else 'N/A'}")
+                self.logger.info(f"响应详情: {tx[1]}")
+            if len(tx) >= 3:
+                self.logger.info(f"错误信息: {tx[2]}")
+        
+        # 检查是否成功
+        if tx and len(tx) >= 2 and tx[1] and hasattr(tx[1], 'code') and tx[1].code == 200:
+            self.logger.info(f"✓ Lighter市价单创建成功！")
+            self.logger.info(f"完整返回结果: {tx}")
+            return
+        
+        error_msg = tx[2] if tx and len(tx) > 2 else "Unknown error"
+        error_code = tx[1].code if tx and len(tx) >= 2 and hasattr(tx[1], 'code') else None
+        error = classify_lighter_error(error_code, error_msg)
+        self.logger.error(f"✗ Lighter市价单创建失败！")
+        self.logger.error(f"  错误代码: {error.code if error.code is not None else 'N/A'}")
+        self.logger.error(f"  错误信息: {error}")
+        if str(error) != str(error_msg):
+            self.logger.error(f"  原始错误信息: {error_msg}")
+        self.logger.error(f"  完整响应: {tx}")
+        raise error
+    
+    async def get_lighter_account_snapshot(self):
+        """一次account()请求同时取得Lighter余额和当前市场持仓
+        返回: (total_asset_value: float, positions: list)，失败时返回 (0.0, [])
+        """
+        # 检查lighter_client是否已初始化
+        if self.lighter_client is None:
+            self.logger.warning("Lighter客户端未初始化，无法获取账户信息")
+            return 0.0, []
+        try:
+            return await self._fetch_lighter_account_snapshot()
+        except Exception as e:
+            self.logger.error(f"获取Lighter账户快照失败: {e}", exc_info=self.logger.isEnabledFor(logging.DEBUG))
+            return 0.0, []
+    
+    async def _fetch_lighter_account_snapshot(self):
+        """同get_lighter_account_snapshot，但查询失败时抛出异常，调用方可以区分“无持仓”和“查询失败”"""
+        self.logger.info("获取Lighter账户快照...")
+        
+        # 使用 "index" 而不是 "account_index"
+        account_info = await self._account_api.account(
+            by="index",
+            value=self._account_index_str
+        )
+        
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"账户信息: {account_info}")
+        
+        # 从日志可以看到账户信息在 accounts 数组中
+        if hasattr(account_info, 'accounts') and account_info.accounts:
+            account = account_info.accounts[0]  # 取第一个账户
+            return float(account.total_asset_value), self._lighter_market_positions(account)
+        
+        self.logger.info("账户信息中没有accounts字段")
+        return 0.0, []
+    
+    def _lighter_market_positions(self, account):
+        """从Lighter账户对象中筛选出当前市场的持仓（按market_id匹配，至多一个）"""
+        positions = getattr(account, 'positions', None)
+        if not positions:
+            self.logger.info("账户没有持仓数据")
+            return []
+        
+        market_pos = next((pos for pos in positions if getattr(pos, 'market_id', None) == self.market_index), None)
+        if market_pos is None:
+            self.logger.info(f"总持仓数: {len(positions)}，没有{self.market}持仓")
+            return []
+        
+        # 精确匹配：symbol也必须完全相等（避免ETH匹配到ETHFI）
+        base_asset = self.base_asset
+        symbol = getattr(market_pos, 'symbol', '').upper()
+        if symbol != base_asset:
+            self.logger.warning(f"⚠️  market_id={market_pos.market_id} 匹配，但symbol={symbol}与预期的{base_asset}不一致")
             return []
+        
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"✓ 找到精确匹配的{self.market}持仓: market_id={market_pos.market_id}, symbol={symbol}, position={market_pos.position}, sign={market_pos.sign}")
+        return [market_pos]
+    
+    async def get_lighter_positions(self):
+        """获取Lighter当前持仓，查询失败时抛出异常（不当作无持仓）"""
+        if self.lighter_client is None:
+            raise RuntimeError("Lighter客户端未初始化")
+        _, positions = await self._fetch_lighter_account_snapshot()
+        return positions
     
     async def close_lighter_position(self, position):
         """关闭单个Lighter持仓"""
@@ -1344,21 +1720,22 @@ class AccountTrader:
             if not hasattr(position, 'position') or not hasattr(position, 'sign'):
                 return False
             
-            # position字段是BTC单位的字符串（如'0.00100'），需要转换为最小单位
-            position_amount = abs(float(str(position.position)))  # 转换为数量
-            position_size = int(position_amount * 100000)  # 转换为最小单位
-            # 如果有正仓位但换算后为0，兜底为1个最小单位
+            # position字段是基础资产单位的字符串（如'0.00100'），按市场的size_decimals精确换算为最小单位
+            position_amount = abs(Decimal(str(position.position)))  # 转换为数量
+            position_size = self._to_lighter_units(position_amount)  # 转换为最小单位
+            # 仓位小于1个最小单位时兜底为1
             if position_amount > 0 and position_size == 0:
                 position_size = 1
             is_long = position.sign == 1  # sign: 1 for Long, -1 for Short
             close_is_ask = is_long  # 如果是多头，需要卖出（ask）；如果是空头，需要买入（bid）
             
-            market_symbol = self.market.split('-')[0]
+            market_symbol = self.base_asset
             self.logger.info(f"平仓: {'多头' if is_long else '空头'}, 数量: {position_amount} {market_symbol} ({position_size} 最小单位)")
             
             # 使用市价单平仓（reduce_only=True 防止误加仓）
             base_amount = position_size
-            client_order_index = (int(time.time() * 1000) * 1000 + random.randint(1, 99)) % 1000000
+            client_order_index = next(client_order_indexes)
+            api_key_index, nonce = await self._next_lighter_nonce()
             
             tx = await self.lighter_client.create_market_order_limited_slippage(
                 market_index=self.market_index,
@@ -1367,6 +1744,8 @@ class AccountTrader:
                 max_slippage=0.05,
                 is_ask=close_is_ask,
                 reduce_only=True,
+                nonce=nonce,
+                api_key_index=api_key_index,
             )
             
             if tx and tx[1] and tx[1].code == 200:
@@ -1386,9 +1765,12 @@ class AccountTrader:
             if not self.lighter_client:
                 return
             self.logger.info("正在取消Lighter所有订单...")
+            api_key_index, nonce = await self._next_lighter_nonce()
             result = await self.lighter_client.cancel_all_orders(
                 time_in_force=self.lighter_client.CANCEL_ALL_TIF_IMMEDIATE,
-                time=0
+                time=0,
+                nonce=nonce,
+                api_key_index=api_key_index,
             )
             if result and len(result) >= 2 and result[1] and result[1].code == 200:
                 self.logger.info("Lighter所有订单已取消")
@@ -1398,26 +1780,18 @@ class AccountTrader:
             self.logger.error(f"取消Lighter订单失败: {e}")
     
     async def get_paradex_positions(self):
-        """获取Paradex当前持仓"""
-        try:
-            self.logger.info("获取Paradex当前持仓...")
-            positions = await fetch_positions(PARADEX_HTTP_URL, self.jwt_token)
-            
-            # 过滤当前市场持仓
-            market_positions = []
-            for pos in positions:
-                if pos.get('market') == self.market:
-                    market_positions.append(pos)
-            
-            if market_positions:
-                self.logger.info(f"找到 {len(market_positions)} 个{self.market}持仓")
-            else:
-                self.logger.info(f"没有{self.market}持仓")
-            return market_positions
-            
-        except Exception as e:
-            self.logger.error(f"获取Paradex持仓失败: {e}")
-            return []
+        """获取Paradex当前持仓，查询失败时抛出异常（不当作无持仓）"""
+        self.logger.info("获取Paradex当前持仓...")
+        positions = await self._fetch_positions()
+        
+        # 过滤当前市场持仓
+        market_positions = [pos for pos in positions if pos.get('market') == self.market]
+        
+        if market_positions:
+            self.logger.info(f"找到 {len(market_positions)} 个{self.market}持仓")
+        else:
+            self.logger.info(f"没有{self.market}持仓")
+        return market_positions
     
     async def close_paradex_position(self, position):
         """关闭单个Paradex持仓"""
@@ -1445,14 +1819,15 @@ class AccountTrader:
                 self.logger.warning("无法确定持仓方向")
                 return False
             
-            # 创建市价单平仓
+            # 创建市价单平仓：时间戳只取一次；并发平仓可能落在同一毫秒，client_id加递增序号保证唯一
+            now_ms = time.time_ns() // 1_000_000
             order = Order(
                 market=self.market,
                 order_type=OrderType.Market,
                 order_side=order_side,
                 size=Decimal(str(abs(size))),
-                client_id=f"close-position-{int(time.time() * 1000)}",
-                signature_timestamp=int(time.time() * 1000),
+                client_id=f"close-position-{now_ms}-{next(self._order_seq)}",
+                signature_timestamp=now_ms,
             )
             
             # 签名订单
@@ -1461,7 +1836,7 @@ class AccountTrader:
             
             # 提交订单
             self.logger.info(f"提交{order_side.name}市价平仓单: {abs(size)} BTC")
-            response = await post_order_payload(PARADEX_HTTP_URL, self.jwt_token, order.dump_to_dict())
+            response = await self._post_order(order.dump_to_dict())
             
             self.logger.info(f"平仓响应: {response}")
             
@@ -1473,11 +1848,26 @@ class AccountTrader:
                 return False
                 
         except Exception as e:
-            self.logger.error(f"关闭Paradex持仓失败: {e}")
-            import traceback
-            traceback.print_exc()
+            self.logger.error(f"关闭Paradex持仓失败: {e}", exc_info=self.logger.isEnabledFor(logging.DEBUG))
             return False
     
+    async def cancel_and_close_all(self):
+        """两边同时取消挂单，完成后两边同时关闭持仓；单个步骤失败只记录日志"""
+        results = await asyncio.gather(
+            self.cancel_all_orders(),
+            self.cancel_lighter_orders(),
+            return_exceptions=True,
+        )
+        results += await asyncio.gather(
+            self.close_all_paradex_positions(),
+            self.close_all_lighter_positions(),
+            return_exceptions=True,
+        )
+        labels = ("取消Paradex挂单", "取消Lighter挂单", "关闭Paradex持仓", "关闭Lighter持仓")
+        for label, result in zip(labels, results):
+            if isinstance(result, Exception):
+                self.logger.warning(f"{label}失败: {result}")
+    
     async def close_all_paradex_positions(self):
         """关闭所有Paradex持仓"""
         try:
@@ -1487,27 +1877,26 @@ class AccountTrader:
                 self.logger.info("没有Paradex持仓需要关闭")
                 return True
             
-            self.logger.info(f"开始关闭 {len(positions)} 个Paradex持仓...")
+            self.logger.info(f"开始并发关闭 {len(positions)} 个Paradex持仓...")
             
-            for i, position in enumerate(positions, 1):
-                self.logger.info(f"关闭第 {i}/{len(positions)} 个Paradex持仓...")
-                success = await self.close_paradex_position(position)
+            # 用信号量限制同时在途的平仓请求，避免触发限流
+            semaphore = asyncio.Semaphore(PARADEX_CLOSE_CONCURRENCY)
+            
+            async def close_one(i, position):
+                async with semaphore:
+                    success = await self.close_paradex_position(position)
                 if success:
                     self.logger.info(f"第 {i} 个Paradex持仓关闭成功")
                 else:
                     self.logger.warning(f"第 {i} 个Paradex持仓关闭失败")
-                
-                # 持仓之间间隔
-                if i < len(positions):
-                    await asyncio.sleep(1)
+            
+            await asyncio.gather(*(close_one(i, position) for i, position in enumerate(positions, 1)))
             
             self.logger.info("所有Paradex持仓处理完成")
             return True
             
         except Exception as e:
-            self.logger.error(f"关闭Paradex持仓失败: {e}")
-            import traceback
-            traceback.print_exc()
+            self.logger.error(f"关闭Paradex持仓失败: {e}", exc_info=self.logger.isEnabledFor(logging.DEBUG))
             return False
     
     async def close_all_lighter_positions(self):
@@ -1529,152 +1918,162 @@ class AccountTrader:
                 else:
                     self.logger.warning(f"第 {i} 个持仓关闭失败")
                 
-                # 持仓之间间隔
+                # 等待上一笔交易被接收后再提交下一笔，避免nonce冲突
                 if i < len(positions):
-                    await asyncio.sleep(1)
+                    await asyncio.sleep(LIGHTER_CLOSE_INTERVAL)
             
             self.logger.info("所有持仓处理完成")
             return True
             
         except Exception as e:
-            self.logger.error(f"关闭持仓失败: {e}")
-            import traceback
-            traceback.print_exc()
+            self.logger.error(f"关闭持仓失败: {e}", exc_info=self.logger.isEnabledFor(logging.DEBUG))
             return False
     
-    async def update_positions_status(self):
-        """更新持仓信息到UI状态（不检查对等性）"""
+    def _position_strings(self, paradex_positions, lighter_positions):
+        """把两边持仓格式化为UI显示字符串（不检查对等性）"""
+        # 提取当前市场持仓（两边的查询结果都已按市场过滤）
+        paradex_market_pos = paradex_positions[0] if paradex_positions else None
+        lighter_market_pos = lighter_positions[0] if lighter_positions else None
+        
+        # 解析持仓数量
+        paradex_size = 0.0
+        paradex_is_short = False
+        if paradex_market_pos:
+            try:
+                raw_size = paradex_market_pos.get('size', 0)
+                paradex_size = abs(float(raw_size))
+                paradex_is_short = float(raw_size) < 0
+            except Exception as e:
+                self.logger.error(f"更新状态: 解析Paradex持仓数量失败: {e}")
+                paradex_size = 0.0
+        
+        lighter_size = 0.0
+        lighter_is_long = False
+        if lighter_market_pos:
+            try:
+                position_value = getattr(lighter_market_pos, 'position', None)
+                sign_value = getattr(lighter_market_pos, 'sign', None)
+                if position_value is not None:
+                    # position字段已经是单位的字符串，直接转换为float
+                    lighter_size = abs(float(position_value))
+                    lighter_is_long = (sign_value == 1) if sign_value is not None else False
+            except Exception as e:
+                self.logger.error(f"更新状态: 解析Lighter持仓数量失败: {e}")
+                lighter_size = 0.0
+        
+        if paradex_size > 0:
+            paradex_position_str = f"{'空' if paradex_is_short else '多'}{paradex_size:.4f}"
+        else:
+            paradex_position_str = "无"
+        
+        if lighter_size > 0:
+            lighter_position_str = f"{'多' if lighter_is_long else '空'}{lighter_size:.4f}"
+        else:
+            lighter_position_str = "无"
+        
+        return paradex_position_str, lighter_position_str
+    
+    async def refresh_status_snapshot(self):
+        """并发获取两边余额和持仓，一次性写入UI状态"""
         try:
-            # 获取两边持仓
-            paradex_positions = await self.get_paradex_positions()
-            lighter_positions = await self.get_lighter_positions()
-            
-            # 提取当前市场持仓
-            paradex_market_pos = None
-            for pos in paradex_positions:
-                if pos.get('market') == self.market:
-                    paradex_market_pos = pos
-                    break
-            
-            lighter_market_pos = None
-            if lighter_positions and len(lighter_positions) > 0:
-                lighter_market_pos = lighter_positions[0]
-            
-            # 解析持仓数量
-            paradex_size = 0.0
-            paradex_is_short = False
-            if paradex_market_pos:
-                try:
-                    raw_size = paradex_market_pos.get('size', 0)
-                    paradex_size = abs(float(raw_size))
-                    paradex_is_short = float(raw_size) < 0
-                except Exception as e:
-                    self.logger.error(f"更新状态: 解析Paradex持仓数量失败: {e}")
-                    paradex_size = 0.0
-            
-            lighter_size = 0.0
-            lighter_is_long = False
-            if lighter_market_pos:
-                try:
-                    position_value = getattr(lighter_market_pos, 'position', None)
-                    sign_value = getattr(lighter_market_pos, 'sign', None)
-                    if position_value is not None:
-                        # position字段已经是单位的字符串，直接转换为float
-                        lighter_size = abs(float(str(position_value)))
-                        lighter_is_long = (sign_value == 1) if sign_value is not None else False
-                except Exception as e:
-                    self.logger.error(f"更新状态: 解析Lighter持仓数量失败: {e}")
-                    lighter_size = 0.0
-            
-            # 更新持仓信息到UI状态
-            paradex_position_str = ""
-            if paradex_size > 0:
-                paradex_position_str = f"{'空' if paradex_is_short else '多'}{paradex_size:.4f}"
-            else:
-                paradex_position_str = "无"
-            
-            lighter_position_str = ""
-            if lighter_size > 0:
-                lighter_position_str = f"{'多' if lighter_is_long else '空'}{lighter_size:.4f}"
-            else:
-                lighter_position_str = "无"
-            
-            update_account_status(self.account_name, 'paradex_position', paradex_position_str)
-            update_account_status(self.account_name, 'lighter_position', lighter_position_str)
-            
+            # Lighter余额和持仓来自同一个account()响应，只请求一次
+            paradex_balance, paradex_positions, (lighter_balance, lighter_positions) = await asyncio.gather(
+                self.get_paradex_balance(),
+                self.get_paradex_positions(),
+                self.get_lighter_account_snapshot(),
+            )
+            paradex_position_str, lighter_position_str = self._position_strings(paradex_positions, lighter_positions)
+            update_account_status_many(self.account_name, {
+                'current_balance_paradex': paradex_balance,
+                'current_balance_lighter': lighter_balance,
+                'paradex_position': paradex_position_str,
+                'lighter_position': lighter_position_str,
+            })
         except Exception as e:
-            self.logger.error(f"更新持仓状态失败: {e}")
-            update_account_status(self.account_name, 'paradex_position', '错误')
-            update_account_status(self.account_name, 'lighter_position', '错误')
+            self.logger.error(f"更新余额和持仓状态失败: {e}")
+            update_account_status_many(self.account_name, {
+                'paradex_position': '错误',
+                'lighter_position': '错误',
+            })
+    
+    async def status_snapshot_loop(self):
+        """后台定时刷新余额和持仓快照，交易流程不再单独请求"""
+        while not (self.shutting_down or shutdown_event.is_set()):
+            await self.refresh_status_snapshot()
+            await sleep_or_shutdown(STATUS_SNAPSHOT_INTERVAL)
+    
+    def _to_lighter_units(self, amount):
+        """把Decimal数量按size_decimals精确换算为Lighter最小单位（整数）"""
+        return int(amount.scaleb(self.size_decimals))
     
     async def check_positions_balanced(self):
         """检查两边持仓是否对等
         返回: (is_balanced: bool, paradex_position: dict, lighter_position: object)
+        任一边持仓查询失败时持仓状态未知，返回 (None, None, None)
         """
         try:
             self.logger.info("=== 检查持仓对等性 ===")
             
-            # 获取两边持仓
-            self.logger.info("正在获取Paradex持仓...")
-            paradex_positions = await self.get_paradex_positions()
+            # 并发获取两边持仓
+            self.logger.info("正在获取Paradex和Lighter持仓...")
+            paradex_positions, lighter_positions = await asyncio.gather(
+                self.get_paradex_positions(),
+                self.get_lighter_positions(),
+                return_exceptions=True,
+            )
+            # 查询失败不能当作无持仓，否则会在看不见的仓位上继续开新仓
+            if isinstance(paradex_positions, Exception):
+                self.logger.error(f"获取Paradex持仓失败: {paradex_positions}")
+            if isinstance(lighter_positions, Exception):
+                self.logger.error(f"获取Lighter持仓失败: {lighter_positions}")
+            if isinstance(paradex_positions, Exception) or isinstance(lighter_positions, Exception):
+                return None, None, None
             self.logger.info(f"Paradex持仓查询结果: {len(paradex_positions)} 个{self.market}持仓")
-            
-            self.logger.info("正在获取Lighter持仓...")
-            lighter_positions = await self.get_lighter_positions()
             self.logger.info(f"Lighter持仓查询结果: {len(lighter_positions)} 个{self.market}持仓")
             
-            # 提取当前市场持仓
-            paradex_market_pos = None
-            for pos in paradex_positions:
-                if pos.get('market') == self.market:
-                    paradex_market_pos = pos
-                    self.logger.info(f"找到Paradex {self.market}持仓: {pos}")
-                    break
+            # 提取当前市场持仓（两边的查询结果都已按市场过滤）
+            paradex_market_pos = paradex_positions[0] if paradex_positions else None
+            if paradex_market_pos and self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"找到Paradex {self.market}持仓: {paradex_market_pos}")
             
-            lighter_market_pos = None
-            if lighter_positions and len(lighter_positions) > 0:
-                lighter_market_pos = lighter_positions[0]  # 取第一个持仓
-                self.logger.info(f"找到Lighter {self.market}持仓对象: position={getattr(lighter_market_pos, 'position', 'N/A')}, sign={getattr(lighter_market_pos, 'sign', 'N/A')}")
-            else:
-                self.logger.info(f"Lighter持仓列表为空或没有{self.market}持仓")
+            lighter_market_pos = lighter_positions[0] if lighter_positions else None
             
-            market_symbol = self.market.split('-')[0]
+            market_symbol = self.base_asset
             
-            # 解析持仓数量
-            paradex_size = 0.0
+            # 解析持仓数量：只解析一次为Decimal，比较时换算为整数最小单位，避免浮点误差
+            paradex_size = Decimal(0)
             paradex_is_short = False
             if paradex_market_pos:
                 try:
                     raw_size = paradex_market_pos.get('size', 0)
-                    paradex_size = abs(float(raw_size))
-                    paradex_is_short = float(raw_size) < 0
+                    signed_size = Decimal(str(raw_size))
+                    paradex_size = abs(signed_size)
+                    paradex_is_short = signed_size < 0
                     self.logger.info(f"Paradex持仓: {'空头' if paradex_is_short else '多头'} {paradex_size} {market_symbol} (原始值: {raw_size})")
                 except Exception as e:
                     self.logger.error(f"解析Paradex持仓数量失败: {e}, 持仓数据: {paradex_market_pos}")
-                    paradex_size = 0.0
+                    paradex_size = Decimal(0)
             else:
                 self.logger.info(f"Paradex无{self.market}持仓")
             
-            lighter_size = 0.0
+            lighter_size = Decimal(0)
             lighter_is_long = False
             if lighter_market_pos:
                 try:
                     position_value = getattr(lighter_market_pos, 'position', None)
                     sign_value = getattr(lighter_market_pos, 'sign', None)
-                    self.logger.info(f"Lighter持仓原始值: position={position_value}, sign={sign_value}")
+                    self.logger.debug("Lighter持仓原始值: position=%s, sign=%s", position_value, sign_value)
                     
                     if position_value is not None:
-                        # position字段已经是单位的字符串，直接转换为float
-                        lighter_size = abs(float(str(position_value)))
+                        # position字段已经是单位的字符串，直接转换为Decimal
+                        lighter_size = abs(Decimal(str(position_value)))
                         lighter_is_long = (sign_value == 1) if sign_value is not None else False
                         self.logger.info(f"Lighter持仓: {'多头' if lighter_is_long else '空头'} {lighter_size} {market_symbol}")
                     else:
                         self.logger.warning("Lighter持仓position属性为None")
                 except Exception as e:
-                    self.logger.error(f"解析Lighter持仓数量失败: {e}, 持仓对象: {lighter_market_pos}")
-                    import traceback
-                    traceback.print_exc()
-                    lighter_size = 0.0
+                    self.logger.error(f"解析Lighter持仓数量失败: {e}, 持仓对象: {lighter_market_pos}", exc_info=self.logger.isEnabledFor(logging.DEBUG))
+                    lighter_size = Decimal(0)
             else:
                 self.logger.info(f"Lighter无{self.market}持仓")
             
@@ -1691,24 +2090,28 @@ class AccountTrader:
             else:
                 lighter_position_str = "无"
             
-            update_account_status(self.account_name, 'paradex_position', paradex_position_str)
-            update_account_status(self.account_name, 'lighter_position', lighter_position_str)
+            update_account_status_many(self.account_name, {
+                'paradex_position': paradex_position_str,
+                'lighter_position': lighter_position_str,
+            })
             
             # 判断是否对等
             # 对等条件：
             # 1. 两边都没有持仓
-            # 2. Paradex多头 + Lighter空头，且数量相等（允许小误差0.0001）
-            # 3. Paradex空头 + Lighter多头，且数量相等（允许小误差0.0001）
-            tolerance = 0.0001
+            # 2. Paradex多头 + Lighter空头，且数量相等（允许误差POSITION_TOLERANCE）
+            # 3. Paradex空头 + Lighter多头，且数量相等（允许误差POSITION_TOLERANCE）
+            tolerance = POSITION_TOLERANCE
+            size_diff = abs(self._to_lighter_units(paradex_size) - self._to_lighter_units(lighter_size))
+            sizes_match = size_diff < tolerance.scaleb(self.size_decimals)
             
             if paradex_size == 0 and lighter_size == 0:
                 self.logger.info("✓ 两边都没有持仓，持仓对等")
-                return True, paradex_btc_pos, lighter_btc_pos
-            elif not paradex_is_short and not lighter_is_long and abs(paradex_size - lighter_size) < tolerance:
+                return True, paradex_market_pos, lighter_market_pos
+            elif not paradex_is_short and not lighter_is_long and sizes_match:
                 # Paradex多头 + Lighter空头
                 self.logger.info(f"✓ 持仓对等: Paradex多头 {paradex_size} {market_symbol} = Lighter空头 {lighter_size} {market_symbol}")
                 return True, paradex_market_pos, lighter_market_pos
-            elif paradex_is_short and lighter_is_long and abs(paradex_size - lighter_size) < tolerance:
+            elif paradex_is_short and lighter_is_long and sizes_match:
                 # Paradex空头 + Lighter多头
                 self.logger.info(f"✓ 持仓对等: Paradex空头 {paradex_size} {market_symbol} = Lighter多头 {lighter_size} {market_symbol}")
                 return True, paradex_market_pos, lighter_market_pos
@@ -1720,12 +2123,22 @@ class AccountTrader:
                 return False, paradex_market_pos, lighter_market_pos
                 
         except Exception as e:
-            self.logger.error(f"检查持仓对等性失败: {e}")
-            import traceback
-            traceback.print_exc()
+            self.logger.error(f"检查持仓对等性失败: {e}", exc_info=self.logger.isEnabledFor(logging.DEBUG))
             # 出错时返回不对等，触发关闭持仓
             return False, None, None
     
+    async def check_positions_balanced_with_retry(self, max_retries=POSITION_CHECK_RETRIES):
+        """检查持仓对等性；持仓查询失败（结果未知）时退避后重新检查，多次失败仍返回None"""
+        for attempt, delay in backoff_schedule(max_retries):
+            is_balanced, _, _ = await self.check_positions_balanced()
+            if is_balanced is not None:
+                return is_balanced
+            if attempt < max_retries - 1:
+                self.logger.warning(f"持仓查询失败，{delay:.2f}秒后重新检查...")
+                if await sleep_or_shutdown(delay):
+                    break
+        return None
+    
     async def execute_trading_strategy(self):
         """执行交易策略 - 无限循环"""
         loop_count = 0
@@ -1742,27 +2155,11 @@ class AccountTrader:
             loop_count += 1
             update_account_status(self.account_name, 'loop_count', loop_count)
             try:
-                # 每5次循环或开始新循环时刷新token，确保token不会过期
-                if loop_count % 5 == 1 or loop_count == 1:
-                    if self.shutting_down or shutdown_event.is_set():
-                        break
-                    await self.refresh_jwt_token()
-                
                 self.logger.info("=" * 60)
                 self.logger.info(f"=== 开始执行第 {loop_count} 次交易循环 ===")
                 self.logger.info("=" * 60)
                 
-                wait_time = int(self.account_info.get('wait_time', 20))
-                
-                # 更新余额和持仓
-                try:
-                    paradex_balance = await self.get_paradex_balance()
-                    lighter_balance = await self.get_lighter_balance()
-                    update_account_status(self.account_name, 'current_balance_paradex', paradex_balance)
-                    update_account_status(self.account_name, 'current_balance_lighter', lighter_balance)
-                    await self.update_positions_status()
-                except Exception as e:
-                    self.logger.error(f"更新余额失败: {e}")
+                wait_time = self.account_info.wait_time
                 
                 # 步骤2: Paradex挂多单，成交后Lighter开空单
                 update_account_status(self.account_name, 'wait_status', '挂多单中...')
@@ -1779,7 +2176,7 @@ class AccountTrader:
                         self.logger.error(f"连续失败{max_consecutive_failures}次或退出标记，停止交易")
                         break
                     self.logger.info(f"等待30秒后重试...")
-                    await asyncio.sleep(30)
+                    await sleep_or_shutdown(jittered(30))
                     continue
                 
                 # 在Lighter开空单
@@ -1796,7 +2193,13 @@ class AccountTrader:
                 if self.shutting_down or shutdown_event.is_set():
                     break
                 update_account_status(self.account_name, 'wait_status', '检查持仓对等...')
-                is_balanced, _, _ = await self.check_positions_balanced()
+                is_balanced = await self.check_positions_balanced_with_retry()
+                
+                if is_balanced is None:
+                    # 持仓状态未知时不能继续开新仓，也不能按"无持仓"处理
+                    self.logger.error("多次查询持仓失败，无法确认持仓状态，停止交易")
+                    update_account_status(self.account_name, 'wait_status', '持仓查询失败')
+                    break
                 
                 if not is_balanced:
                     self.logger.warning("持仓不对等，关闭所有仓位并重新开始循环")
@@ -1811,13 +2214,8 @@ class AccountTrader:
                 # 等待配置时间
                 self.logger.info(f"持仓对等，开始等待 {wait_time} 秒...")
                 update_account_status(self.account_name, 'wait_status', '等待中...')
-                for i in range(wait_time, 0, -1):
-                    # 倒计时过程中如进入黑窗期，立即处理
-                    if await self.pause_for_funding_window():
-                        break
-                    update_account_status(self.account_name, 'countdown', str(i))
-                    await asyncio.sleep(1)
-                update_account_status(self.account_name, 'countdown', '')
+                if await self.wait_between_rounds(wait_time):
+                    break
                 
                                 # 步骤1: Paradex挂空单，成交后Lighter开多单
                 update_account_status(self.account_name, 'wait_status', '挂空单中...')
@@ -1833,7 +2231,7 @@ class AccountTrader:
                         self.logger.error(f"连续失败{max_consecutive_failures}次或退出标记，停止交易")
                         break
                     self.logger.info(f"等待30秒后重试...")
-                    await asyncio.sleep(30)
+                    await sleep_or_shutdown(jittered(30))
                     continue
                 
                 consecutive_failures = 0  # 重置失败计数
@@ -1844,10 +2242,8 @@ class AccountTrader:
                 if await self.pause_for_funding_window():
                     continue
                 await self.create_lighter_market_order(is_long=True)
-
                 
                 await asyncio.sleep(1)
-                await self.update_positions_status()
                 
                 # 关闭所有持仓
                 update_account_status(self.account_name, 'wait_status', '关闭持仓中...')
@@ -1855,33 +2251,30 @@ class AccountTrader:
                 await self.close_all_lighter_positions()
                 await self.close_all_paradex_positions()
                 await asyncio.sleep(1)
-                await self.update_positions_status()
                 
                 self.logger.info("=" * 60)
                 
                 # 两个交易之间的间隔
                 update_account_status(self.account_name, 'wait_status', '准备下一轮')
-                await asyncio.sleep(5)
+                await sleep_or_shutdown(jittered(5))
                 
             except Exception as e:
                 consecutive_failures += 1
-                self.logger.error(f"执行交易策略失败 (第{loop_count}次循环): {e}")
-                import traceback
-                traceback.print_exc()
+                self.logger.error(f"执行交易策略失败 (第{loop_count}次循环): {e}", exc_info=self.logger.isEnabledFor(logging.DEBUG))
                 
                 if consecutive_failures >= max_consecutive_failures:
                     self.logger.error(f"连续失败{max_consecutive_failures}次，停止交易")
                     break
                 
                 self.logger.info(f"等待30秒后重试...")
-                await asyncio.sleep(30)
+                await sleep_or_shutdown(jittered(30))
         
         self.logger.info(f"交易循环结束，共执行了 {loop_count} 次循环")
     
     async def get_paradex_balance(self):
         """获取Paradex余额"""
         try:
-            balances = await fetch_tokens(PARADEX_HTTP_URL, self.jwt_token)
+            balances = await self._fetch_tokens()
             
             # 如果没有余额，返回0
             if not balances:
@@ -1917,32 +2310,18 @@ class AccountTrader:
     
     async def get_lighter_balance(self):
         """获取Lighter余额"""
-        try:
-            from lighter.api.account_api import AccountApi
-            account_api = AccountApi(self.lighter_client.api_client)
-            
-            account_info = await account_api.account(
-                by="index",
-                value=str(self.account_info['account_index'])
-            )
-            
-            if hasattr(account_info, 'accounts') and account_info.accounts:
-                account = account_info.accounts[0]
-                # 返回总资产价值
-                return float(account.total_asset_value)
-            
-            return 0.0
-        except Exception as e:
-            self.logger.error(f"获取Lighter余额失败: {e}")
-            return 0.0
+        balance, _ = await self.get_lighter_account_snapshot()
+        return balance
     
     async def token_refresh_loop(self):
-        """Token自动刷新循环"""
+        """Token自动刷新循环：在JWT到期前主动刷新"""
         while True:
             try:
-                # 每90秒刷新一次token（JWT token通常有效期是10分钟，提前刷新）
-                await asyncio.sleep(90)
-                if getattr(self, 'shutting_down', False) or shutdown_event.is_set():
+                if self._jwt_exp is not None:
+                    delay = max(10, self._jwt_exp - time.time() - JWT_REFRESH_MARGIN)
+                else:
+                    delay = JWT_REFRESH_FALLBACK
+                if await sleep_or_shutdown(delay) or self.shutting_down:
                     break
                 self.logger.info("定时刷新JWT token...")
                 await self.refresh_jwt_token()
@@ -1950,47 +2329,81 @@ class AccountTrader:
                 break
             except Exception as e:
                 self.logger.error(f"Token刷新失败: {e}")
-                await asyncio.sleep(10)  # 失败后等待10秒再重试
+                await asyncio.sleep(jittered(10))  # 失败后等待约10秒再重试
+    
+    async def _run_until_shutdown(self, coro):
+        """运行coro直到结束；期间收到退出信号则取消它"""
+        work = asyncio.create_task(coro)
+        if shutdown_requested is None:
+            await work
+            return
+        stop = asyncio.create_task(shutdown_requested.wait())
+        try:
+            await asyncio.wait({work, stop}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stop.cancel()
+            if not work.done():
+                self.logger.info("收到退出信号，中断交易循环")
+                work.cancel()
+        try:
+            await work
+        except asyncio.CancelledError:
+            pass
+    
+    async def _initialize_exchanges(self):
+        """并发初始化Paradex和Lighter，任一失败时取消另一边并等它退出"""
+        inits = [
+            asyncio.create_task(self.initialize_paradex()),
+            asyncio.create_task(self.initialize_lighter()),
+        ]
+        try:
+            await asyncio.gather(*inits)
+        except BaseException:
+            for task in inits:
+                task.cancel()
+            await asyncio.gather(*inits, return_exceptions=True)
+            raise
     
     async def run(self):
         """运行交易器"""
         try:
-            # 初始化
-            await self.initialize_paradex()
-            await self.initialize_lighter()
+            # 初始化：Paradex和Lighter互不依赖，同时进行
+            await self._initialize_exchanges()
             
             # 启动Token自动刷新任务
             self.token_refresh_task = asyncio.create_task(self.token_refresh_loop())
-            self.logger.info("已启动Token自动刷新线程")
+            self.logger.info("已启动Token自动刷新任务")
+            
+            # 启动余额/持仓快照刷新任务
+            self.status_snapshot_task = asyncio.create_task(self.status_snapshot_loop())
             
-            # 执行交易策略
-            await self.execute_trading_strategy()
+            # 执行交易策略，收到退出信号时立即中断（不必等当前步骤结束）
+            await self._run_until_shutdown(self.execute_trading_strategy())
             
         except Exception as e:
-            self.logger.error(f"运行失败: {e}")
-            import traceback
-            traceback.print_exc()
+            self.logger.error(f"运行失败: {e}", exc_info=self.logger.isEnabledFor(logging.DEBUG))
         finally:
             # 标记退出，阻止后续下单/请求
             self.shutting_down = True
             
             # 退出前：取消挂单并关闭持仓
-            try:
-                await self.cancel_all_orders()
-            except Exception as e:
-                self.logger.warning(f"取消Paradex挂单失败: {e}")
-            try:
-                await self.cancel_lighter_orders()
-            except Exception as e:
-                self.logger.warning(f"取消Lighter挂单失败: {e}")
-            try:
-                await self.close_all_paradex_positions()
-            except Exception as e:
-                self.logger.warning(f"关闭Paradex持仓失败: {e}")
-            try:
-                await self.close_all_lighter_positions()
-            except Exception as e:
-                self.logger.warning(f"关闭Lighter持仓失败: {e}")
+            await self.cancel_and_close_all()
+            
+            # 停止余额/持仓快照刷新任务
+            if self.status_snapshot_task:
+                self.status_snapshot_task.cancel()
+                try:
+                    await self.status_snapshot_task
+                except asyncio.CancelledError:
+                    pass
+            
+            # 停止订单推送任务
+            if self._order_ws_task:
+                self._order_ws_task.cancel()
+                try:
+                    await self._order_ws_task
+                except asyncio.CancelledError:
+                    pass
             
             # 停止Token刷新任务
             if self.token_refresh_task:
@@ -2006,25 +2419,83 @@ class AccountTrader:
                     await self.lighter_client.close()
                 except:
                     pass
+            # 共享会话由run_all_traders在所有交易器结束后关闭
+            self.http_session = None
 
 
-def read_accounts_from_csv(csv_file="examples/accounts.csv"):
-    """从CSV文件读取账户配置，自动检测编码"""
-    accounts = []
+ACCOUNT_REQUIRED_COLUMNS = ('account_index', 'api_key_index', 'api_key_private_key', 'paradex_eth_key')
+
+
+def _account_row_parser(header):
+    """根据表头一次性确定各字段所在列，返回把一行CSV转换为AccountConfig的函数"""
+    columns = {name.strip().lstrip('\ufeff'): i for i, name in enumerate(header)}
+    missing = [name for name in ACCOUNT_REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"CSV缺少必需的列: {', '.join(missing)}")
+    # 只保留CSV中存在的字段，缺失的可选列使用AccountConfig的默认值
+    field_columns = [(f.name, columns[f.name]) for f in fields(AccountConfig) if f.name in columns]
     
-    if not os.path.exists(csv_file):
+    def parse(row):
+        values = {}
+        for name, i in field_columns:
+            # 旧版本追加的行列数可能少于表头，空值同样视为未填写
+            value = row[i].strip() if i < len(row) else ''
+            if value:
+                values[name] = value
+        values['account_index'] = int(values.get('account_index', ''))
+        values['api_key_index'] = int(values.get('api_key_index', ''))
+        if 'wait_time' in values:
+            values['wait_time'] = int(values['wait_time'])
+        if 'market_index' in values:
+            values['market_index'] = int(values['market_index'])
+        if 'order_size' in values:
+            try:
+                values['order_size'] = Decimal(values['order_size'])
+            except InvalidOperation:
+                logging.warning(f"无效的order_size值 {values['order_size']}，使用默认值: {DEFAULT_ORDER_SIZE}")
+                del values['order_size']
+        return AccountConfig(**values)
+    
+    return parse
+
+
+def _parse_accounts(file):
+    """流式解析CSV：逐行转换为AccountConfig，格式错误的行记录后跳过"""
+    reader = csv.reader(file)
+    header = next(reader, None)
+    if header is None:
+        return []
+    parse = _account_row_parser(header)
+    accounts = []
+    for row in reader:
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        try:
+            accounts.append(parse(row))
+        except (ValueError, TypeError) as e:
+            logging.error(f"跳过CSV第 {reader.line_num} 行，账户配置无效: {e}")
+    return accounts
+
+
+def read_accounts_from_csv(csv_file="examples/accounts.csv"):
+    """从CSV文件读取账户配置，自动检测编码，返回AccountConfig列表"""
+    # 文件只读取一次，各种编码都在内存中尝试解码，不再为每种编码重新打开文件
+    try:
+        with open(csv_file, 'rb') as file:
+            data = file.read()
+    except FileNotFoundError:
         logging.error(f"找不到CSV文件: {csv_file}")
-        return accounts
+        return []
+    except OSError as e:
+        logging.error(f"读取CSV文件失败: {e}")
+        return []
     
     # 尝试多种编码方式读取CSV文件
     encodings = ['utf-8', 'utf-8-sig', 'gbk', 'gb2312', 'gb18030', 'latin1', 'cp1252', 'iso-8859-1']
     
     for encoding in encodings:
         try:
-            with open(csv_file, 'r', encoding=encoding) as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    accounts.append(row)
+            accounts = _parse_accounts(io.StringIO(data.decode(encoding), newline=''))
             
             logging.info(f"成功使用 {encoding} 编码读取CSV文件: {csv_file}, 读取到 {len(accounts)} 个账户")
             return accounts
@@ -2040,42 +2511,123 @@ def read_accounts_from_csv(csv_file="examples/accounts.csv"):
     # 如果所有编码都失败，尝试使用错误处理方式
     logging.warning("所有编码尝试失败，使用错误处理方式读取...")
     try:
-        with open(csv_file, 'r', encoding='utf-8', errors='replace') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                accounts.append(row)
+        accounts = _parse_accounts(io.StringIO(data.decode('utf-8', errors='replace'), newline=''))
         logging.warning(f"使用错误处理方式读取到 {len(accounts)} 个账户（部分字符可能显示异常）")
         return accounts
     except Exception as e:
         logging.error(f"读取CSV文件失败: {e}")
-        return accounts
+        return []
 
 
-async def run_trader_in_async(account_info):
-    """在异步环境中运行交易器"""
+async def run_trader(account_info, start_delay=0):
+    """延迟start_delay秒后运行单个账户的交易器"""
+    if start_delay and await sleep_or_shutdown(start_delay):
+        return
+    logging.info(f"启动交易器: {account_info.description}")
     trader = AccountTrader(account_info)
     await trader.run()
+    logging.info(f"交易器完成: {account_info.description}")
 
 
-def run_trader_in_thread(account_info):
-    """在新线程中运行交易器"""
-    logging.info(f"启动交易器线程: {account_info.get('description', 'Unknown')}")
-    
-    # 创建新的事件循环
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+async def run_all_traders(accounts, start_index=0):
+    """在同一个事件循环中并发运行所有账户的交易器；start_index用于多进程模式下错开启动时间"""
+    global shutdown_requested
+    shutdown_requested = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    # 所有账户共享一个固定大小的线程池执行剩余的同步调用（asyncio.to_thread）
+    loop.set_default_executor(concurrent.futures.ThreadPoolExecutor(
+        max_workers=TRADER_POOL_SIZE, thread_name_prefix="trader-io"))
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, request_shutdown)
+        except NotImplementedError:
+            # Windows事件循环不支持信号处理函数，仍由KeyboardInterrupt兜底
+            pass
     
+    # 任务按账户命名，便于在asyncio调试输出和异常信息中区分
+    tasks = [
+        asyncio.create_task(
+            run_trader(account_info, i * TRADER_START_INTERVAL),
+            name=f"Trader-{account_info.description}",
+        )
+        for i, account_info in enumerate(accounts, start_index)
+    ]
+    all_done = asyncio.gather(*tasks, return_exceptions=True)
+    stop = asyncio.create_task(shutdown_requested.wait())
     try:
-        loop.run_until_complete(run_trader_in_async(account_info))
-    except Exception as e:
-        logging.error(f"线程运行失败: {e}")
+        await asyncio.wait({all_done, stop}, return_when=asyncio.FIRST_COMPLETED)
+        if not all_done.done():
+            # 收到退出信号：各交易器自行取消挂单、平仓；清理卡住时超时后强制取消
+            _, pending = await asyncio.wait(tasks, timeout=SHUTDOWN_TIMEOUT)
+            for task in pending:
+                logging.warning(f"{task.get_name()} 未在{SHUTDOWN_TIMEOUT}秒内完成清理，强制取消")
+                task.cancel()
+        results = await all_done
     finally:
-        loop.close()
+        stop.cancel()
+        await close_shared_http_session()
+    for account_info, result in zip(accounts, results):
+        if isinstance(result, Exception):
+            logging.error(f"交易器运行失败: {account_info.description}: {result}")
+
+
+def install_event_loop_policy():
+    """已安装uvloop时，让之后的asyncio.run使用uvloop事件循环"""
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logging.info("使用uvloop事件循环")
+
+
+def _run_account_process(account_info, start_index, log_filename):
+    """（子进程入口）在独立的事件循环中运行单个账户，日志追加写入父进程的日志文件"""
+    global status_updates_enabled
+    setup_logging(log_filename)
+    # 子进程没有监控面板，不记录面板状态
+    status_updates_enabled = False
+    install_event_loop_policy()
+    try:
+        asyncio.run(run_all_traders([account_info], start_index))
+    except KeyboardInterrupt:
+        pass
+
+
+def run_trader_processes(accounts, log_filename):
+    """每个账户一个子进程，各自拥有独立的GIL和事件循环"""
+    # spawn在各平台行为一致，也避免fork时复制父进程的线程和连接
+    ctx = multiprocessing.get_context("spawn")
+    processes = [
+        ctx.Process(target=_run_account_process, args=(account_info, i, log_filename),
+                    name=f"Trader-{account_info.description}")
+        for i, account_info in enumerate(accounts)
+    ]
+    for process in processes:
+        process.start()
     
-    logging.info(f"交易器线程完成: {account_info.get('description', 'Unknown')}")
+    # SIGTERM转发给子进程，由子进程各自的信号处理函数完成清理
+    def terminate_children(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+    signal.signal(signal.SIGTERM, terminate_children)
+    
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Ctrl+C同时发给了整个进程组，等待子进程完成清理，超时则强制结束
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        for process in processes:
+            process.join(max(0, deadline - time.monotonic()))
+            if process.is_alive():
+                logging.warning(f"{process.name} 未在{SHUTDOWN_TIMEOUT}秒内退出，强制结束")
+                process.kill()
+                process.join()
+    for process in processes:
+        if process.exitcode:
+            logging.error(f"交易进程异常退出: {process.name}, exitcode={process.exitcode}")
 
 
-def main():
+def main(log_filename):
     """主函数"""
     # 读取账户配置
     accounts = read_accounts_from_csv()
@@ -2086,42 +2638,33 @@ def main():
     
     logging.info(f"找到 {len(accounts)} 个账户配置")
     
-    # 启动UI状态监控线程
-    monitor_thread = threading.Thread(target=run_status_monitor, daemon=True)
+    if TRADER_MODE == "process":
+        logging.info("多进程模式：每个账户运行在独立的子进程中")
+        run_trader_processes(accounts, log_filename)
+        return
+    
+    # 启动UI状态监控线程（唯一的后台线程）
+    monitor_thread = threading.Thread(target=run_status_monitor, name="StatusMonitor", daemon=True)
     monitor_thread.start()
-    logging.info("UI状态监控已启动，每2秒刷新一次")
-    
-    # 为每个账户创建线程
-    threads = []
-    for account_info in accounts:
-        thread = threading.Thread(
-            target=run_trader_in_thread,
-            args=(account_info,),
-            name=f"Trader-{account_info.get('description', 'Unknown')}"
-        )
-        thread.start()
-        threads.append(thread)
-        logging.info(f"启动交易器线程: {account_info.get('description', 'Unknown')}")
-        
-        # 添加短暂延迟，避免同时启动
-        time.sleep(10)
+    logging.info("UI状态监控已启动")
     
-    # 等待所有线程完成
+    # 所有账户在同一个事件循环中运行
+    install_event_loop_policy()
     try:
-        for thread in threads:
-            thread.join()
+        asyncio.run(run_all_traders(accounts))
     except KeyboardInterrupt:
-        logging.info("收到中断信号，通知各线程退出并等待清理...")
+        logging.info("收到中断信号，各交易器已执行清理")
+    finally:
         shutdown_event.set()
-        # 再次等待线程自然结束（执行各自的finally清理）
-        for thread in threads:
-            thread.join()
+        status_dirty.set()
 
 
 if __name__ == "__main__":
     print("=" * 60)
-    print("多线程交易脚本")
+    print("多账户并发交易脚本")
     print("=" * 60)
     
-    main()
+    log_filename = f"trading_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+    setup_logging(log_filename)
+    main(log_filename)
 
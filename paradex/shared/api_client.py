@@ -6,16 +6,25 @@ Description:
 # built ins
 import asyncio
 import base64
+import contextlib
+import hashlib
 import hmac
 import json
 import logging
 import os
 import sys
 import time
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import aiohttp
 import websockets
+
+try:
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 from .api_client_utils import (
     DecimalEncoder,
     auth_message,
@@ -27,8 +36,9 @@ from .api_client_utils import (
     get_account,
     is_token_expired,
     onboarding_message,
-    order_sign_message,
+    OrderSignCache,
     stark_key_message,
+    TokenExpired,
 )
 from .api_config import ApiConfig
 from .paradex_api_utils import Order
@@ -41,6 +51,21 @@ from web3.auto import w3
 # 添加paradex目录到路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from helpers.account import Account
+from helpers.utils import message_signature
+
+
+@contextlib.asynccontextmanager
+async def _session_scope(session: Optional[aiohttp.ClientSession] = None):
+    """
+    Yields `session` unchanged when the caller owns a long-lived one
+    (so keep-alive connections are reused), otherwise a one-off session
+    that is closed on exit.
+    """
+    if session is not None:
+        yield session
+        return
+    async with aiohttp.ClientSession() as session:
+        yield session
 
 
 # RESToverHTTP Interface
@@ -94,6 +119,7 @@ async def create_rest_headers(
 async def get_open_orders(
     paradex_http_url: str,
     paradex_jwt: str,
+    session: Optional[aiohttp.ClientSession] = None,
 ) -> List[Dict]:
     """
     Paradex RESToverHTTP endpoint.
@@ -111,10 +137,10 @@ async def get_open_orders(
         body="",
     )
 
-    async with aiohttp.ClientSession() as session:
+    async with _session_scope(session) as session:
         async with session.get(paradex_http_url + path, headers=headers) as response:
             status_code: int = response.status
-            response: Dict = await response.json()
+            response: Dict = await response.json(loads=json_loads)
             logging.debug("GET /orders: ", response)
             check_token_expiry(status_code=status_code, response=response)
             if status_code != 200:
@@ -128,6 +154,7 @@ async def get_open_orders(
 async def fetch_account(
     paradex_http_url: str,
     paradex_jwt: str,
+    session: Optional[aiohttp.ClientSession] = None,
 ) -> List[Dict]:
     """
     Paradex RESToverHTTP endpoint.
@@ -145,7 +172,7 @@ async def fetch_account(
         body="",
     )
 
-    async with aiohttp.ClientSession() as session:
+    async with _session_scope(session) as session:
         async with session.get(paradex_http_url + path, headers=headers) as response:
             status_code: int = response.status
             response: Dict = await response.json()
@@ -160,6 +187,7 @@ async def fetch_account(
 async def fetch_transfers(
     paradex_http_url: str,
     paradex_jwt: str,
+    session: Optional[aiohttp.ClientSession] = None,
 ) -> List[Dict]:
     """
     Paradex RESToverHTTP endpoint.
@@ -177,7 +205,7 @@ async def fetch_transfers(
         body="",
     )
 
-    async with aiohttp.ClientSession() as session:
+    async with _session_scope(session) as session:
         async with session.get(paradex_http_url + path, headers=headers) as response:
             status_code: int = response.status
             response: Dict = await response.json()
@@ -192,6 +220,7 @@ async def fetch_transfers(
 async def fetch_positions(
     paradex_http_url: str,
     paradex_jwt: str,
+    session: Optional[aiohttp.ClientSession] = None,
 ) -> List[Dict]:
     """
     Paradex RESToverHTTP endpoint.
@@ -210,10 +239,10 @@ async def fetch_positions(
         body="",
     )
 
-    async with aiohttp.ClientSession() as session:
+    async with _session_scope(session) as session:
         async with session.get(paradex_http_url + path, headers=headers) as response:
             status_code: int = response.status
-            response: Dict = await response.json()
+            response: Dict = await response.json(loads=json_loads)
             check_token_expiry(status_code=status_code, response=response)
             if status_code != 200:
                 logging.error(
@@ -228,6 +257,7 @@ async def fetch_positions(
 async def fetch_tokens(
     paradex_http_url: str,
     paradex_jwt: str,
+    session: Optional[aiohttp.ClientSession] = None,
 ) -> List[Dict]:
     """
     Paradex RESToverHTTP endpoint.
@@ -245,7 +275,7 @@ async def fetch_tokens(
         body="",
     )
 
-    async with aiohttp.ClientSession() as session:
+    async with _session_scope(session) as session:
         async with session.get(paradex_http_url + path, headers=headers) as response:
             status_code: int = response.status
             response: Dict = await response.json()
@@ -259,7 +289,12 @@ async def fetch_tokens(
     return response
 
 
-async def fetch_trades(paradex_http_url: str, paradex_jwt: str, market: str) -> None:
+async def fetch_trades(
+    paradex_http_url: str,
+    paradex_jwt: str,
+    market: str,
+    session: Optional[aiohttp.ClientSession] = None,
+) -> None:
     """
     Paradex RESToverHTTP endpoint.
     [GET] /trades
@@ -276,7 +311,7 @@ async def fetch_trades(paradex_http_url: str, paradex_jwt: str, market: str) ->
         body="",
     )
     params = {"market": market}
-    async with aiohttp.ClientSession() as session:
+    async with _session_scope(session) as session:
         async with session.get(
             paradex_http_url + path, headers=headers, params=params
         ) as response:
@@ -296,14 +331,20 @@ def check_token_expiry(status_code: int, response: Dict) -> None:
     """
     Checks the response from the Paradex API
     to see if the token has expired.
+    Raises TokenExpired so callers can refresh the JWT and retry.
     """
     if is_token_expired(status_code, response):
         logging.info(response["message"])
-        logging.error("Token has expired, please restart the bot.")
-        sys.exit(1)
+        logging.error("Token has expired, refresh the JWT and retry.")
+        raise TokenExpired(response["message"])
 
 
-async def post_order_payload(paradex_http_url: str, paradex_jwt: str, payload: dict) -> dict:
+async def post_order_payload(
+    paradex_http_url: str,
+    paradex_jwt: str,
+    payload: dict,
+    session: Optional[aiohttp.ClientSession] = None,
+) -> dict:
     """
     Paradex RESToverHTTP endpoint.
     [POST] /orders
@@ -320,7 +361,7 @@ async def post_order_payload(paradex_http_url: str, paradex_jwt: str, payload: d
     )
     response = {}
     logging.debug(f"post_order_payload:{payload}")
-    async with aiohttp.ClientSession() as session:
+    async with _session_scope(session) as session:
         try:
             async with session.post(
                 paradex_http_url + path, headers=headers, json=payload
@@ -343,7 +384,12 @@ async def post_order_payload(paradex_http_url: str, paradex_jwt: str, payload: d
     return response
 
 
-async def delete_order_payload(paradex_http_url: str, paradex_jwt: str, order_id: str) -> bool:
+async def delete_order_payload(
+    paradex_http_url: str,
+    paradex_jwt: str,
+    order_id: str,
+    session: Optional[aiohttp.ClientSession] = None,
+) -> bool:
     """
     Paradex RESToverHTTP endpoint.
     [DELETE] /orders/{order_id}
@@ -359,7 +405,7 @@ async def delete_order_payload(paradex_http_url: str, paradex_jwt: str, order_id
         body="",
     )
 
-    async with aiohttp.ClientSession() as session:
+    async with _session_scope(session) as session:
         try:
             async with session.delete(paradex_http_url + path, headers=headers) as response:
                 status_code: int = response.status
@@ -378,9 +424,52 @@ async def delete_order_payload(paradex_http_url: str, paradex_jwt: str, order_id
     return ret_val
 
 
+async def delete_all_orders_payload(
+    paradex_http_url: str,
+    paradex_jwt: str,
+    market: Optional[str] = None,
+    session: Optional[aiohttp.ClientSession] = None,
+) -> bool:
+    """
+    Paradex RESToverHTTP endpoint.
+    [DELETE] /orders
+    Cancels all open orders (optionally only for `market`) in one request.
+    """
+    method: str = "DELETE"
+    path: str = "/orders"
+    params = {"market": market} if market else None
+    ret_val = False
+    headers: Dict = await create_rest_headers(
+        paradex_jwt=paradex_jwt,
+        paradex_maker_secret_key="",
+        method=method,
+        path=path,
+        body="",
+    )
+
+    async with _session_scope(session) as session:
+        try:
+            async with session.delete(paradex_http_url + path, headers=headers, params=params) as response:
+                status_code: int = response.status
+                response: Dict = await response.json(content_type=None)
+                check_token_expiry(status_code=status_code, response=response)
+                if status_code == 200 or status_code == 204:
+                    logging.info(f"All orders cancelled: {status_code} | Market: {market or 'ALL'}")
+                    ret_val = True
+                else:
+                    logging.info(f"Unable to [DELETE] {path}")
+                    logging.info(f"Status Code: {status_code}")
+                    logging.info(f"Response Text: {response}")
+
+        except aiohttp.ClientConnectorError as e:
+            logging.error(f"[DELETE] /orders ClientConnectorError: {e}")
+    return ret_val
+
+
 async def get_markets(
     paradex_http_url: str,
     paradex_jwt: str,
+    session: Optional[aiohttp.ClientSession] = None,
 ) -> List[Dict]:
     """
     Paradex RESToverHTTP endpoint.
@@ -399,7 +488,7 @@ async def get_markets(
         body=payload,
     )
 
-    async with aiohttp.ClientSession() as session:
+    async with _session_scope(session) as session:
         async with session.get(paradex_http_url + path, headers=headers) as response:
             status_code: int = response.status
             response: Dict = await response.json()
@@ -439,6 +528,42 @@ async def get_paradex_config(
     return response
 
 
+PARADEX_CONFIG_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "paradex")
+PARADEX_CONFIG_CACHE_TTL = 24 * 60 * 60
+
+
+async def get_paradex_config_cached(
+    paradex_http_url: str,
+    cache_dir: str = PARADEX_CONFIG_CACHE_DIR,
+    ttl: float = PARADEX_CONFIG_CACHE_TTL,
+) -> Dict:
+    """
+    get_paradex_config() backed by an on-disk cache.
+    The system config (chain id, contract addresses) rarely changes, so it is
+    only re-fetched when the cached copy for this URL is older than `ttl` seconds.
+    """
+    key = hashlib.sha256(paradex_http_url.encode()).hexdigest()[:16]
+    cache_path = os.path.join(cache_dir, f"config-{key}.json")
+    try:
+        if time.time() - os.path.getmtime(cache_path) < ttl:
+            with open(cache_path, "r") as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    config = await get_paradex_config(paradex_http_url)
+    if "starknet_chain_id" in config:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(config, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logging.warning(f"Unable to cache paradex config: {e}")
+    return config
+
+
 # JSON-RPCoverWebsocket Interface
 async def send_heartbeat_id(websocket: websockets.WebSocketClientProtocol, id: int) -> None:
     """
@@ -537,7 +662,11 @@ async def deposit_to_paraclear(config: ApiConfig, amount: int) -> None:
 
 
 async def get_jwt_token(
-    paradex_config: Dict, paradex_http_url: str, account_address: str, private_key: str
+    paradex_config: Dict,
+    paradex_http_url: str,
+    account_address: str,
+    private_key: str,
+    session: Optional[aiohttp.ClientSession] = None,
 ) -> str:
     logging.info("get_jwt_token")
     token = ""
@@ -559,7 +688,7 @@ async def get_jwt_token(
     }
     path: str = "/auth"
     logging.info(f"get_jwt_token path:{paradex_http_url + path} headers:{headers}")
-    async with aiohttp.ClientSession() as session:
+    async with _session_scope(session) as session:
         async with session.post(paradex_http_url + path, headers=headers) as response:
             status_code: int = response.status
             response: Dict = await response.json()
@@ -622,15 +751,39 @@ def custom_exception_handler(loop, context):
     loop.stop()
 
 
+def order_sign_cache(config: ApiConfig) -> OrderSignCache:
+    if config.order_sign_cache is not None:
+        return config.order_sign_cache
+
+    account = starknet_account(config)
+    cache = OrderSignCache(account._chain_id.value, account.address)
+    config.order_sign_cache = cache
+    return cache
+
+
 def sign_order(config: ApiConfig, o: Order) -> Tuple[str, str]:
     account = starknet_account(config)
-    message = order_sign_message(account._chain_id.value, o)
+    msg_hash = order_sign_cache(config).message_hash(o)
 
-    sig = account.sign_message(message)
+    sig = message_signature(msg_hash=msg_hash, priv_key=account.signer.key_pair.private_key)
     flat_sig = flatten_signature(sig)
     return flat_sig
 
 
+def sign_order_incremental(
+    config: ApiConfig, signature_timestamp: int, static_fields: Tuple[int, int, int, int], chain_price: int
+) -> str:
+    """
+    Same signature as sign_order(), for an order whose constant fields were
+    already encoded with OrderSignCache.static_fields().
+    """
+    account = starknet_account(config)
+    msg_hash = order_sign_cache(config).message_hash_from_fields(signature_timestamp, static_fields, chain_price)
+
+    sig = message_signature(msg_hash=msg_hash, priv_key=account.signer.key_pair.private_key)
+    return flatten_signature(sig)
+
+
 def get_recovery_phrase(config: ApiConfig) -> str:
     if config.paradex_environment == "local":
         return gen_and_save_recovery_phrase()
@@ -670,20 +823,28 @@ def generate_accounts(config: ApiConfig):
     print("config.paradex_account: ", config.paradex_account)
 
 
-async def get_bbo(paradex_http_url: str, market: str) -> dict:
+async def get_bbo(
+    paradex_http_url: str, market: str, session: Optional[aiohttp.ClientSession] = None
+) -> dict:
     """
     Paradex RESToverHTTP endpoint.
     [GET] /bbo/{market}
+
+    Pass a long-lived `session` to reuse its keep-alive connections
+    across calls; otherwise a one-off session is created.
     """
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await get_bbo(paradex_http_url, market, session)
+
     path = f"/bbo/{market}"
     url = paradex_http_url + path
     headers = {"Accept": "application/json"}
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as response:
-            status_code = response.status
-            data = await response.json()
-            if status_code != 200:
-                logging.error(f"Unable to [GET] {path}")
-                logging.error(f"Status Code: {status_code}")
-                logging.error(f"Response Text: {data}")
-            return data
\ No newline at end of file
+    async with session.get(url, headers=headers) as response:
+        status_code = response.status
+        data = await response.json(loads=json_loads)
+        if status_code != 200:
+            logging.error(f"Unable to [GET] {path}")
+            logging.error(f"Status Code: {status_code}")
+            logging.error(f"Response Text: {data}")
+        return data
@@ -1,3 +1,4 @@
+import functools
 import hashlib
 import json
 import logging
@@ -9,19 +10,21 @@ from typing import Optional, Tuple
 
 from eth_account.hdaccount import generate_mnemonic
 from eth_account.messages import encode_structured_data
-from .paradex_api_utils import Order
+from .paradex_api_utils import Order, OrderSide, OrderType
+from starknet_py.cairo.felt import encode_shortstring
 from starknet_py.hash.address import compute_address
 from starknet_py.hash.selector import get_selector_from_name
 from starknet_py.net.full_node_client import FullNodeClient
 from starknet_py.common import int_from_bytes
 from starknet_py.net.signer.stark_curve_signer import KeyPair
-from starknet_py.utils.typed_data import TypedData
+from starknet_py.utils.typed_data import TypedData, get_hex
 from starkware.crypto.signature.signature import EC_ORDER
 from web3.auto import w3
 
 # 添加paradex目录到路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from helpers.account import Account
+from helpers.utils import pedersen_hash
 
 
 class TokenExpired(Exception):
@@ -175,6 +178,61 @@ def order_sign_message(chainId: int, o: Order):
     return message
 
 
+@functools.lru_cache(maxsize=None)
+def _encode_felt(value: str) -> int:
+    return int(get_hex(value), 16)
+
+
+class OrderSignCache:
+    """
+    Constant parts of the order message hash for one account on one chain.
+
+    The domain hash, the account address and the Order type hash never change
+    between orders, so their pedersen chain state is computed once and only
+    the per-order fields are hashed at signing time. Produces the same hash as
+    TypedData.from_dict(order_sign_message(...)).message_hash(account_address).
+    """
+
+    def __init__(self, chainId: int, account_address: int):
+        template = Order(
+            market="", order_type=OrderType.Market, order_side=OrderSide.Buy, size=Decimal(0)
+        )
+        typed_data = TypedData.from_dict(order_sign_message(chainId, template))
+        domain_hash = typed_data.struct_hash("StarkNetDomain", typed_data.domain)
+        self.message_prefix = functools.reduce(
+            pedersen_hash, [encode_shortstring("StarkNet Message"), domain_hash, account_address], 0
+        )
+        self.order_prefix = pedersen_hash(0, typed_data.type_hash("Order"))
+        self.order_len = 1 + len(typed_data.types["Order"])
+
+    @staticmethod
+    def static_fields(o: Order) -> Tuple[int, int, int, int]:
+        """
+        Encoded market, side, type and size of an order. They do not change
+        when an order is re-priced, so callers may compute them once and pass
+        them to message_hash_from_fields() on every retry.
+        """
+        return (
+            _encode_felt(o.market),
+            int(o.order_side.chain_side()),
+            _encode_felt(o.order_type.value),
+            int(o.chain_size()),
+        )
+
+    def message_hash_from_fields(
+        self, signature_timestamp: int, static_fields: Tuple[int, int, int, int], chain_price: int
+    ) -> int:
+        h = pedersen_hash(self.order_prefix, signature_timestamp)
+        h = functools.reduce(pedersen_hash, static_fields, h)
+        struct_hash = pedersen_hash(pedersen_hash(h, chain_price), self.order_len)
+        return pedersen_hash(pedersen_hash(self.message_prefix, struct_hash), 4)
+
+    def message_hash(self, o: Order) -> int:
+        return self.message_hash_from_fields(
+            int(o.signature_timestamp), self.static_fields(o), int(o.chain_price())
+        )
+
+
 def flatten_signature(sig: list[str]) -> str:
     return f'["{sig[0]}","{sig[1]}"]'
 
@@ -54,6 +54,7 @@ class ApiConfig(ApiConfigInterface):
         self.needs_onboarding = False
         self.paradex_config = dict()
         self.starknet_account = None
+        self.order_sign_cache = None
         self.pod_ip = os.getenv('POD_IP', '127.0.0.1')
         MAX_PODS = 15
         self.pod_index = int(ipaddress.IPv4Address(self.pod_ip)) % MAX_PODS
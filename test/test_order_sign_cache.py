@@ -0,0 +1,84 @@
+# coding: utf-8
+
+"""
+    OrderSignCache must produce exactly the same order message hash as the
+    legacy TypedData path, otherwise Paradex rejects the order signature.
+"""
+
+
+import unittest
+from decimal import Decimal
+
+try:
+    from starknet_py.cairo.felt import encode_shortstring
+    from starknet_py.utils.typed_data import TypedData
+
+    from paradex.shared.api_client_utils import OrderSignCache, order_sign_message
+    from paradex.shared.paradex_api_utils import Order, OrderSide, OrderType
+except ImportError:  # starknet deps live in paradex/requirements.txt
+    OrderSignCache = None
+
+CHAIN_ID = 0x505249564154455f534e5f504f54435f5345504f4c4941  # "PRIVATE_SN_POTC_SEPOLIA"
+ACCOUNT_ADDRESS = 0x0129F6E1E8B2E6B3F2E0A8C3B4A5D6E7F8091A2B3C4D5E6F708192A3B4C5D6E7
+SIGNATURE_TIMESTAMP = 1700000000123
+
+
+@unittest.skipIf(OrderSignCache is None, "starknet_py is not installed")
+class TestOrderSignCache(unittest.TestCase):
+    """OrderSignCache against TypedData.message_hash"""
+
+    def setUp(self):
+        self.cache = OrderSignCache(CHAIN_ID, ACCOUNT_ADDRESS)
+
+    def make_order(self, order_type, order_side, size, limit_price=None):
+        return Order(
+            market="BTC-USD-PERP",
+            order_type=order_type,
+            order_side=order_side,
+            size=size,
+            limit_price=limit_price,
+            client_id="test",
+            signature_timestamp=SIGNATURE_TIMESTAMP,
+        )
+
+    def legacy_hash(self, order):
+        typed_data = TypedData.from_dict(order_sign_message(CHAIN_ID, order))
+        return typed_data.message_hash(ACCOUNT_ADDRESS)
+
+    def test_chain_id_is_short_string(self):
+        self.assertEqual(CHAIN_ID, encode_shortstring("PRIVATE_SN_POTC_SEPOLIA"))
+
+    def test_market_orders(self):
+        for side in (OrderSide.Buy, OrderSide.Sell):
+            with self.subTest(side=side):
+                order = self.make_order(OrderType.Market, side, Decimal("0.001"))
+                self.assertEqual(self.cache.message_hash(order), self.legacy_hash(order))
+
+    def test_limit_orders(self):
+        for side in (OrderSide.Buy, OrderSide.Sell):
+            with self.subTest(side=side):
+                order = self.make_order(OrderType.Limit, side, Decimal("0.25"), Decimal("64321.5"))
+                self.assertEqual(self.cache.message_hash(order), self.legacy_hash(order))
+
+    def test_repriced_order_from_static_fields(self):
+        order = self.make_order(OrderType.Limit, OrderSide.Sell, Decimal("0.01"), Decimal("100000.1"))
+        static_fields = OrderSignCache.static_fields(order)
+        for price in (Decimal("99999.9"), Decimal("100001")):
+            with self.subTest(price=price):
+                order.limit_price = price
+                order.signature_timestamp += 1
+                self.assertEqual(
+                    self.cache.message_hash_from_fields(
+                        order.signature_timestamp, static_fields, int(order.chain_price())
+                    ),
+                    self.legacy_hash(order),
+                )
+
+    def test_different_sides_hash_differently(self):
+        buy = self.make_order(OrderType.Market, OrderSide.Buy, Decimal("0.001"))
+        sell = self.make_order(OrderType.Market, OrderSide.Sell, Decimal("0.001"))
+        self.assertNotEqual(self.cache.message_hash(buy), self.cache.message_hash(sell))
+
+
+if __name__ == '__main__':
+    unittest.main()
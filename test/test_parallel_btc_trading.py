@@ -0,0 +1,307 @@
+# coding: utf-8
+
+"""
+    Unit tests for the pure helpers in examples/parallel_btc_trading.py:
+    CSV account parsing, retry jitter, funding windows and position checks.
+"""
+
+
+import asyncio
+import io
+import os
+import random
+import sys
+import unittest
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'examples'))
+
+try:
+    import parallel_btc_trading as pbt
+except ImportError:  # the script needs the lighter + paradex (starknet) dependencies
+    pbt = None
+
+DAY = 24 * 60 * 60
+DAY_START = 19676 * DAY  # 2023-11-15 00:00 UTC
+HEADER = "account_index,api_key_index,api_key_private_key,paradex_eth_key"
+
+
+def make_account(**kwargs):
+    values = dict(account_index=1, api_key_index=2, api_key_private_key="k", paradex_eth_key="e")
+    values.update(kwargs)
+    return pbt.AccountConfig(**values)
+
+
+@unittest.skipIf(pbt is None, "parallel_btc_trading dependencies are not installed")
+class TestAccountRowParser(unittest.TestCase):
+    """_account_row_parser / _parse_accounts"""
+
+    def parse(self, text):
+        return pbt._parse_accounts(io.StringIO(text))
+
+    def test_required_columns(self):
+        with self.assertRaises(ValueError):
+            pbt._account_row_parser(["account_index", "api_key_index", "api_key_private_key"])
+
+    def test_bom_and_whitespace_in_header(self):
+        parse = pbt._account_row_parser(["\ufeffaccount_index", " api_key_index ", "api_key_private_key", "paradex_eth_key"])
+        self.assertEqual(parse(["7", "3", "k", "e"]), make_account(account_index=7, api_key_index=3))
+
+    def test_types_and_defaults(self):
+        accounts = self.parse(
+            HEADER + ",description,wait_time,market,order_size,proxy_url,market_index\n"
+            "1,2, k , e ,acc,30,ETH-USD-PERP,0.01,http://p:1,5\n"
+            "3,4,k,e\n"
+        )
+        self.assertEqual(accounts[0], make_account(
+            description="acc", wait_time=30, market="ETH-USD-PERP", order_size=Decimal("0.01"),
+            proxy_url="http://p:1", market_index=5,
+        ))
+        self.assertIsInstance(accounts[0].order_size, Decimal)
+        # short rows and empty cells fall back to the dataclass defaults
+        self.assertEqual(accounts[1], make_account(account_index=3, api_key_index=4))
+        self.assertIsNone(accounts[1].market_index)
+        self.assertEqual(accounts[1].order_size, pbt.DEFAULT_ORDER_SIZE)
+
+    def test_invalid_order_size_uses_default(self):
+        with self.assertLogs(level="WARNING"):
+            accounts = self.parse(HEADER + ",order_size\n1,2,k,e,abc\n")
+        self.assertEqual(accounts[0].order_size, pbt.DEFAULT_ORDER_SIZE)
+
+    def test_invalid_rows_are_skipped(self):
+        with self.assertLogs(level="ERROR"):
+            accounts = self.parse(HEADER + ",wait_time\nx,2,k,e,1\n1,2,k,e,soon\n\n3,4,k,e,5\n")
+        self.assertEqual([a.account_index for a in accounts], [3])
+
+    def test_empty_file(self):
+        self.assertEqual(self.parse(""), [])
+
+
+@unittest.skipIf(pbt is None, "parallel_btc_trading dependencies are not installed")
+class TestRetryDelays(unittest.TestCase):
+    """backoff_delay / jittered"""
+
+    def setUp(self):
+        random.seed(1234)
+
+    def test_backoff_delay_bounds(self):
+        for attempt in range(12):
+            expected = min(pbt.RETRY_BACKOFF_BASE * 2 ** attempt, pbt.RETRY_BACKOFF_CAP)
+            for _ in range(200):
+                delay = pbt.backoff_delay(attempt)
+                self.assertGreaterEqual(delay, 0.5 * expected)
+                self.assertLessEqual(delay, 1.5 * expected)
+
+    def test_backoff_delay_extremes(self):
+        with mock.patch.object(pbt.random, "random", return_value=0.0):
+            self.assertEqual(pbt.backoff_delay(0, base=1, cap=8), 0.5)
+        with mock.patch.object(pbt.random, "random", return_value=1.0):
+            self.assertEqual(pbt.backoff_delay(10, base=1, cap=8), 12)
+
+    def test_backoff_schedule(self):
+        schedule = list(pbt.backoff_schedule(3))
+        self.assertEqual([attempt for attempt, _ in schedule], [0, 1, 2])
+
+    def test_jittered_bounds(self):
+        for _ in range(1000):
+            self.assertTrue(8 <= pbt.jittered(10) <= 12)
+            self.assertTrue(25 <= pbt.jittered(50, spread=0.5) <= 75)
+
+
+@unittest.skipIf(pbt is None, "parallel_btc_trading dependencies are not installed")
+class TestStatusUpdates(unittest.TestCase):
+    """update_account_status(_many) / _drain_status_pending"""
+
+    def setUp(self):
+        for patcher in (
+            mock.patch.dict(pbt.account_status_pending, clear=True),
+            mock.patch.dict(pbt.account_status, clear=True),
+            mock.patch.dict(pbt._status_rows, clear=True),
+            mock.patch.object(pbt, "_account_order", []),
+            mock.patch.object(pbt, "status_updates_enabled", True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_one_shot_fields_survive_frequent_updates(self):
+        pbt.update_account_status_many("acc", {"initial_balance_paradex": 100.0, "market": "ETH-USD-PERP"})
+        for i in range(1000, 0, -1):
+            pbt.update_account_status("acc", "countdown", str(i))
+        self.assertEqual(len(pbt.account_status_pending["acc"]), 3)
+        pbt._drain_status_pending()
+        status = pbt.account_status["acc"]
+        self.assertEqual(status.initial_balance_paradex, 100.0)
+        self.assertEqual(status.market, "ETH-USD-PERP")
+        self.assertEqual(status.countdown, "1")
+        self.assertEqual(pbt._account_order, ["acc"])
+
+    def test_updates_after_drain_are_kept(self):
+        pbt.update_account_status("acc", "loop_count", 1)
+        pbt._drain_status_pending()
+        pbt.update_account_status("acc", "loop_count", 2)
+        pbt._drain_status_pending()
+        self.assertEqual(pbt.account_status["acc"].loop_count, 2)
+        self.assertEqual(pbt.account_status_pending["acc"], {})
+
+
+@unittest.skipIf(pbt is None, "parallel_btc_trading dependencies are not installed")
+class TestClassifyLighterError(unittest.TestCase):
+    """classify_lighter_error"""
+
+    def test_restricted_jurisdiction(self):
+        self.assertIsInstance(pbt.classify_lighter_error(20558, "restricted"), pbt.RestrictedJurisdictionError)
+        error = pbt.classify_lighter_error(None, "(400) code=20558 message='restricted jurisdiction'")
+        self.assertIsInstance(error, pbt.RestrictedJurisdictionError)
+        self.assertEqual(error.code, 20558)
+        self.assertEqual(str(error), "restricted jurisdiction")
+
+    def test_restricted_code_digits_inside_other_errors(self):
+        error = pbt.classify_lighter_error(21104, "invalid nonce: expected 120558, got 120559")
+        self.assertIsInstance(error, pbt.NonceError)
+        error = pbt.classify_lighter_error(503, "server busy, tx 0xab20558cd not accepted")
+        self.assertIsInstance(error, pbt.TransientLighterError)
+        error = pbt.classify_lighter_error(None, "code=21700 message='order amount 20558 too large'")
+        self.assertIs(type(error), pbt.LighterOrderError)
+        self.assertEqual(error.code, 21700)
+
+    def test_nonce_and_transient_errors(self):
+        self.assertIsInstance(pbt.classify_lighter_error(None, "invalid nonce"), pbt.NonceError)
+        self.assertIsInstance(pbt.classify_lighter_error(429, "too many requests"), pbt.TransientLighterError)
+        self.assertIs(type(pbt.classify_lighter_error(None, RuntimeError("boom"))), pbt.LighterOrderError)
+
+
+@unittest.skipIf(pbt is None, "parallel_btc_trading dependencies are not installed")
+class TestFundingWindows(unittest.TestCase):
+    """_next_funding_start / _seconds_remaining_in_funding_window"""
+
+    def setUp(self):
+        self.trader = pbt.AccountTrader(make_account())
+        # 北京时间 00:00 / 08:00 / 16:00 = UTC 16:00 / 00:00 / 08:00
+        # UTC窗口: 15:50-16:10, 23:30-00:20（跨越UTC午夜）, 07:50-08:10
+        self.trader.funding_windows = {0: (10, 10), 8 * 60: (30, 20), 16 * 60: (10, 10)}
+        self.trader._build_funding_intervals()
+
+    def at(self, hours, minutes, seconds=0):
+        return DAY_START + hours * 3600 + minutes * 60 + seconds
+
+    def remaining_at(self, now):
+        with mock.patch.object(pbt.time, "time", return_value=now):
+            return self.trader._seconds_remaining_in_funding_window()
+
+    def test_intervals_split_at_midnight(self):
+        self.assertEqual(self.trader._funding_starts, [0, 470, 950, 1410])
+
+    def test_next_start_same_day(self):
+        self.assertEqual(self.trader._next_funding_start(self.at(1, 0)), self.at(7, 50))
+        self.assertEqual(self.trader._next_funding_start(self.at(16, 30)), self.at(23, 30))
+        self.assertEqual(self.trader._next_funding_start(self.at(23, 29, 30)), self.at(23, 30))
+
+    def test_next_start_wraps_to_next_day(self):
+        self.trader.funding_windows = {0: (10, 10), 16 * 60: (10, 10)}
+        self.trader._build_funding_intervals()
+        self.assertEqual(self.trader._next_funding_start(self.at(20, 0)), self.at(7, 50) + DAY)
+
+    def test_remaining_across_midnight(self):
+        # 23:45 -> 窗口在次日00:20结束: 35分钟 + 5秒缓冲
+        self.assertEqual(self.remaining_at(self.at(23, 45)), 35 * 60 + 5)
+        self.assertEqual(self.remaining_at(self.at(0, 10) + DAY), 10 * 60 + 5)
+        self.assertEqual(self.remaining_at(self.at(0, 21) + DAY), 0)
+
+    def test_outside_window_short_circuits_until_next_start(self):
+        self.assertEqual(self.remaining_at(self.at(1, 0)), 0)
+        self.assertEqual(self.trader._funding_clear_until, self.at(7, 50))
+        self.assertEqual(self.remaining_at(self.at(7, 49, 59)), 0)
+        self.assertGreater(self.remaining_at(self.at(7, 50)), 0)
+
+    def test_seconds_until_window(self):
+        with mock.patch.object(pbt.time, "time", return_value=self.at(7, 0)):
+            self.assertEqual(self.trader._seconds_until_funding_window(), 50 * 60 + 1)
+
+
+@unittest.skipIf(pbt is None, "parallel_btc_trading dependencies are not installed")
+class TestPositionBalance(unittest.TestCase):
+    """_to_lighter_units / check_positions_balanced"""
+
+    def setUp(self):
+        self.trader = pbt.AccountTrader(make_account())
+        self.trader.size_decimals = 5
+
+    def stub_positions(self, paradex_size=None, lighter_size=None, lighter_sign=None,
+                       paradex_error=None, lighter_error=None):
+        async def paradex_positions():
+            if paradex_error is not None:
+                raise paradex_error
+            return [] if paradex_size is None else [{"market": "BTC-USD-PERP", "size": paradex_size}]
+
+        async def lighter_positions():
+            if lighter_error is not None:
+                raise lighter_error
+            return [] if lighter_size is None else [SimpleNamespace(position=lighter_size, sign=lighter_sign)]
+
+        self.trader.get_paradex_positions = paradex_positions
+        self.trader.get_lighter_positions = lighter_positions
+
+    def check(self, *args, **kwargs):
+        self.stub_positions(*args, **kwargs)
+        with self.assertLogs(pbt.logger, level="INFO"):
+            balanced, _, _ = asyncio.run(self.trader.check_positions_balanced())
+        return balanced
+
+    def test_to_lighter_units_is_exact(self):
+        self.assertEqual(self.trader._to_lighter_units(Decimal("0.001")), 100)
+        self.assertEqual(self.trader._to_lighter_units(Decimal("0.00029")), 29)
+        # 超出精度的部分截断，不四舍五入
+        self.assertEqual(self.trader._to_lighter_units(Decimal("0.0000199")), 1)
+        self.trader.size_decimals = 2
+        self.assertEqual(self.trader._to_lighter_units(Decimal("0.29")), 29)
+
+    def test_no_positions(self):
+        self.assertTrue(self.check())
+
+    def test_hedged_positions(self):
+        self.assertTrue(self.check("0.001", "0.00100", -1))
+        self.assertTrue(self.check("-0.001", "0.001", 1))
+
+    def test_same_direction_is_unbalanced(self):
+        self.assertFalse(self.check("0.001", "0.001", 1))
+        self.assertFalse(self.check("-0.001", "0.001", -1))
+
+    def test_size_tolerance(self):
+        self.assertTrue(self.check("0.001", "0.00105", -1))
+        self.assertFalse(self.check("0.001", "0.0012", -1))
+
+    def test_one_side_only(self):
+        self.assertFalse(self.check("0.001"))
+        self.assertFalse(self.check(None, "0.001", 1))
+
+    def test_failed_query_is_unknown(self):
+        self.assertIsNone(self.check(lighter_error=RuntimeError("boom")))
+        self.assertIsNone(self.check("0.001", lighter_error=RuntimeError("boom")))
+        self.assertIsNone(self.check(paradex_error=RuntimeError("boom"), lighter_size="0.001", lighter_sign=1))
+
+    def test_lighter_query_errors_propagate(self):
+        self.trader.lighter_client = object()
+        self.trader._fetch_lighter_account_snapshot = mock.AsyncMock(side_effect=RuntimeError("boom"))
+        with self.assertRaises(RuntimeError), self.assertLogs(pbt.logger, level="INFO"):
+            asyncio.run(self.trader.get_lighter_positions())
+
+    def test_retry_until_positions_are_known(self):
+        results = iter([(None, None, None), (None, None, None), (True, None, None)])
+        self.trader.check_positions_balanced = mock.AsyncMock(side_effect=lambda: next(results))
+        with mock.patch.object(pbt, "sleep_or_shutdown", mock.AsyncMock(return_value=False)) as sleep, \
+                self.assertLogs(pbt.logger, level="WARNING"):
+            self.assertTrue(asyncio.run(self.trader.check_positions_balanced_with_retry()))
+        self.assertEqual(sleep.await_count, 2)
+
+    def test_retry_gives_up_while_unknown(self):
+        self.trader.check_positions_balanced = mock.AsyncMock(return_value=(None, None, None))
+        with mock.patch.object(pbt, "sleep_or_shutdown", mock.AsyncMock(return_value=False)), \
+                self.assertLogs(pbt.logger, level="WARNING"):
+            self.assertIsNone(asyncio.run(self.trader.check_positions_balanced_with_retry(max_retries=3)))
+        self.assertEqual(self.trader.check_positions_balanced.await_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()